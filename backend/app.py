@@ -1,10 +1,13 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from routes import simulation, market, chat
-from services.ml.service import simulation_service
+from fastapi.responses import JSONResponse
+from routes import simulation, market, chat, admin
+from services.executor import Saturated, jobs_executor, simulation_executor
+from services.ml.service import ServiceNotReady, simulation_service
+from services.market_service import FINNHUB_API_KEY, market_refresher
 
 app = FastAPI(title="AEGRIS API", description="Institutional Trading Agent API", version="1.0.0")
 
@@ -23,15 +26,46 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Backpressure: saturated executors/upstreams answer fast with 503
+@app.exception_handler(Saturated)
+async def saturated_handler(request: Request, exc: Saturated):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+# Simulation routes answer 503 until the background model load is done
+@app.exception_handler(ServiceNotReady)
+async def not_ready_handler(request: Request, exc: ServiceNotReady):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc), "model_status": exc.status},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 # Routes
 app.include_router(simulation.router)
 app.include_router(market.router)
 app.include_router(chat.router)
+app.include_router(admin.router)
 
 @app.on_event("startup")
 async def startup_event():
+    # Model + market data load in the background; market/chat routes work right away
     print("Initializing Simulation Service...")
-    simulation_service.initialize()
+    simulation_service.start_loading()
+
+    if FINNHUB_API_KEY:
+        print("Starting market data refresher...")
+        market_refresher.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await market_refresher.stop()
+    simulation_service.shutdown()
+    jobs_executor.shutdown()
+    simulation_executor.shutdown()
 
 @app.get("/")
 async def root():
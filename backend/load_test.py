@@ -0,0 +1,127 @@
+"""
+Event-loop load test: `/` and `/api/simulation/state` latency while market calls are slow.
+
+Runs the app in-process under uvicorn with the Finnhub HTTP call replaced by a
+slow stub, measures baseline latency of the cheap endpoints, then measures it
+again while many clients request uncached quotes concurrently. With all
+blocking work off the event loop, the two distributions should match.
+
+Usage (from backend/):
+    python load_test.py [--upstream-delay 3] [--market-clients 40] [--duration 10]
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("FINNHUB_API_KEY", "load-test")
+
+import uvicorn
+
+import services.market_service as market_service
+from app import app
+
+HOST, PORT = "127.0.0.1", 8765
+BASE = f"http://{HOST}:{PORT}"
+PROBES = ["/", "/api/simulation/state"]
+
+
+class _SlowResponse:
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"c": 100.0, "d": 1.0, "dp": 1.0, "h": 101.0, "l": 99.0}
+
+
+def _stub_upstream(delay):
+    def slow_get(url, params=None, timeout=None):
+        time.sleep(delay)
+        return _SlowResponse()
+
+    market_service._session.get = slow_get
+
+
+def _get(path, timeout=30):
+    start = time.perf_counter()
+    retry_after = None
+    try:
+        with urllib.request.urlopen(BASE + path, timeout=timeout) as r:
+            r.read()
+            status = r.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+        retry_after = e.headers.get("Retry-After")
+    return status, (time.perf_counter() - start) * 1000, retry_after
+
+
+def _probe(duration):
+    samples = {p: [] for p in PROBES}
+    end = time.time() + duration
+    while time.time() < end:
+        for path in PROBES:
+            samples[path].append(_get(path)[1])
+        time.sleep(0.05)
+    return samples
+
+
+def _market_load(stop, clients, counter):
+    def worker(i):
+        n = 0
+        while not stop.is_set():
+            # Unique symbols -> cache misses -> slow upstream every time
+            status, _, retry_after = _get(f"/api/market/quote/LT{i}X{n}")
+            counter[status] = counter.get(status, 0) + 1
+            n += 1
+            if retry_after:
+                # Well-behaved client: honor backpressure
+                time.sleep(float(retry_after))
+
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        for i in range(clients):
+            pool.submit(worker, i)
+
+
+def _report(label, samples):
+    print(f"\n{label}")
+    for path, values in samples.items():
+        values = sorted(values)
+        p95 = values[int(0.95 * (len(values) - 1))]
+        print(f"  {path:<24} n={len(values):<4} p50={statistics.median(values):7.1f} ms  p95={p95:7.1f} ms  max={values[-1]:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--upstream-delay", type=float, default=3.0, help="seconds per stubbed Finnhub call")
+    parser.add_argument("--market-clients", type=int, default=40)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    _stub_upstream(args.upstream_delay)
+
+    server = uvicorn.Server(uvicorn.Config(app, host=HOST, port=PORT, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.1)
+
+    _report("Baseline (no market load)", _probe(args.duration / 2))
+
+    stop, counter = threading.Event(), {}
+    loader = threading.Thread(target=_market_load, args=(stop, args.market_clients, counter), daemon=True)
+    loader.start()
+    time.sleep(0.5)
+    loaded = _probe(args.duration)
+    stop.set()
+
+    _report(f"Under load ({args.market_clients} clients, {args.upstream_delay}s upstream)", loaded)
+    print(f"\n  market responses by status: {dict(sorted(counter.items()))}")
+
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
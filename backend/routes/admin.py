@@ -0,0 +1,50 @@
+"""Admin API – model versions: list, activate (hot-swap) and roll back."""
+import os
+import secrets
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+
+from services.ml.service import simulation_service
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+
+def require_admin(x_admin_token: str | None = Header(None)):
+    """Admin routes are disabled unless ADMIN_TOKEN is set; callers send it as X-Admin-Token."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin API disabled (set ADMIN_TOKEN)")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/api/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/models")
+async def list_models():
+    """Registered versions, which one is active/previous, and the last activation."""
+    simulation_service.registry.discover()
+    return simulation_service.registry.stats()
+
+
+@router.post("/models/{version}/activate", status_code=202)
+async def activate_model(
+    version: str,
+    migrate: bool = Query(False, description="Move running sessions to the new version too"),
+):
+    """Load and warm up `version` in the background, then swap it in; poll GET /models for the result."""
+    try:
+        return simulation_service.activate_model(version, migrate)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown model version {version!r}")
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.post("/models/rollback", status_code=202)
+async def rollback_model(migrate: bool = Query(False, description="Move running sessions back too")):
+    """Swap back to the previous version (kept loaded, so this is immediate)."""
+    try:
+        return simulation_service.rollback_model(migrate)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
@@ -4,7 +4,8 @@ from typing import Any
 
 from fastapi import APIRouter, HTTPException
 
-from services.market_service import get_market_summary, get_quote, get_quotes
+from services.executor import Saturated
+from services.market_service import get_market_summary, get_quotes
 
 router = APIRouter(prefix="/api/chat", tags=["chat"])
 
@@ -27,7 +28,7 @@ def extract_symbols(text: str) -> list[str]:
     return out[:5]
 
 
-def bot_response(user_message: str) -> dict[str, Any]:
+async def bot_response(user_message: str) -> dict[str, Any]:
     """Generate bot response using real market data."""
     msg = (user_message or "").strip().lower()
     if not msg:
@@ -37,7 +38,7 @@ def bot_response(user_message: str) -> dict[str, Any]:
     symbols = extract_symbols(user_message)
     if symbols or "price" in msg or "quote" in msg or "stock" in msg or "how much" in msg:
         to_fetch = symbols if symbols else ["AAPL", "MSFT", "GOOGL"]
-        quotes = get_quotes(to_fetch)
+        quotes = await get_quotes(to_fetch)
         if quotes:
             lines = []
             for q in quotes:
@@ -55,7 +56,7 @@ def bot_response(user_message: str) -> dict[str, Any]:
     # Where to invest / market today
     if "invest" in msg or "where to invest" in msg or "market today" in msg or "gainers" in msg or "losers" in msg:
         try:
-            summary = get_market_summary()
+            summary = await get_market_summary()
             sp = summary.get("sp500")
             gainers = summary.get("gainers", [])[:5]
             losers = summary.get("losers", [])[:3]
@@ -71,6 +72,8 @@ def bot_response(user_message: str) -> dict[str, Any]:
                 "reply": "\n\n".join(parts) if parts else "Market data is temporarily unavailable.",
                 "sources": ["market_summary"],
             }
+        except Saturated:
+            raise
         except Exception as e:
             return {"reply": f"Market data is temporarily unavailable ({str(e)}).", "sources": []}
 
@@ -93,7 +96,9 @@ async def chat_message(body: dict[str, str]):
     """Send a message and get bot response with real market data."""
     message = body.get("message") or body.get("text") or ""
     try:
-        result = bot_response(message)
+        result = await bot_response(message)
         return result
+    except Saturated:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
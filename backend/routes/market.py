@@ -1,10 +1,13 @@
 """Market data API – real-time quotes and summary."""
 from fastapi import APIRouter, HTTPException, Query
 
+from services.executor import Saturated
+
 from services.market_service import (
     get_market_summary,
     get_quote,
     get_quotes,
+    get_refresh_status,
     search_symbols,
 )
 
@@ -15,18 +18,26 @@ router = APIRouter(prefix="/api/market", tags=["market"])
 async def market_summary():
     """Dashboard summary: indices, watchlist, gainers, losers."""
     try:
-        return get_market_summary()
+        return await get_market_summary()
+    except Saturated:
+        raise
     except Exception as e:
         raise HTTPException(status_code=502, detail=str(e))
 
 
+@router.get("/status")
+async def market_status():
+    """Background refresh age, failure counts and quote cache stats."""
+    return get_refresh_status()
+
+
 @router.get("/quote/{symbol}")
 async def quote(symbol: str):
     """Current quote for one symbol (e.g. AAPL, ^GSPC)."""
     s = symbol.upper().strip()
     if not s:
         raise HTTPException(status_code=400, detail="Symbol required")
-    data = get_quote(s)
+    data = await get_quote(s)
     if not data:
         raise HTTPException(status_code=404, detail=f"Quote not found for {symbol}")
     return data
@@ -38,7 +49,7 @@ async def quotes(symbols: str = Query(..., description="Comma-separated symbols"
     sym_list = [x.strip().upper() for x in symbols.split(",") if x.strip()]
     if not sym_list:
         raise HTTPException(status_code=400, detail="At least one symbol required")
-    return get_quotes(sym_list[:30])
+    return await get_quotes(sym_list[:30])
 
 
 @router.get("/search")
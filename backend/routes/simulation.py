@@ -1,42 +1,188 @@
-from fastapi import APIRouter, HTTPException
-from services.ml.service import simulation_service
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from services.executor import Saturated, jobs_executor, simulation_executor
+from services.ml.service import SessionBusy, SimulationSession, simulation_service
 
 router = APIRouter(prefix="/api/simulation", tags=["simulation"])
 
+
+def _session_id(request: Request, session_id: str | None) -> str | None:
+    return session_id or request.headers.get("x-session-id")
+
+
+def current_session(
+    request: Request,
+    session_id: str | None = Query(None, description="Simulation session (or X-Session-Id header)"),
+) -> SimulationSession:
+    """Each client drives its own simulation; clients without an id share the default one."""
+    return simulation_service.session(_session_id(request, session_id))
+
+
+def existing_session(
+    request: Request,
+    session_id: str | None = Query(None, description="Simulation session (or X-Session-Id header)"),
+) -> SimulationSession:
+    """Read-only routes: unknown ids get 404 instead of a new session (no LRU churn from probes)."""
+    session_id = _session_id(request, session_id)
+    if session_id is None:
+        return simulation_service.session()
+    session = simulation_service.find_session(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Unknown simulation session; POST /start creates it")
+    return session
+
+
 @router.post("/start")
-async def start_simulation():
+async def start_simulation(session: SimulationSession = Depends(current_session)):
     """Reset and start the simulation"""
     try:
-        state = simulation_service.reset()
+        # Env reset/step run off the event loop on the bounded simulation executor
+        state = await simulation_executor.run(session.reset)
         return state
+    except Saturated:
+        raise
+    except SessionBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/step")
-async def step_simulation():
+async def step_simulation(session: SimulationSession = Depends(current_session)):
     """Advance the simulation by one step. Returns current state (with running=False if not active)."""
     try:
-        state = simulation_service.step()
+        state = await simulation_executor.run(session.step)
         return state
+    except Saturated:
+        raise
+    except SessionBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/run")
+async def run_simulation(
+    steps: int | None = Query(None, ge=1, description="Steps to advance (until the end of data when omitted)"),
+    record: bool = Query(True, description="Record/stream every step; false keeps only the final state"),
+    background: bool = Query(False, description="Return a job immediately; poll GET /run for progress"),
+    reset: bool = Query(False, description="Start a fresh run first"),
+    session: SimulationSession = Depends(current_session),
+):
+    """Fast-forward the simulation server-side and return a summary of the stretch."""
+    try:
+        if not background:
+            return await simulation_executor.run(session.run, steps, record, reset)
+
+        job = session.start_job(steps, record, reset)
+        try:
+            jobs_executor.submit(session.run_job, job)
+        except Saturated:
+            job.status = "failed"
+            raise
+        return job.to_dict()
+    except Saturated:
+        raise
+    except SessionBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/run")
+async def run_status(session: SimulationSession = Depends(existing_session)):
+    """Progress (and result, once finished) of the session's latest background run"""
+    if session.job is None:
+        raise HTTPException(status_code=404, detail="No run job for this session")
+    return session.job.to_dict()
+
+@router.delete("/run")
+async def cancel_run(session: SimulationSession = Depends(existing_session)):
+    """Cancel the session's background run; steps already taken are kept"""
+    if session.job is None:
+        raise HTTPException(status_code=404, detail="No run job for this session")
+    session.job.cancel()
+    return session.job.to_dict()
+
 @router.get("/state")
-async def get_state():
+async def get_state(session: SimulationSession = Depends(existing_session)):
     """Get current simulation state"""
-    return simulation_service.get_state()
+    return session.get_state()
+
+@router.get("/stream")
+async def stream_simulation(
+    request: Request,
+    since: int | None = Query(None, description="Resume after this step"),
+    run_id: str | None = Query(None, description="Run `since` belongs to (history `run_id`); another run is replayed from its start"),
+    session: SimulationSession = Depends(existing_session),
+):
+    """Server-Sent Events: one `snapshot` event per step, `reset` when a new run starts."""
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id is None and run_id is not None and since is not None:
+        # Same "<run_id>-<step>" cursor EventSource sends on reconnect
+        last_event_id = f"{run_id}-{since}"
+    frames = session.stream.subscribe(since=since, last_event_id=last_event_id)
+    return StreamingResponse(
+        frames,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @router.get("/history")
-async def get_history():
-    """Get full simulation history"""
-    return simulation_service.get_history()
+async def get_history(
+    request: Request,
+    since: int | None = Query(None, description="Only steps after this one"),
+    limit: int | None = Query(None, ge=1, description="Max steps returned"),
+    format: str = Query("records", pattern="^(records|columnar)$"),
+    session: SimulationSession = Depends(existing_session),
+):
+    """Simulation history (incremental with `since`/`limit`; `format=columnar` for one array per field)."""
+    etag, payload = session.get_history(since, limit, columnar=format == "columnar")
+    # Per-session data: shared caches must not serve it to another X-Session-Id
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "X-Session-Id"}
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+
+    return JSONResponse(payload, headers=headers)
+
+@router.delete("/session")
+async def close_session(request: Request):
+    """Drop the caller's own session (X-Session-Id header) and free its env/history"""
+    session_id = request.headers.get("x-session-id")
+    if not session_id:
+        raise HTTPException(status_code=400, detail="X-Session-Id header required")
+    return {"closed": simulation_service.close_session(session_id)}
+
+@router.get("/sessions")
+async def sessions():
+    """Live sessions, eviction counters and per-session memory"""
+    return simulation_service.stats()
+
+@router.get("/inference")
+async def inference():
+    """Batched inference metrics: batch sizes, queue wait and forward latency"""
+    if simulation_service.batcher is None:
+        return {"batching": False}
+    return {"batching": True, **simulation_service.batcher.stats()}
 
 
 @router.get("/health")
-async def health():
-    """Backend and model status for frontend"""
+async def health(request: Request, session_id: str | None = Query(None)):
+    """Backend and model status for frontend (`model_status`: loading / ready / failed)"""
+    running = False
+    if simulation_service.status == "ready":
+        # Probes must not create or refresh sessions
+        session = simulation_service.find_session(_session_id(request, session_id), touch=False)
+        running = session is not None and session.running
+
     return {
         "status": "ok",
-        "model_loaded": simulation_service.model is not None,
-        "running": simulation_service.running,
+        "model_status": simulation_service.status,
+        "model_loaded": simulation_service.policy is not None,
+        "policy": type(simulation_service.policy).__name__ if simulation_service.policy else None,
+        "model_version": simulation_service.registry.active.name if simulation_service.registry.active else None,
+        "load_seconds": simulation_service.load_seconds,
+        "error": simulation_service.error,
+        "running": running,
+        "sessions": len(simulation_service.sessions),
+        "executor": simulation_executor.stats(),
     }
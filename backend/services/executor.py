@@ -0,0 +1,83 @@
+"""Bounded executors for blocking work behind async route handlers."""
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+
+class Saturated(Exception):
+    """Raised when a bounded resource is full; mapped to 503 + Retry-After."""
+
+    def __init__(self, resource: str, retry_after: int = 1):
+        super().__init__(f"{resource} is saturated, retry later")
+        self.resource = resource
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    """
+    Thread pool with a bounded queue.
+
+    At most `max_workers` jobs run and `max_queue` more may wait; beyond
+    that `run()` raises Saturated immediately instead of queueing without
+    limit, so overload turns into fast 503s rather than growing latency.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int, retry_after: int = 1):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._active = 0
+        self._rejected = 0
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run `fn` on the pool and await its result without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Queue `fn` without waiting for it (background jobs); raises Saturated when full."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise Saturated(self.name, self.retry_after)
+
+        try:
+            future = self._pool.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._active += 1
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, _future):
+        with self._lock:
+            self._active -= 1
+        self._slots.release()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._active,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Env stepping; a per-session lock keeps each env single-threaded. Workers mostly
+# wait on the inference batcher, so more of them means larger inference batches.
+simulation_executor = BoundedExecutor("simulation", max_workers=16, max_queue=128)
+
+# Background fast-forward runs; each holds a worker for the whole run
+jobs_executor = BoundedExecutor("simulation-jobs", max_workers=2, max_queue=8, retry_after=5)
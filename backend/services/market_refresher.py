@@ -0,0 +1,117 @@
+"""Background market-data refresher driven by the app lifecycle."""
+import asyncio
+import random
+import time
+from typing import Any, Callable
+
+
+class MarketRefresher:
+    """
+    Periodically runs a blocking `refresh()` (returns symbol -> refreshed)
+    off the event loop, so requests are served from memory.
+
+    A round that refreshes any symbol counts as a success; failing symbols
+    are tracked one by one. Only rounds where nothing refreshed back off,
+    exponentially and jittered, capped so that the next attempt still lands
+    well inside `stale_ttl` (refreshed quotes never expire while backing
+    off). `status()` exposes refresh age and failure counts for staleness
+    alerts.
+    """
+
+    def __init__(
+        self,
+        refresh: Callable[[], dict[str, bool]],
+        interval: float = 30,
+        jitter: float = 0.2,
+        max_backoff: float = 300,
+        stale_ttl: float | None = None,
+    ):
+        self._refresh = refresh
+        self.interval = interval
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        if stale_ttl is not None:
+            # Two attempts per stale window, even at the top of the jitter
+            self.max_backoff = min(max_backoff, stale_ttl / (2 * (1 + jitter)))
+
+        self._task: asyncio.Task | None = None
+        self.last_attempt: float | None = None
+        self.last_success: float | None = None
+        self.refreshes = 0
+        self.failed_rounds = 0
+        self.failed_symbols = 0
+        self.consecutive_failures = 0
+        self.last_error: str | None = None
+        self.symbol_failures: dict[str, int] = {}   # consecutive failed rounds per symbol
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def has_data(self) -> bool:
+        return self.last_success is not None
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.create_task(self._run(), name="market-refresher")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await self.refresh_once()
+            await asyncio.sleep(self._next_delay())
+
+    async def refresh_once(self):
+        self.last_attempt = time.monotonic()
+        try:
+            results = await asyncio.to_thread(self._refresh)
+            self.last_error = None
+        except Exception as e:
+            results = {}
+            self.last_error = str(e)
+
+        self.refreshes += 1
+        failed = [symbol for symbol, ok in results.items() if not ok]
+        self.failed_symbols += len(failed)
+        for symbol, ok in results.items():
+            self.symbol_failures[symbol] = 0 if ok else self.symbol_failures.get(symbol, 0) + 1
+
+        if len(failed) < len(results):
+            # Anything refreshed: the cache has data, keep the normal cadence
+            self.last_success = time.monotonic()
+            self.consecutive_failures = 0
+            if failed:
+                print(f"MARKET REFRESH PARTIAL: {len(failed)}/{len(results)} symbols failed ({', '.join(failed)})")
+        else:
+            self.failed_rounds += 1
+            self.consecutive_failures += 1
+            print(f"MARKET REFRESH FAILED (x{self.consecutive_failures}): {self.last_error or f'{len(failed)} symbols'}")
+
+    def _next_delay(self) -> float:
+        delay = self.interval * (2 ** self.consecutive_failures)
+        delay = min(delay, self.max_backoff)
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def status(self) -> dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "running": self.running,
+            "interval": self.interval,
+            "last_refresh_age": None if self.last_success is None else round(now - self.last_success, 1),
+            "last_attempt_age": None if self.last_attempt is None else round(now - self.last_attempt, 1),
+            "refreshes": self.refreshes,
+            "failed_rounds": self.failed_rounds,
+            "failed_symbols": self.failed_symbols,
+            "consecutive_failures": self.consecutive_failures,
+            "failing_symbols": {s: n for s, n in self.symbol_failures.items() if n},
+            "last_error": self.last_error,
+        }
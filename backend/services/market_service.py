@@ -1,20 +1,38 @@
 import os
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from typing import Any
-from datetime import datetime, timedelta
+from datetime import datetime
+
+from services.market_refresher import MarketRefresher
+from services.quote_cache import QuoteCache
 
 FINNHUB_API_KEY = os.getenv("FINNHUB_API_KEY")
 BASE_URL = "https://finnhub.io/api/v1"
 
 INDICES = ["^GSPC", "^IXIC", "^DJI"]
 WATCHLIST = ["AAPL", "MSFT", "GOOGL", "AMZN", "META", "NVDA", "TSLA", "JPM"]
+SUMMARY_SYMBOLS = list(dict.fromkeys(INDICES + WATCHLIST))
+
+# -----------------------------
+# 🔥 Per-symbol quote cache
+# -----------------------------
+CACHE_TTL = int(os.getenv("QUOTE_CACHE_TTL", 60))              # fresh for (seconds)
+CACHE_STALE_TTL = int(os.getenv("QUOTE_CACHE_STALE_TTL", 300))  # served while revalidating
+CACHE_MAX_SYMBOLS = int(os.getenv("QUOTE_CACHE_SIZE", 512))
+REFRESH_INTERVAL = int(os.getenv("MARKET_REFRESH_INTERVAL", 30))  # background pre-warm (seconds)
 
 # -----------------------------
-# 🔥 Simple in-memory cache
+# Upstream HTTP: pooled + concurrent
 # -----------------------------
-_CACHE_DATA: dict[str, Any] | None = None
-_CACHE_TIME: datetime | None = None
-CACHE_TTL = 60  # seconds
+MAX_WORKERS = 12             # concurrent upstream calls (covers the 11-symbol summary)
+REQUEST_TIMEOUT = (3.05, 5)  # (connect, read) seconds per call
+BATCH_DEADLINE = 8           # seconds for a whole get_quotes batch
+
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=MAX_WORKERS))
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="finnhub")
 
 
 def _map_symbol(symbol: str) -> str:
@@ -37,7 +55,8 @@ def _fetch_quote(symbol: str) -> dict[str, Any] | None:
             "token": FINNHUB_API_KEY
         }
 
-        response = requests.get(url, params=params, timeout=10)
+        # Keep-alive session: no TCP/TLS handshake per quote
+        response = _session.get(url, params=params, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
 
         data = response.json()
@@ -61,25 +80,47 @@ def _fetch_quote(symbol: str) -> dict[str, Any] | None:
         return None
 
 
-def get_quotes(symbols: list[str]) -> list[dict[str, Any]]:
-    results = []
-    for symbol in symbols:
-        quote = _fetch_quote(symbol)
-        if quote:
-            results.append(quote)
-    return results
+_quote_cache = QuoteCache(
+    _fetch_quote,
+    _executor,
+    ttl=CACHE_TTL,
+    stale_ttl=CACHE_STALE_TTL,
+    max_size=CACHE_MAX_SYMBOLS,
+)
+
+
+async def get_quotes(symbols: list[str], deadline: float = BATCH_DEADLINE) -> list[dict[str, Any]]:
+    """Quotes via the per-symbol cache; symbols not resolved by the deadline are left out (partial result)."""
+    found = await _quote_cache.get_many(symbols, deadline)
+    return [found[s] for s in symbols if s in found]
 
 
-def get_market_summary() -> dict[str, Any]:
-    global _CACHE_DATA, _CACHE_TIME
+def get_cache_stats() -> dict[str, Any]:
+    return _quote_cache.stats()
 
-    # ✅ Return cached data if still valid
-    if _CACHE_DATA and _CACHE_TIME:
-        if datetime.utcnow() - _CACHE_TIME < timedelta(seconds=CACHE_TTL):
-            return _CACHE_DATA
 
-    symbols = list(dict.fromkeys(INDICES + WATCHLIST))
-    quotes = get_quotes(symbols)
+# -----------------------------
+# Background pre-warm (started by the app lifecycle)
+# -----------------------------
+market_refresher = MarketRefresher(
+    lambda: _quote_cache.refresh(SUMMARY_SYMBOLS, BATCH_DEADLINE),
+    interval=REFRESH_INTERVAL,
+    stale_ttl=CACHE_STALE_TTL,
+)
+
+
+def get_refresh_status() -> dict[str, Any]:
+    return {**market_refresher.status(), "cache": get_cache_stats()}
+
+
+async def get_market_summary() -> dict[str, Any]:
+    # ✅ Assembled from the per-symbol quote cache; once the background
+    # refresher has warmed it, never wait on upstream here
+    if market_refresher.has_data:
+        cached = _quote_cache.peek_many(SUMMARY_SYMBOLS)
+        quotes = [cached[s] for s in SUMMARY_SYMBOLS if s in cached]
+    else:
+        quotes = await get_quotes(SUMMARY_SYMBOLS)
 
     indices = [q for q in quotes if q["symbol"] in INDICES]
     watchlist = [q for q in quotes if q["symbol"] in WATCHLIST]
@@ -99,15 +140,12 @@ def get_market_summary() -> dict[str, Any]:
         "timestamp": datetime.utcnow().isoformat() + "Z",
     }
 
-    # ✅ Save to cache
-    _CACHE_DATA = summary
-    _CACHE_TIME = datetime.utcnow()
-
     return summary
 
 
-def get_quote(symbol: str) -> dict[str, Any] | None:
-    return _fetch_quote(symbol)
+async def get_quote(symbol: str) -> dict[str, Any] | None:
+    quotes = await get_quotes([symbol])
+    return quotes[0] if quotes else None
 
 
 def search_symbols(query: str) -> list[str]:
@@ -0,0 +1,149 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+# ============================================================
+# Micro-batched policy inference
+# ============================================================
+
+class InferenceBatcher:
+    """
+    Collects single-observation requests from concurrent sessions and runs
+    them through the policy as one batched forward pass.
+
+    A dedicated worker takes the first pending request, then keeps
+    collecting until `max_batch` requests are queued or `window_ms` has
+    passed, calls `predict` on the stacked batch and resolves every
+    caller's future with its own row. Requests that arrive while a forward
+    pass is running are picked up by the next batch, so batches grow with
+    load even with a zero window. The window is skipped while the previous
+    batch was a single request, so a lone session pays no added wait.
+
+    Requests may name their own `predict` (e.g. sessions pinned to different
+    model versions); a batch is split into one forward pass per policy.
+    """
+
+    def __init__(self, predict=None, max_batch=32, window_ms=1.0, latency_samples=2_048):
+        self._predict = predict
+        self.max_batch = max_batch
+        self.window = window_ms / 1000.0
+
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._last_size = 1
+
+        # Metrics
+        self._started_at = time.monotonic()
+        self._requests = 0
+        self._batches = 0
+        self._errors = 0
+        self._batch_sizes = np.zeros(max_batch + 1, dtype=np.int64)
+        self._wait_ms = deque(maxlen=latency_samples)      # enqueue -> forward start
+        self._forward_ms = deque(maxlen=latency_samples)   # one batched forward pass
+
+    # ------------------------
+    # Callers (any thread)
+    # ------------------------
+    def submit(self, obs, predict=None):
+        """Queue one observation; the future resolves to its action."""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((obs, future, time.perf_counter(), predict or self._predict))
+        return future
+
+    def act(self, obs, predict=None):
+        """Blocking action for one observation."""
+        return self.submit(obs, predict).result()
+
+    def _ensure_worker(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+                    self._thread.start()
+
+    # ------------------------
+    # Worker
+    # ------------------------
+    def _collect(self):
+        batch = [self._queue.get()]
+        # Only wait for company when the last batch had some
+        window = self.window if self._last_size > 1 else 0.0
+        deadline = time.perf_counter() + window
+
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            self._last_size = len(batch)
+
+            groups = {}
+            for item in batch:
+                groups.setdefault(item[3], []).append(item)
+            for predict, items in groups.items():
+                self._forward(predict, items)
+
+    def _forward(self, predict, batch):
+        start = time.perf_counter()
+        try:
+            actions = predict(np.stack([obs for obs, _, _, _ in batch]))
+        except Exception as e:
+            for _, future, _, _ in batch:
+                future.set_exception(e)
+            with self._lock:
+                self._errors += 1
+            return
+
+        elapsed = time.perf_counter() - start
+        for (_, future, _, _), action in zip(batch, actions):
+            future.set_result(action)
+
+        with self._lock:
+            self._requests += len(batch)
+            self._batches += 1
+            self._batch_sizes[len(batch)] += 1
+            self._forward_ms.append(elapsed * 1000)
+            self._wait_ms.extend((start - queued) * 1000 for _, _, queued, _ in batch)
+
+    # ------------------------
+    # Metrics
+    # ------------------------
+    def stats(self):
+        with self._lock:
+            wait = np.array(self._wait_ms)
+            forward = np.array(self._forward_ms)
+            sizes = {int(n): int(c) for n, c in enumerate(self._batch_sizes) if c}
+            uptime = time.monotonic() - self._started_at
+
+            return {
+                "max_batch": self.max_batch,
+                "window_ms": self.window * 1000,
+                "requests": self._requests,
+                "batches": self._batches,
+                "errors": self._errors,
+                "mean_batch_size": round(self._requests / self._batches, 2) if self._batches else 0,
+                "batch_sizes": sizes,
+                "actions_per_sec": round(self._requests / uptime, 1) if uptime else 0,
+                "queue_wait_ms": _percentiles(wait),
+                "forward_ms": _percentiles(forward),
+            }
+
+
+def _percentiles(samples):
+    if not len(samples):
+        return {"p50": 0, "p95": 0, "max": 0}
+    p50, p95 = np.percentile(samples, [50, 95])
+    return {"p50": round(float(p50), 3), "p95": round(float(p95), 3), "max": round(float(samples.max()), 3)}
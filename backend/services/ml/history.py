@@ -0,0 +1,166 @@
+import threading
+
+import numpy as np
+
+# ============================================================
+# Columnar simulation history
+# ============================================================
+
+RETENTION_POLICIES = ("full", "ring", "downsample")
+
+SCALAR_FIELDS = {
+    "step": np.int64,
+    "portfolio_value": np.float64,
+    "drawdown": np.float64,
+    "volatility": np.float64,
+    "turnover": np.float64,
+}
+
+# Running performance metrics of the run so far (see metrics.RunningMetrics).
+# Ratios are display values, so float32; the cumulative totals keep float64
+METRIC_FIELDS = {
+    "sharpe": np.float32,
+    "max_drawdown": np.float32,
+    "cagr": np.float32,
+    "annual_volatility": np.float32,
+    "win_rate": np.float32,
+    "total_turnover": np.float64,
+    "total_costs": np.float64,
+}
+SCALAR_FIELDS.update(METRIC_FIELDS)
+
+
+class HistoryStore:
+    """
+    Per-field NumPy columns for simulation snapshots, weights as an
+    (n, n_assets) float32 block. Rows are converted to JSON-ready lists
+    only when read at the API boundary.
+
+    Retention:
+    - "full":       keep every step; capacity doubles as needed
+    - "ring":       keep at most the last `max_steps` steps (the oldest
+                    quarter is dropped at once to amortize the shift)
+    - "downsample": at `max_steps`, the older half is thinned to every
+                    other step, so old history gets coarser, recent stays exact
+
+    Steps are kept in ascending order, so lookups by step are a binary search.
+    """
+
+    def __init__(self, n_assets, retention="full", max_steps=50_000, initial_capacity=256):
+        if retention not in RETENTION_POLICIES:
+            raise ValueError(f"retention must be one of {RETENTION_POLICIES}, got {retention!r}")
+
+        self.n_assets = n_assets
+        self.retention = retention
+        self.max_steps = max_steps
+        self._initial_capacity = initial_capacity if retention == "full" else min(initial_capacity, max_steps)
+
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._n = 0
+            self.appended = 0     # total rows ever appended; changes on every append
+            self._allocate(self._initial_capacity)
+
+    def _allocate(self, capacity):
+        n = getattr(self, "_n", 0)
+        columns = {}
+        for field, dtype in SCALAR_FIELDS.items():
+            columns[field] = np.empty(capacity, dtype=dtype)
+        columns["weights"] = np.empty((capacity, self.n_assets), dtype=np.float32)
+
+        if n:
+            for field, column in columns.items():
+                column[:n] = self._columns[field][:n]
+        self._columns = columns
+        self.capacity = capacity
+
+    def __len__(self):
+        return self._n
+
+    # ------------------------
+    # Writing
+    # ------------------------
+    def append(self, snapshot, weights):
+        """Store one snapshot dict (every SCALAR_FIELDS key) and its weight vector."""
+        with self._lock:
+            if self._n == self.capacity:
+                self._make_room()
+
+            i = self._n
+            cols = self._columns
+            for field in SCALAR_FIELDS:
+                cols[field][i] = snapshot[field]
+            cols["weights"][i] = weights
+            self._n += 1
+            self.appended += 1
+
+    def _make_room(self):
+        if self.retention == "full":
+            self._allocate(self.capacity * 2)
+        elif self.capacity < self.max_steps:
+            self._allocate(min(self.capacity * 2, self.max_steps))
+        elif self.retention == "ring":
+            # Drop the oldest quarter in one move so the shift is amortized
+            self._keep(np.arange(self.capacity // 4, self._n))
+        else:
+            half = self._n // 2
+            self._keep(np.concatenate([np.arange(0, half, 2), np.arange(half, self._n)]))
+
+    def _keep(self, rows):
+        for column in self._columns.values():
+            column[:len(rows)] = column[rows]
+        self._n = len(rows)
+
+    # ------------------------
+    # Reading (JSON boundary)
+    # ------------------------
+    def read(self, since=None, limit=None):
+        """
+        (appended, columns) for steps after `since` (all when None), at most
+        `limit` rows, taken under one lock so retention can't shift rows in between.
+        """
+        with self._lock:
+            steps = self._columns["step"][:self._n]
+            start = 0 if since is None else int(np.searchsorted(steps, since, side="right"))
+            stop = self._n if limit is None else min(start + limit, self._n)
+            return self.appended, self._slice(start, stop)
+
+    def columns(self, start=0, stop=None):
+        """Rows [start, stop) as one list per field (weights as a list of rows)."""
+        with self._lock:
+            return self._slice(start, self._n if stop is None else min(stop, self._n))
+
+    def records(self, start=0, stop=None):
+        """Rows [start, stop) as snapshot dicts."""
+        return to_records(self.columns(start, stop))
+
+    def last(self):
+        with self._lock:
+            if not self._n:
+                return None
+            cols = self._slice(self._n - 1, self._n)
+        return to_records(cols)[0]
+
+    def _slice(self, start, stop):
+        return {field: column[start:stop].tolist() for field, column in self._columns.items()}
+
+    # ------------------------
+    # Memory
+    # ------------------------
+    @property
+    def nbytes(self):
+        return sum(column.nbytes for column in self._columns.values())
+
+    @property
+    def bytes_per_step(self):
+        """Bytes used by one stored step (excluding unused capacity)."""
+        return sum(column.itemsize * (column.shape[1] if column.ndim == 2 else 1) for column in self._columns.values())
+
+
+def to_records(cols):
+    """Column lists -> snapshot dicts (the original per-step JSON shape)."""
+    fields = list(cols)
+    return [{**dict(zip(fields, row)), "running": True} for row in zip(*cols.values())]
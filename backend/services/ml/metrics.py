@@ -1,5 +1,6 @@
 import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 from pathlib import Path
 
 
@@ -40,10 +41,189 @@ def win_rate(returns):
     return np.mean(returns > 0)
 
 
-def generate_report(equity_curve, save_dir="reports"):
-    save_dir = Path(save_dir)
-    save_dir.mkdir(exist_ok=True)
+class RunningMetrics:
+    """
+    Online version of the metrics above: O(1) update per step, no stored curve.
+
+    Matches sharpe_ratio / max_drawdown / cagr / volatility / win_rate on the
+    equity curve seen so far (initial value included), and also accumulates
+    turnover and transaction costs (in currency).
+    """
+
+    def __init__(self, initial_value, risk_free_rate=0.02, periods_per_year=252):
+        self.initial_value = float(initial_value)
+        self.risk_free_rate = risk_free_rate
+        self.periods_per_year = periods_per_year
+        self.reset()
+
+    def reset(self):
+        self.n = 0
+        self.value = self.initial_value
+        self.peak = self.initial_value
+        self.max_drawdown = 0.0
+        self.wins = 0
+        self.turnover = 0.0
+        self.costs = 0.0
+        # Welford running mean / sum of squared deviations of returns
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def update(self, value, turnover=0.0, cost=0.0):
+        """Add one step: new portfolio value, its turnover and cost (fraction of value)."""
+        value = float(value)
+        r = value / self.value - 1.0
+
+        self.n += 1
+        delta = r - self._mean
+        self._mean += delta / self.n
+        self._m2 += delta * (r - self._mean)
+
+        self.wins += r > 0
+        self.costs += cost * self.value
+        self.turnover += turnover
+        self.value = value
+        self.peak = max(self.peak, value)
+        self.max_drawdown = min(self.max_drawdown, value / self.peak - 1.0)
+
+    @property
+    def sharpe(self):
+        if self.n < 2:
+            return 0.0
+        excess = self._mean - self.risk_free_rate / self.periods_per_year
+        return np.sqrt(self.periods_per_year) * excess / (self.std + 1e-8)
+
+    @property
+    def std(self):
+        return np.sqrt(self._m2 / self.n) if self.n else 0.0
+
+    @property
+    def volatility(self):
+        return self.std * np.sqrt(self.periods_per_year)
+
+    @property
+    def cagr(self):
+        years = (self.n + 1) / self.periods_per_year
+        return (self.value / self.initial_value) ** (1 / years) - 1
+
+    @property
+    def win_rate(self):
+        return self.wins / self.n if self.n else 0.0
+
+    def to_dict(self):
+        return {
+            "sharpe": float(self.sharpe),
+            "max_drawdown": float(self.max_drawdown),
+            "cagr": float(self.cagr),
+            "annual_volatility": float(self.volatility),
+            "win_rate": float(self.win_rate),
+            "total_turnover": float(self.turnover),
+            "total_costs": float(self.costs),
+        }
+
+
+# ============================================================
+# Rolling analytics
+# ============================================================
+#
+# Each function works along the last axis, so a (n_runs, T) stack of curves
+# is processed in one call. Values before the first full window are NaN.
+# Window sums come from cumulative sums (O(T) whatever the window) and
+# window maxima from a zero-copy sliding_window_view.
+
+def _rolling_mean(values, window):
+    """Mean over the trailing `window` values along the last axis."""
+    out = np.full(values.shape, np.nan)
+    if window > values.shape[-1]:
+        return out
+
+    csum = np.cumsum(values, axis=-1)
+    total = csum[..., window - 1:].copy()
+    total[..., 1:] -= csum[..., :-window]
+    out[..., window - 1:] = total / window
+    return out
+
+
+def _centered(values):
+    # Removing each row's mean first keeps the running sums well conditioned
+    values = np.asarray(values, dtype=np.float64)
+    return values - values.mean(axis=-1, keepdims=True)
+
+
+def _rolling_std(values, window):
+    centered = _centered(values)
+    mean = _rolling_mean(centered, window)
+    var = _rolling_mean(centered * centered, window) - mean * mean
+    return np.sqrt(np.maximum(var, 0.0))
 
+
+def rolling_volatility(returns, window=63, periods_per_year=252):
+    """`volatility` (annualized std of returns) of each trailing window."""
+    return _rolling_std(returns, window) * np.sqrt(periods_per_year)
+
+
+def rolling_sharpe(returns, window=63, risk_free_rate=0.02, periods_per_year=252):
+    """`sharpe_ratio` of each trailing window."""
+    returns = np.asarray(returns, dtype=np.float64)
+    excess = _rolling_mean(returns, window) - risk_free_rate / periods_per_year
+    return np.sqrt(periods_per_year) * excess / (_rolling_std(returns, window) + 1e-8)
+
+
+def underwater(equity_curve):
+    """Drawdown from the running peak at every step (<= 0; its min is `max_drawdown`)."""
+    equity_curve = np.asarray(equity_curve, dtype=np.float64)
+    peak = np.maximum.accumulate(equity_curve, axis=-1)
+    return (equity_curve - peak) / peak
+
+
+def rolling_drawdown(equity_curve, window=252):
+    """Drawdown from the peak of the trailing `window` steps."""
+    equity_curve = np.asarray(equity_curve, dtype=np.float64)
+    out = np.full(equity_curve.shape, np.nan)
+    if window > equity_curve.shape[-1]:
+        return out
+
+    peak = sliding_window_view(equity_curve, window, axis=-1).max(axis=-1)
+    out[..., window - 1:] = equity_curve[..., window - 1:] / peak - 1
+    return out
+
+
+def rolling_beta(returns, index_returns, window=63):
+    """Beta of returns to an index over each trailing window; the index may be (T,) or (n_runs, T)."""
+    x = _centered(index_returns)
+    y = _centered(returns)
+    mean_x, mean_y = _rolling_mean(x, window), _rolling_mean(y, window)
+    cov = _rolling_mean(x * y, window) - mean_x * mean_y
+    var = _rolling_mean(x * x, window) - mean_x * mean_x
+    return cov / (var + 1e-12)
+
+
+def rolling_metrics(equity_curve, window=63, index_curve=None):
+    """All rolling series of one curve (or a stack of curves), aligned with the equity steps."""
+    equity_curve = np.asarray(equity_curve, dtype=np.float64)
+    returns = np.diff(equity_curve, axis=-1) / equity_curve[..., :-1]
+
+    def per_step(series):
+        # Return series start one step later than the equity curve
+        pad = np.full(series.shape[:-1] + (1,), np.nan)
+        return np.concatenate([pad, series], axis=-1)
+
+    # Short curves get one window spanning the whole curve
+    window = max(min(window, returns.shape[-1]), 1)
+    metrics = {
+        "rolling_sharpe": per_step(rolling_sharpe(returns, window)),
+        "rolling_volatility": per_step(rolling_volatility(returns, window)),
+        "rolling_drawdown": rolling_drawdown(equity_curve, window + 1),
+        "underwater": underwater(equity_curve),
+    }
+    if index_curve is not None:
+        index_curve = np.asarray(index_curve, dtype=np.float64)
+        index_returns = np.diff(index_curve, axis=-1) / index_curve[..., :-1]
+        metrics["rolling_beta"] = per_step(rolling_beta(returns, index_returns, window))
+    return metrics
+
+
+def generate_report(equity_curve, save_dir="reports", window=63, index_curve=None):
+    """Whole-curve metrics; with save_dir=None they are only returned (no files, no rolling series)."""
     equity_curve = np.array(equity_curve)
     returns = compute_returns(equity_curve)
 
@@ -57,10 +237,20 @@ def generate_report(equity_curve, save_dir="reports"):
         "Win Rate (%)": win_rate(returns) * 100,
     }
 
+    if save_dir is None:
+        return metrics
+
+    save_dir = Path(save_dir)
+    save_dir.mkdir(exist_ok=True)
+
     df_metrics = pd.DataFrame(metrics, index=[0])
     df_metrics.to_csv(save_dir / "performance_metrics.csv", index=False)
 
     equity_df = pd.DataFrame({"equity": equity_curve})
     equity_df.to_csv(save_dir / "equity_curve.csv", index=False)
 
+    rolling = rolling_metrics(equity_curve, window, index_curve)
+    rolling_df = pd.DataFrame({"equity": equity_curve, **rolling})
+    rolling_df.to_csv(save_dir / "rolling_metrics.csv", index=False)
+
     return metrics
@@ -0,0 +1,325 @@
+import json
+import pickle
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from .actor import ARTIFACT_NAME, ActorPolicy
+
+# ============================================================
+# Model registry: versioned policies with background warm-up
+# ============================================================
+#
+# models/
+#   registry/
+#     <version>/            aegris_actor.npz  (or aegris_sac_final.zip + vecnormalize.pkl)
+#                           meta.json         created_at, data_fingerprint, notes
+#     active.json           {"active": ..., "previous": ...} survives restarts
+#   checkpoints/            legacy training output, listed as version "checkpoints"
+
+REGISTRY_DIRNAME = "registry"
+ACTIVE_FILE = "active.json"
+LEGACY_VERSION = "checkpoints"
+SAC_NAME = "aegris_sac_final"
+VECNORM_NAME = "vecnormalize.pkl"
+
+
+class PolicyBundle:
+    """
+    Full SB3 SAC policy plus frozen VecNormalize observation stats.
+    Fallback for versions without an exported actor artifact.
+    """
+
+    def __init__(self, model, vecnorm=None):
+        self.model = model
+        self.vecnorm = vecnorm
+
+    @property
+    def obs_dim(self):
+        return self.model.observation_space.shape[0]
+
+    def predict(self, obs):
+        """Deterministic actions for a (n, obs_dim) batch of raw observations."""
+        if self.vecnorm is not None:
+            obs = self.vecnorm.normalize_obs(obs)
+        actions, _ = self.model.predict(obs, deterministic=True)
+        return actions
+
+    def act(self, obs):
+        """Action for a single observation."""
+        return self.predict(obs[None, :])[0]
+
+
+class ModelVersion:
+    """One registered policy: files on disk, metadata and (once loaded) the policy."""
+
+    def __init__(self, name, path, meta=None):
+        self.name = name
+        self.path = Path(path)
+        self.meta = meta or {}
+        self.policy = None
+        self.kind = None
+        self.batcher = None
+        self.loaded_at = None
+        self.load_seconds = None
+        self.warmup_ms = None
+
+    @property
+    def loaded(self):
+        return self.policy is not None
+
+    @property
+    def created_at(self):
+        return self.meta.get("created_at") or datetime.fromtimestamp(self.path.stat().st_mtime, timezone.utc).isoformat()
+
+    def load(self):
+        started = time.perf_counter()
+        if (self.path / ARTIFACT_NAME).exists():
+            # Actor-only NumPy artifact (no torch / stable-baselines3 import)
+            policy, kind = ActorPolicy.load(self.path / ARTIFACT_NAME), "actor"
+        elif (self.path / f"{SAC_NAME}.zip").exists():
+            policy, kind = self._load_sac(), "sac"
+        else:
+            raise FileNotFoundError(f"No {ARTIFACT_NAME} or {SAC_NAME}.zip in {self.path}")
+
+        self.policy, self.kind = policy, kind
+        self.loaded_at = time.time()
+        self.load_seconds = round(time.perf_counter() - started, 3)
+
+    def _load_sac(self):
+        """Full SAC checkpoint + pickled VecNormalize (run scripts/export_actor.py to avoid this path)."""
+        from stable_baselines3 import SAC
+
+        # Load normalization (frozen stats only; no wrapped env needed)
+        vecnorm = None
+        vecnorm_path = self.path / VECNORM_NAME
+        if vecnorm_path.exists():
+            with open(vecnorm_path, "rb") as f:
+                vecnorm = pickle.load(f)
+            vecnorm.training = False
+            vecnorm.norm_reward = False
+        else:
+            print(f"Warning: Normalization stats not found at {vecnorm_path}")
+
+        return PolicyBundle(SAC.load(str(self.path / SAC_NAME), device="cpu"), vecnorm)
+
+    def unload(self):
+        self.policy = self.kind = None
+
+    def act(self, obs):
+        """Action for one observation, micro-batched with other sessions when a batcher is set."""
+        if self.batcher is not None:
+            return self.batcher.act(obs, self.policy.predict)
+        return self.policy.act(obs)
+
+    def to_dict(self):
+        return {
+            "version": self.name,
+            "path": str(self.path),
+            "kind": self.kind,
+            "loaded": self.loaded,
+            "created_at": self.created_at,
+            "data_fingerprint": self.meta.get("data_fingerprint"),
+            "notes": self.meta.get("notes"),
+            "load_seconds": self.load_seconds,
+            "warmup_ms": self.warmup_ms,
+        }
+
+
+class ModelRegistry:
+    """
+    Versions found under models/registry (plus the legacy checkpoints dir).
+
+    activate() loads and warms a version on a background thread, checks it
+    against the env's observation size, then swaps it in under a lock.
+    Callers holding the old version keep a working reference; `on_swap` lets
+    the service migrate sessions. The previous version stays loaded, so
+    rollback() is an instant swap back.
+    """
+
+    def __init__(self, models_dir):
+        self.models_dir = Path(models_dir)
+        self.root = self.models_dir / REGISTRY_DIRNAME
+
+        self.versions = {}
+        self.active = None
+        self.previous = None
+        self.pending = None        # last activation: version, status, error
+        self.swaps = 0
+
+        self.obs_dim = None
+        self.data_fingerprint = None
+        self.batcher = None
+        self._warmup_obs = None
+        self._lock = threading.Lock()
+
+    # ------------------------
+    # Setup
+    # ------------------------
+    def bind(self, market, batcher=None):
+        """Observation layout and warm-up batch from the shared market panel."""
+        self.batcher = batcher
+        self.data_fingerprint = market.fingerprint
+        self.obs_dim = market.n_assets * market.n_features + market.n_assets + 1
+
+        # Real feature rows with equal weights: exercises the same value ranges as serving
+        rows = np.linspace(0, market.n_steps - 1, num=min(64, market.n_steps)).astype(int)
+        features = market.features.reshape(market.n_steps, -1)[rows]
+        weights = np.full((len(rows), market.n_assets), 1.0 / market.n_assets, dtype=np.float32)
+        cash = np.zeros((len(rows), 1), dtype=np.float32)
+        self._warmup_obs = np.concatenate([features, weights, cash], axis=1).astype(np.float32)
+
+    def discover(self):
+        """Rescan disk for versions; already loaded ones are kept as they are."""
+        found = {}
+        if self.root.exists():
+            for path in sorted(p for p in self.root.iterdir() if p.is_dir()):
+                if path.name.startswith(".") or path.name.endswith(".tmp"):
+                    continue    # register_model.py staging (in progress or interrupted)
+                found[path.name] = path
+        legacy = self.models_dir / LEGACY_VERSION
+        if legacy.is_dir() and LEGACY_VERSION not in found:
+            found[LEGACY_VERSION] = legacy
+
+        with self._lock:
+            for name, path in found.items():
+                if not ((path / ARTIFACT_NAME).exists() or (path / f"{SAC_NAME}.zip").exists()):
+                    continue
+                if name not in self.versions:
+                    self.versions[name] = ModelVersion(name, path, _read_json(path / "meta.json"))
+        return self.versions
+
+    def load_initial(self):
+        """Activate the persisted version, else the legacy checkpoints, else the newest one."""
+        self.discover()
+        if not self.versions:
+            return None
+
+        persisted = _read_json(self.root / ACTIVE_FILE)
+        name = persisted.get("active")
+        if name not in self.versions:
+            name = LEGACY_VERSION if LEGACY_VERSION in self.versions else max(
+                self.versions, key=lambda v: self.versions[v].created_at
+            )
+
+        self._swap(self.prepare(self.versions[name]), persist=False)
+        previous = self.versions.get(persisted.get("previous"))
+        if previous is not None and previous is not self.active:
+            self.previous = previous
+        return self.active
+
+    # ------------------------
+    # Activation
+    # ------------------------
+    def prepare(self, version):
+        """Load, validate and warm up a version (no effect on the serving one)."""
+        if not version.loaded:
+            version.load()
+
+        obs_dim = getattr(version.policy, "obs_dim", None)
+        if self.obs_dim is not None and obs_dim != self.obs_dim:
+            version.unload()
+            raise ValueError(
+                f"Version {version.name} expects {obs_dim} observation features, env provides {self.obs_dim}"
+            )
+
+        if self._warmup_obs is not None:
+            started = time.perf_counter()
+            version.policy.predict(self._warmup_obs[:1])
+            version.policy.predict(self._warmup_obs)
+            version.warmup_ms = round((time.perf_counter() - started) * 1000, 2)
+
+        version.batcher = self.batcher
+        return version
+
+    def activate(self, name, on_swap=None):
+        """Start loading + warming `name` in the background; it is swapped in when ready."""
+        self.discover()
+        if name not in self.versions:
+            raise KeyError(name)
+
+        with self._lock:
+            if self.pending is not None and self.pending["status"] == "warming":
+                raise RuntimeError(f"Version {self.pending['version']} is still warming up")
+            self.pending = {"version": name, "status": "warming", "error": None, "started_at": time.time()}
+
+        threading.Thread(target=self._activate, args=(self.versions[name], on_swap), name="model-warmup", daemon=True).start()
+        return dict(self.pending)
+
+    def rollback(self, on_swap=None):
+        if self.previous is None:
+            raise RuntimeError("No previous version to roll back to")
+        return self.activate(self.previous.name, on_swap)
+
+    def _activate(self, version, on_swap):
+        try:
+            self.prepare(version)
+            self._swap(version)
+            if on_swap is not None:
+                on_swap(version)
+            self.pending.update(status="active", finished_at=time.time())
+        except Exception as e:
+            print(f"Error: model version {version.name} failed to activate: {e}")
+            self.pending.update(status="failed", error=str(e), finished_at=time.time())
+
+    def _swap(self, version, persist=True):
+        with self._lock:
+            if version is self.active:
+                return
+            self.previous, self.active = self.active, version
+            self.swaps += 1
+
+        if persist:
+            self.root.mkdir(parents=True, exist_ok=True)
+            _write_json(self.root / ACTIVE_FILE, {
+                "active": version.name,
+                "previous": self.previous.name if self.previous else None,
+            })
+
+    def release(self, in_use):
+        """Unload versions that are neither active, previous nor used by a session."""
+        keep = {id(self.active), id(self.previous), *map(id, in_use)}
+        with self._lock:
+            for version in self.versions.values():
+                if version.loaded and id(version) not in keep:
+                    version.unload()
+
+    # ------------------------
+    # Reporting
+    # ------------------------
+    def stats(self):
+        versions = []
+        for version in list(self.versions.values()):
+            info = version.to_dict()
+            info["active"] = version is self.active
+            info["previous"] = version is self.previous
+            fingerprint = info["data_fingerprint"]
+            info["data_matches"] = None if not fingerprint or not self.data_fingerprint else fingerprint == self.data_fingerprint
+            versions.append(info)
+
+        return {
+            "active": self.active.name if self.active else None,
+            "previous": self.previous.name if self.previous else None,
+            "pending": self.pending,
+            "swaps": self.swaps,
+            "data_fingerprint": self.data_fingerprint,
+            "versions": versions,
+        }
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_json(path, payload):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(payload, f, indent=2)
+    tmp.replace(path)
@@ -1,121 +1,556 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
 import numpy as np
 from pathlib import Path
-from stable_baselines3 import SAC
-from stable_baselines3.common.vec_env import DummyVecEnv, VecNormalize
 
-from .trading_env import TradingEnv
-from .metrics import compute_returns, sharpe_ratio, max_drawdown
+# NumPy-only imports here; the env (gymnasium, pandas) and metrics are imported
+# by the background loader so the API can serve requests while they load
+from .stream import SnapshotBroadcaster
+from .batcher import InferenceBatcher
+from .history import HistoryStore, to_records
+from .registry import ModelRegistry
 
-class SimulationService:
-    _instance = None
-    
-    def __init__(self):
-        self.env = None
-        self.model = None
+DEFAULT_SESSION = "default"
+
+# Micro-batching of policy inference across sessions (max batch 1 disables it)
+INFERENCE_MAX_BATCH = int(os.getenv("INFERENCE_MAX_BATCH", 32))
+INFERENCE_WINDOW_MS = float(os.getenv("INFERENCE_WINDOW_MS", 1.0))
+
+# Per-session history retention: full | ring | downsample
+HISTORY_RETENTION = os.getenv("HISTORY_RETENTION", "full")
+HISTORY_MAX_STEPS = int(os.getenv("HISTORY_MAX_STEPS", 50_000))
+
+
+class SessionBusy(Exception):
+    """Raised when a session is driven by a background run job or a synchronous run."""
+
+
+class ServiceNotReady(Exception):
+    """Raised while the model/data are still loading (or failed to load); mapped to 503."""
+
+    def __init__(self, status, error=None, retry_after=2):
+        detail = f"simulation model failed to load: {error}" if status == "failed" else "simulation model is loading"
+        super().__init__(detail)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class RunJob:
+    """Background fast-forward of one session, with progress and cancellation."""
+
+    def __init__(self, session_id, n_steps, record, reset=False):
+        self.job_id = uuid.uuid4().hex[:8]
+        self.session_id = session_id
+        self.n_steps = n_steps
+        self.record = record
+        self.reset = reset              # applied by the worker, once the job was accepted
+        self.status = "queued"          # queued -> running -> done | cancelled | failed
+        self.target = n_steps
+        self.steps_done = 0
+        self.result = None
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self._cancel = threading.Event()
+
+    @property
+    def active(self):
+        return self.status in ("queued", "running")
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def to_dict(self):
+        progress = None
+        if self.target:
+            progress = round(min(self.steps_done / self.target, 1.0), 4)
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = round((self.finished_at or time.monotonic()) - self.started_at, 3)
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "steps_done": self.steps_done,
+            "target_steps": self.target,
+            "progress": progress,
+            "elapsed": elapsed,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class SimulationSession:
+    """
+    One client's simulation: its own env, observation and history.
+
+    `policy` is the model version the session runs; a reset picks up the
+    registry's active version.
+    """
+
+    def __init__(self, session_id, env, models, retention=HISTORY_RETENTION, max_steps=HISTORY_MAX_STEPS):
+        from .metrics import RunningMetrics
+
+        self.session_id = session_id
+        self.env = env
+        self.models = models
+        self.policy = models.active
         self.obs = None
         self.done = False
-        self.history = []
+        self.history = HistoryStore(env.n_assets, retention, max_steps)
+        self.metrics = RunningMetrics(env.initial_cash)
         self.running = False
-        
-        # Paths
-        # Navigate from backend/services/ml -> backend/services -> backend -> root
-        self.root_dir = Path(__file__).resolve().parents[3]
-        self.model_path = self.root_dir / "models" / "checkpoints" / "aegris_sac_final"
-        self.vecnorm_path = self.root_dir / "models" / "checkpoints" / "vecnormalize.pkl"
+        self.run_id = None
+        self.t = 0
+        self.job = None
+        self.sync_run = False       # a synchronous run() owns the session
 
-    @classmethod
-    def get_instance(cls):
-        if cls._instance is None:
-            cls._instance = cls()
-        return cls._instance
+        # Pushes every new snapshot to streaming subscribers
+        self.stream = SnapshotBroadcaster()
 
-    def initialize(self):
-        """Load model and env"""
-        if self.model is not None:
-            return
-            
-        print("Loading Aegris Model...")
-        
-        # Create env
-        def make_env():
-            return TradingEnv()
-            
-        self.env = DummyVecEnv([make_env])
-        
-        # Load normalization
-        if self.vecnorm_path.exists():
-            self.env = VecNormalize.load(str(self.vecnorm_path), self.env)
-            self.env.training = False
-            self.env.norm_reward = False
-        else:
-            print(f"Warning: Normalization stats not found at {self.vecnorm_path}")
-            
-        # Load model
-        if self.model_path.with_suffix(".zip").exists():
-            self.model = SAC.load(str(self.model_path), env=self.env)
-            print("Model loaded successfully.")
-        else:
-            print(f"Error: Model not found at {self.model_path}")
-            # Fallback for dev without model
-            self.model = None
+        # Steps of one session are serialized; different sessions run in parallel
+        self.lock = threading.Lock()
+        self.created_at = time.monotonic()
+        self.last_access = self.created_at
+
+    def touch(self):
+        self.last_access = time.monotonic()
+
+    def _check_idle(self):
+        if self.job is not None and self.job.active:
+            raise SessionBusy(f"session is running job {self.job.job_id}")
+        if self.sync_run:
+            raise SessionBusy("session is running a fast-forward")
 
-        self.reset()
-    
     def reset(self):
-        if self.env:
-            self.obs = self.env.reset()
-            self.done = False
-            self.history = []
-            self.running = True
-            return self.get_state()
-        return None
+        with self.lock:
+            self._check_idle()
+            return self._reset()
+
+    def _reset(self):
+        self.policy = self.models.active
+        self.obs, _ = self.env.reset()
+        self.done = False
+        self.history.clear()
+        self.metrics.reset()
+        self.running = True
+        self.t = 0
+        self.run_id = uuid.uuid4().hex[:8]
+        self.stream.reset(self.run_id)
+        return self.get_state()
 
     def step(self):
-        state = self.get_state()
-        if not self.running or self.env is None or self.model is None:
-            return {**state, "running": False}
-
-        action, _ = self.model.predict(self.obs, deterministic=True)
-        # VecEnv.step returns (obs, rewards, dones, infos)
-        self.obs, rewards, dones, infos = self.env.step(action)
-        step_info = infos[0]
-        self.done = bool(dones[0])
-
-        # Get weights from unwrapped env (VecNormalize/DummyVecEnv/Monitor may wrap)
-        base = getattr(self.env, "venv", self.env)
-        env_unwrapped = base.envs[0]
-        while hasattr(env_unwrapped, "env"):
-            env_unwrapped = env_unwrapped.env
-        weights = env_unwrapped.weights.tolist() if hasattr(env_unwrapped, "weights") else []
+        with self.lock:
+            self._check_idle()
+            state = self.get_state()
+            if not self.running or self.policy is None:
+                return {**state, "running": False}
 
+            return self._record(self._advance())
+
+    def _advance(self):
+        # Caller holds the lock and has checked `running`
+        action = self.policy.act(self.obs)
+        self.obs, _, terminated, truncated, step_info = self.env.step(action)
+        self.t += 1
+        self.metrics.update(step_info["portfolio_value"], step_info["turnover"], step_info["cost"])
+        self.done = bool(terminated or truncated)
+        if self.done:
+            # End of data: stop instead of silently starting a new episode
+            self.running = False
+        return step_info
+
+    def _record(self, step_info):
         snapshot = {
-            "step": len(self.history),
+            "step": self.t - 1,
             "portfolio_value": float(step_info.get("portfolio_value", 0)),
             "drawdown": float(step_info.get("drawdown", 0)),
             "volatility": float(step_info.get("volatility", 0)),
             "turnover": float(step_info.get("turnover", 0)),
-            "weights": weights,
+            **self.metrics.to_dict(),
+            "weights": self.env.weights.tolist(),
             "running": True,
         }
-        self.history.append(snapshot)
+        self.history.append(snapshot, self.env.weights)
+        self.stream.publish(snapshot)
         return snapshot
-        
-    def get_history(self):
-        return self.history
-        
+
+    # ------------------------
+    # Fast-forward
+    # ------------------------
+    def remaining_steps(self):
+        if not self.running:
+            return 0
+        # The env terminates once current_step reaches n_steps - 1
+        return max(self.env.n_steps - 1 - self.env.current_step, 0)
+
+    def start_job(self, n_steps=None, record=True, reset=False):
+        # The reset waits for the worker: a job the executor rejects leaves the session as it was
+        with self.lock:
+            self._check_idle()
+            self.job = RunJob(self.session_id, n_steps, record, reset)
+            return self.job
+
+    def run_job(self, job):
+        """Executor entry point for a background RunJob."""
+        job.status = "running"
+        job.started_at = time.monotonic()
+        try:
+            job.result = self.run(job.n_steps, job.record, job.reset, job=job)
+            job.status = "cancelled" if job.cancelled else "done"
+        except Exception as e:
+            job.status, job.error = "failed", str(e)
+        finally:
+            job.finished_at = time.monotonic()
+
+    def run(self, n_steps=None, record=True, reset=False, job=None):
+        """
+        Advance up to `n_steps` steps (until the end of data when None) in
+        one call and return a summary of the stretch.
+
+        With `record=False` no per-step snapshot is built or streamed; only
+        the final state is added to the history.
+        """
+        with self.lock:
+            if job is None:
+                # Busy until done: /step, /start and new jobs get SessionBusy meanwhile
+                self._check_idle()
+                self.sync_run = True
+        try:
+            if reset:
+                with self.lock:
+                    self._reset()
+            return self._fast_forward(n_steps, record, job)
+        finally:
+            if job is None:
+                with self.lock:
+                    self.sync_run = False
+
+    def _fast_forward(self, n_steps, record, job):
+        from .metrics import compute_returns, sharpe_ratio, max_drawdown
+
+        remaining = self.remaining_steps()
+        target = remaining if n_steps is None else min(n_steps, remaining)
+        if job is not None:
+            job.target = target
+
+        start_value = float(self.env.portfolio_value or self.env.initial_cash)
+        equity = np.empty(target + 1)
+        equity[0] = start_value
+        turnover = volatility = 0.0
+        step_info = None
+        n = 0
+
+        started = time.perf_counter()
+        while n < target and self.policy is not None:
+            if job is not None and job.cancelled:
+                break
+            with self.lock:
+                if not self.running:
+                    break
+                step_info = self._advance()
+                if record:
+                    self._record(step_info)
+
+            n += 1
+            equity[n] = step_info["portfolio_value"]
+            turnover += step_info["turnover"]
+            volatility = step_info["volatility"]
+            if job is not None:
+                job.steps_done = n
+            self.touch()
+        elapsed = time.perf_counter() - started
+
+        if step_info is not None and not record:
+            with self.lock:
+                self._record(step_info)
+
+        equity = equity[:n + 1]
+        returns = compute_returns(equity)
+        return {
+            "steps": n,
+            "running": self.running,
+            "done": self.done,
+            "start_value": start_value,
+            "portfolio_value": float(equity[-1]),
+            "total_return": float(equity[-1] / start_value - 1),
+            "sharpe": float(sharpe_ratio(returns)),
+            "max_drawdown": float(max_drawdown(equity)),
+            "volatility": float(volatility),
+            "turnover": float(turnover),
+            "elapsed": round(elapsed, 3),
+            "steps_per_sec": round(n / elapsed, 1) if elapsed > 0 else None,
+            "state": self.get_state(),
+        }
+
+    def close(self):
+        if self.job is not None:
+            self.job.cancel()
+
+    def get_history(self, since=None, limit=None, columnar=False):
+        """
+        History after step `since` (all when None), at most `limit` steps.
+
+        Returns (etag, payload). The ETag covers the run, the steps appended
+        and the query itself, so unchanged polls can be answered with 304.
+        Columnar payloads hold one array per field and weights as a 2-D array.
+        """
+        appended, columns = self.history.read(since, limit)
+        shape = "columnar" if columnar else "records"
+        etag = f'"{self.run_id}-{appended}-{since}-{limit}-{shape}"'
+
+        if not columnar:
+            return etag, to_records(columns)
+
+        columns["run_id"] = self.run_id
+        columns["total_steps"] = appended
+        return etag, columns
+
     def get_state(self):
-        if not self.history:
+        last = self.history.last()
+        if last is None:
             return {
                 "step": 0,
                 "portfolio_value": 1_000_000,
                 "drawdown": 0,
                 "volatility": 0,
                 "turnover": 0,
+                **self.metrics.to_dict(),
                 "weights": [],
                 "running": self.running,
             }
-        out = dict(self.history[-1])
-        out["running"] = self.running
-        return out
+        last["running"] = self.running
+        return last
+
+    def memory_bytes(self):
+        """Approximate bytes owned by this session (the shared market panel is excluded)."""
+        env_state = self.env.returns_stats.buffer.nbytes
+        if self.env.weights is not None:
+            env_state += self.env.weights.nbytes
+        obs = self.obs.nbytes if self.obs is not None else 0
+        return env_state + obs + self.history.nbytes + self.stream.nbytes()
+
+
+class SimulationService:
+    """
+    Session manager: each client gets its own SimulationSession.
+
+    Sessions share the loaded policy and the read-only market panel.
+    Live sessions are capped; idle ones expire after `idle_timeout`
+    seconds and, at the cap, the least recently used one is evicted.
+    """
+
+    _instance = None
+
+    def __init__(self, max_sessions=256, idle_timeout=1800):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+
+        self.batcher = None
+        self.market = None
+        self.sessions = OrderedDict()
+        self.evicted = 0
+        self._lock = threading.Lock()
+
+        # Readiness: idle -> loading -> ready | failed
+        self.status = "idle"
+        self.error = None
+        self.load_seconds = None
+        self._loader = None
+
+        # Paths
+        # Navigate from backend/services/ml -> backend/services -> backend -> root
+        self.root_dir = Path(__file__).resolve().parents[3]
+        self.registry = ModelRegistry(self.root_dir / "models")
+
+    @property
+    def policy(self):
+        active = self.registry.active
+        return active.policy if active is not None else None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def start_loading(self):
+        """Load model and data on a background thread; the API serves other routes meanwhile."""
+        if self._loader is None and self.status == "idle":
+            self.status = "loading"
+            self._loader = threading.Thread(target=self._load, name="model-loader", daemon=True)
+            self._loader.start()
+
+    def _load(self):
+        try:
+            self.initialize()
+        except Exception as e:
+            print(f"Error: simulation service failed to load: {e}")
+
+    def initialize(self):
+        """Load shared market data and policy, then start the default session"""
+        if self.market is not None:
+            return
+
+        print("Loading Aegris Model...")
+        self.status = "loading"
+        started = time.perf_counter()
+        try:
+            self._initialize()
+        except Exception as e:
+            self.status, self.error = "failed", str(e)
+            raise
+        finally:
+            self.load_seconds = round(time.perf_counter() - started, 3)
+
+    def require_ready(self):
+        if self.status != "ready":
+            raise ServiceNotReady(self.status, self.error)
+
+    def _initialize(self):
+        from .trading_env import TradingEnv
+
+        # Shared read-only market panel for every session's env
+        market = TradingEnv().market
+
+        if INFERENCE_MAX_BATCH > 1:
+            # Sessions submit single observations; one forward pass serves a whole batch
+            self.batcher = InferenceBatcher(max_batch=INFERENCE_MAX_BATCH, window_ms=INFERENCE_WINDOW_MS)
+
+        # Versioned policies; the active one is loaded and warmed up here
+        self.registry.bind(market, self.batcher)
+        active = self.registry.load_initial()
+        if active is not None:
+            print(f"Model {active.name} loaded successfully ({active.kind}).")
+        else:
+            # Fallback for dev without model
+            print(f"Error: No model found under {self.registry.models_dir}")
+
+        self.market = market
+        self.status = "ready"
+        self.session().reset()
+
+    # ------------------------
+    # Model versions
+    # ------------------------
+    def activate_model(self, version, migrate=False):
+        """Warm up `version` in the background, then swap it in (see ModelRegistry.activate)."""
+        self.require_ready()
+        return self.registry.activate(version, on_swap=lambda v: self._adopt(v, migrate))
+
+    def rollback_model(self, migrate=False):
+        self.require_ready()
+        return self.registry.rollback(on_swap=lambda v: self._adopt(v, migrate))
+
+    def _adopt(self, version, migrate):
+        # New sessions and resets pick up the active version on their own;
+        # with `migrate`, running sessions switch between two steps
+        with self._lock:
+            sessions = list(self.sessions.values())
+        if migrate:
+            for session in sessions:
+                with session.lock:
+                    session.policy = version
+        self.registry.release(in_use=[s.policy for s in sessions if s.policy is not None])
+
+    # ------------------------
+    # Sessions
+    # ------------------------
+    def session(self, session_id=None):
+        """Get (or create) the session for `session_id`, evicting idle/LRU sessions as needed."""
+        self.require_ready()
+        from .trading_env import TradingEnv
+
+        session_id = session_id or DEFAULT_SESSION
+        with self._lock:
+            self._evict_idle()
+
+            session = self.sessions.get(session_id)
+            if session is None:
+                while len(self.sessions) >= self.max_sessions:
+                    self.sessions.popitem(last=False)[1].close()
+                    self.evicted += 1
+                env = TradingEnv(market=self.market)
+                session = SimulationSession(session_id, env, self.registry)
+                self.sessions[session_id] = session
+
+            self.sessions.move_to_end(session_id)
+            session.touch()
+            return session
+
+    def find_session(self, session_id=None, touch=True):
+        """Existing session for `session_id`, or None; never creates one (read-only routes, probes)."""
+        self.require_ready()
+        with self._lock:
+            session = self.sessions.get(session_id or DEFAULT_SESSION)
+            if session is not None and touch:
+                self.sessions.move_to_end(session.session_id)
+                session.touch()
+            return session
+
+    def _evict_idle(self):
+        # Caller holds the lock; sessions are ordered by last access
+        cutoff = time.monotonic() - self.idle_timeout
+        while self.sessions:
+            oldest = next(iter(self.sessions.values()))
+            if oldest.last_access >= cutoff:
+                break
+            self.sessions.popitem(last=False)[1].close()
+            self.evicted += 1
+
+    def close_session(self, session_id):
+        with self._lock:
+            session = self.sessions.pop(session_id, None)
+        if session is None:
+            return False
+        session.close()
+        return True
+
+    def shutdown(self):
+        """Cancel background runs so their workers exit."""
+        with self._lock:
+            for session in self.sessions.values():
+                session.close()
+
+    def stats(self):
+        with self._lock:
+            sessions = list(self.sessions.values())
+
+        now = time.monotonic()
+        per_session = [
+            {
+                "session_id": s.session_id,
+                "steps": s.t,
+                "model_version": s.policy.name if s.policy is not None else None,
+                "stored_steps": len(s.history),
+                "history_bytes_per_step": s.history.bytes_per_step,
+                "running": s.running,
+                "job": s.job.status if s.job is not None else None,
+                "idle_seconds": round(now - s.last_access, 1),
+                "memory_bytes": s.memory_bytes(),
+            }
+            for s in sessions
+        ]
+        shared = 0
+        if self.market is not None:
+            shared = self.market.features.nbytes + self.market.returns.nbytes
+
+        return {
+            "live": len(sessions),
+            "max_sessions": self.max_sessions,
+            "idle_timeout": self.idle_timeout,
+            "evicted": self.evicted,
+            "memory_bytes": sum(s["memory_bytes"] for s in per_session),
+            "shared_market_bytes": shared,
+            "sessions": per_session,
+        }
+
 
 simulation_service = SimulationService.get_instance()
@@ -0,0 +1,118 @@
+import asyncio
+import json
+import threading
+from collections import deque
+
+# ============================================================
+# Simulation snapshot streaming (Server-Sent Events)
+# ============================================================
+
+class SnapshotBroadcaster:
+    """
+    Shared fan-out of simulation snapshots to SSE subscribers.
+
+    Each snapshot is serialized once into an SSE frame when published
+    (on the simulation thread), kept in a bounded replay buffer, and the
+    same bytes are written to every subscriber, so N viewers cost one
+    serialization per step.
+
+    Event ids are "<run_id>-<step>": a reconnecting client resumes from
+    its Last-Event-ID (or ?since=<step>) within the current run, and is
+    replayed the current run from the start if the simulation was reset.
+    """
+
+    def __init__(self, replay_size=2_000, heartbeat=15.0):
+        self.replay_size = replay_size
+        self.heartbeat = heartbeat
+
+        self._frames = deque(maxlen=replay_size)   # (step, frame bytes)
+        self._run_id = None
+        self._lock = threading.Lock()
+        self._loop = None
+        self._event = None
+
+    # ------------------------
+    # Publishing (any thread)
+    # ------------------------
+    def reset(self, run_id):
+        frame = _frame("reset", f"{run_id}-start", json.dumps({"run_id": run_id}))
+        with self._lock:
+            self._run_id = run_id
+            self._frames.clear()
+            self._frames.append((-1, frame))
+        self._notify()
+
+    def publish(self, snapshot):
+        step = snapshot["step"]
+        frame = _frame("snapshot", f"{self._run_id}-{step}", json.dumps(snapshot))
+        with self._lock:
+            self._frames.append((step, frame))
+        self._notify()
+
+    def _notify(self):
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wake)
+
+    def _wake(self):
+        # Runs on the event loop: release everyone waiting, arm a fresh event
+        self._event.set()
+        self._event = asyncio.Event()
+
+    def nbytes(self):
+        with self._lock:
+            return sum(len(frame) for _, frame in self._frames)
+
+    # ------------------------
+    # Subscribing (event loop)
+    # ------------------------
+    def _resume_point(self, since, last_event_id):
+        if last_event_id:
+            run_id, _, step = last_event_id.rpartition("-")
+            if run_id == self._run_id and step.isdigit():
+                return int(step)
+            # Reset frame or a different run: replay the current run from the start
+            return None
+        return since
+
+    def _frames_after(self, cursor):
+        with self._lock:
+            if cursor is None:
+                return list(self._frames)
+            # Steps only increase within a run: walk back from the newest frame
+            new = []
+            for step, frame in reversed(self._frames):
+                if step <= cursor:
+                    break
+                new.append((step, frame))
+            return new[::-1]
+
+    async def subscribe(self, since=None, last_event_id=None):
+        """Async iterator of SSE frames: backlog after the resume point, then live ones."""
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+            self._event = asyncio.Event()
+
+        cursor = self._resume_point(since, last_event_id)
+        run_id = self._run_id
+
+        while True:
+            event = self._event
+            if self._run_id != run_id:
+                # Simulation was reset while we were streaming
+                cursor, run_id = None, self._run_id
+
+            frames = self._frames_after(cursor)
+            for step, frame in frames:
+                cursor = step
+                yield frame
+
+            if not frames:
+                try:
+                    await asyncio.wait_for(event.wait(), timeout=self.heartbeat)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+
+
+def _frame(event, event_id, data):
+    return f"id: {event_id}\nevent: {event}\ndata: {data}\n\n".encode()
@@ -1,9 +1,10 @@
 import numpy as np
-import pandas as pd
 from pathlib import Path
 import gymnasium as gym
 from gymnasium import spaces
-import os
+
+from .market_data import MarketPanel, load_market_panel
+from .rolling_stats import RollingStats
 
 # ============================================================
 # AEGRIS — Institutional Grade Trading Environment
@@ -34,6 +35,8 @@ class TradingEnv(gym.Env):
         max_drawdown=0.25,           # 25% risk limit
         reward_scaling=1e3,
         window_size=1,
+        vol_window=50,               # steps in the reward volatility window
+        market=None,                 # preloaded MarketPanel to share across envs
     ):
         super().__init__()
 
@@ -51,11 +54,17 @@ class TradingEnv(gym.Env):
 
         # ------------------------
         # Load market data
+        # (T, n_assets, n_features) panel + (T, n_assets) returns
         # ------------------------
-        self.data = self._load_data()
-        self.assets = list(self.data.keys())
-        self.n_assets = len(self.assets)
-        self.n_features = self.data[self.assets[0]].shape[1]
+        self.market = market if market is not None else self._load_data()
+        self.assets = self.market.assets
+        self.n_assets = self.market.n_assets
+        self.n_features = self.market.n_features
+        self.n_steps = self.market.n_steps
+
+        # Flattened per-step feature rows (views, no copy)
+        self.features = self.market.features.reshape(self.n_steps, -1)
+        self.asset_returns = self.market.returns
 
         # ------------------------
         # Risk Parameters
@@ -67,6 +76,7 @@ class TradingEnv(gym.Env):
         self.max_drawdown = float(max_drawdown)
         self.reward_scaling = float(reward_scaling)
         self.window_size = int(window_size)
+        self.vol_window = int(vol_window)
 
         # ------------------------
         # Action Space
@@ -98,49 +108,25 @@ class TradingEnv(gym.Env):
         self.portfolio_value = None
         self.peak_value = None
         self.weights = None
-        self.returns_buffer = None
+        self.returns_stats = RollingStats(self.vol_window)
 
     # ============================================================
     # Data Loading
     # ============================================================
 
     def _load_data(self):
-        data = {}
         # Ensure directory exists
         if not self.data_dir.exists():
             # Fallback for when running in simpler contexts or CI
-            print(f"Warning: Data directory {self.data_dir} not found.")
-            return {}
+            print(f"Warning: Data directory {self.data_dir} not found. Using minimal dummy data.")
+            return MarketPanel.dummy()
 
-        csv_files = sorted(self.data_dir.glob("*.csv"))
-
-        if len(csv_files) == 0:
+        if not any(self.data_dir.glob("*.csv")):
             # Dummy env so backend can start without data (start/step will still need a trained model)
             print(f"Warning: No CSV files in {self.data_dir}. Using minimal dummy data.")
-            n_dummy = 252 * 5  # ~5 years daily
-            # First column as "price" (non-zero to avoid div-by-zero in returns)
-            dummy = np.zeros((n_dummy, 3), dtype=np.float32)
-            dummy[:, 0] = 1.0
-            return {"CASH": dummy}
-
-        for csv in csv_files:
-            df = pd.read_csv(csv)
-
-            # Keep only numeric features
-            df = df.select_dtypes(include=[np.number])
-
-            if df.isna().any().any():
-                df = df.ffill().bfill().fillna(0)
-
-            data[csv.stem] = df.values.astype(np.float32)
+            return MarketPanel.dummy()
 
-        # Align lengths
-        if data:
-            min_len = min(len(v) for v in data.values())
-            for k in data:
-                data[k] = data[k][:min_len]
-
-        return data
+        return load_market_panel(self.data_dir, backfill=True)
 
     # ============================================================
     # Reset
@@ -149,13 +135,14 @@ class TradingEnv(gym.Env):
     def reset(self, seed=None, options=None):
         super().reset(seed=seed)
 
-        self.current_step = self.window_size
+        # options={"start_step": t} starts the episode at step t (evaluation windows)
+        self.current_step = int((options or {}).get("start_step", self.window_size))
         self.portfolio_value = self.initial_cash
         self.peak_value = self.initial_cash
 
         # Start equally weighted
         self.weights = np.ones(self.n_assets) / self.n_assets
-        self.returns_buffer = []
+        self.returns_stats.reset()
 
         return self._get_obs(), {}
 
@@ -164,28 +151,21 @@ class TradingEnv(gym.Env):
     # ============================================================
 
     def _get_obs(self):
-        features = []
-
-        for asset in self.assets:
-            if self.current_step < len(self.data[asset]):
-                window = self.data[asset][self.current_step]
-                features.append(window)
-            else:
-                 # Done
-                 features.append(np.zeros(self.n_features))
-
-        features = np.concatenate(features)
+        if self.current_step < self.n_steps:
+            # Market features are sanitized once at load time
+            features = self.features[self.current_step]
+        else:
+            # Done
+            features = np.zeros(self.features.shape[1], dtype=np.float32)
 
-        cash_ratio = np.array([1.0 - self.weights.sum()], dtype=np.float32)
+        cash_ratio = 1.0 - self.weights.sum()
 
         obs = np.concatenate([
             features,
-            self.weights.astype(np.float32),
-            cash_ratio,
+            self.weights,
+            [cash_ratio],
         ])
 
-        obs = np.nan_to_num(obs, nan=0.0, posinf=1.0, neginf=-1.0)
-
         return obs.astype(np.float32)
 
     # ============================================================
@@ -216,19 +196,11 @@ class TradingEnv(gym.Env):
         # -----------------------
         # Compute returns
         # -----------------------
-        asset_returns = []
-
-        for asset in self.assets:
-            prices = self.data[asset]
-            # Safety check
-            if self.current_step >= len(prices):
-                 return self._get_obs(), 0, True, False, {}
-
-            p0 = prices[self.current_step - 1][0]
-            p1 = prices[self.current_step][0]
-            asset_returns.append((p1 / p0) - 1.0)
+        # Safety check
+        if self.current_step >= self.n_steps:
+            return self._get_obs(), 0, True, False, {}
 
-        asset_returns = np.array(asset_returns, dtype=np.float32)
+        asset_returns = self.asset_returns[self.current_step]
 
         portfolio_return = np.dot(self.weights, asset_returns)
         portfolio_return -= cost
@@ -253,9 +225,9 @@ class TradingEnv(gym.Env):
         # Reward Engineering
         # -----------------------
         log_return = np.log1p(portfolio_return)
-        self.returns_buffer.append(log_return)
+        self.returns_stats.push(log_return)
 
-        volatility_val = np.std(self.returns_buffer[-50:]) + 1e-8
+        volatility_val = self.returns_stats.std + 1e-8
         sharpe_proxy = log_return / volatility_val
 
         drawdown_penalty = -5.0 * max(0, drawdown - self.max_drawdown)
@@ -269,13 +241,14 @@ class TradingEnv(gym.Env):
         # -----------------------
         # Termination
         # -----------------------
-        terminated = self.current_step >= len(self.data[self.assets[0]]) - 1
+        terminated = self.current_step >= self.n_steps - 1
         truncated = False
 
         info = {
             "portfolio_value": self.portfolio_value,
             "drawdown": drawdown,
             "turnover": turnover,
+            "cost": cost,
             "volatility": volatility_val,
         }
 
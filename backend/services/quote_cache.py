@@ -0,0 +1,143 @@
+"""Per-symbol quote cache with stale-while-revalidate and single-flight fetches."""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, wait
+from typing import Any, Callable
+
+from services.executor import Saturated
+
+
+class QuoteCache:
+    """
+    Symbol -> quote cache in front of a rate-limited upstream.
+
+    - Entries younger than `ttl` are served directly.
+    - Entries younger than `stale_ttl` are served immediately while a
+      background refresh runs (stale-while-revalidate).
+    - Missing/expired symbols are fetched; callers wait up to a deadline.
+    - Concurrent requests for the same symbol share one upstream call
+      (single-flight), so N viewers asking for AAPL cost one fetch.
+    - Size is bounded; least recently used symbols are evicted first.
+    - At most `max_inflight` upstream calls are outstanding; a cache miss
+      beyond that raises Saturated instead of queueing more work.
+
+    Callers on the event loop await upstream results (`get_many`) without
+    tying up a thread; the HTTP calls themselves run on `executor`.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str], dict[str, Any] | None],
+        executor: Executor,
+        ttl: float = 60,
+        stale_ttl: float = 300,
+        max_size: int = 512,
+        max_inflight: int = 64,
+    ):
+        self._fetch = fetch
+        self._executor = executor
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_size = max_size
+        self.max_inflight = max_inflight
+
+        self._entries: OrderedDict[str, tuple[dict[str, Any], float]] = OrderedDict()
+        self._inflight: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "upstream_calls": 0, "evictions": 0, "rejected": 0}
+
+    async def get_many(self, symbols: list[str], deadline: float) -> dict[str, dict[str, Any]]:
+        """Quotes for `symbols`; symbols not resolved within `deadline` seconds are omitted."""
+        found, waiting = self._lookup(symbols)
+
+        if waiting:
+            wrapped = {asyncio.wrap_future(f): symbol for symbol, f in waiting.items()}
+            done, pending = await asyncio.wait(wrapped, timeout=deadline)
+            if pending:
+                print(f"FINNHUB TIMEOUT: {len(pending)}/{len(waiting)} quotes missed the {deadline}s deadline")
+            for future in done:
+                if future.exception() is None and future.result():
+                    found[wrapped[future]] = future.result()
+
+        return found
+
+    def _lookup(self, symbols: list[str]) -> tuple[dict[str, dict[str, Any]], dict[str, Future]]:
+        found: dict[str, dict[str, Any]] = {}
+        waiting: dict[str, Future] = {}
+        now = time.monotonic()
+
+        with self._lock:
+            for symbol in dict.fromkeys(symbols):
+                entry = self._entries.get(symbol)
+                age = now - entry[1] if entry else None
+
+                if entry and age < self.ttl:
+                    self._entries.move_to_end(symbol)
+                    found[symbol] = entry[0]
+                    self._stats["hits"] += 1
+                elif entry and age < self.stale_ttl:
+                    self._entries.move_to_end(symbol)
+                    found[symbol] = entry[0]
+                    self._stats["stale_hits"] += 1
+                    if symbol in self._inflight or len(self._inflight) < self.max_inflight:
+                        self._refresh_async(symbol)
+                else:
+                    if symbol not in self._inflight and len(self._inflight) >= self.max_inflight:
+                        self._stats["rejected"] += 1
+                        raise Saturated("market data upstream")
+                    waiting[symbol] = self._refresh_async(symbol)
+                    self._stats["misses"] += 1
+
+        return found, waiting
+
+    def peek_many(self, symbols: list[str]) -> dict[str, dict[str, Any]]:
+        """Cached quotes for `symbols` regardless of age; never calls upstream."""
+        with self._lock:
+            return {s: self._entries[s][0] for s in symbols if s in self._entries}
+
+    def refresh(self, symbols: list[str], deadline: float) -> dict[str, bool]:
+        """Refetch `symbols` now (coalesced with in-flight fetches); returns symbol -> refreshed."""
+        with self._lock:
+            futures = {symbol: self._refresh_async(symbol) for symbol in dict.fromkeys(symbols)}
+        _, pending = wait(futures.values(), timeout=deadline)
+        return {
+            symbol: f not in pending and f.exception() is None and bool(f.result())
+            for symbol, f in futures.items()
+        }
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "size": len(self._entries), "inflight": len(self._inflight)}
+
+    # -----------------------------
+    # Internals
+    # -----------------------------
+    def _refresh_async(self, symbol: str) -> Future:
+        # Caller holds the lock
+        future = self._inflight.get(symbol)
+        if future is not None:
+            self._stats["coalesced"] += 1
+            return future
+
+        future = self._executor.submit(self._load, symbol)
+        self._inflight[symbol] = future
+        self._stats["upstream_calls"] += 1
+        return future
+
+    def _load(self, symbol: str) -> dict[str, Any] | None:
+        quote = None
+        try:
+            quote = self._fetch(symbol)
+        finally:
+            with self._lock:
+                # Failed refreshes keep the previous (stale) entry
+                if quote:
+                    self._entries[symbol] = (quote, time.monotonic())
+                    self._entries.move_to_end(symbol)
+                    while len(self._entries) > self.max_size:
+                        self._entries.popitem(last=False)
+                        self._stats["evictions"] += 1
+                self._inflight.pop(symbol, None)
+        return quote
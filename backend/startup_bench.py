@@ -0,0 +1,127 @@
+"""
+Startup benchmark: time-to-first-200 on `/` and time-to-ready of the simulation model.
+
+Starts a fresh uvicorn process per run, polls `/` until it answers 200, then
+polls `/api/simulation/health` until `model_status` leaves "loading". Times are
+measured from process spawn, so they include interpreter start and imports.
+Append results to a JSON-lines file with --output to track them across releases.
+
+Usage (from backend/):
+    python startup_bench.py [--runs 5] [--output startup_bench.jsonl]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+from pathlib import Path
+
+HOST, PORT = "127.0.0.1", 8766
+BASE = f"http://{HOST}:{PORT}"
+BACKEND_DIR = Path(__file__).resolve().parent
+
+
+def _get_json(path, timeout=1):
+    try:
+        with urllib.request.urlopen(BASE + path, timeout=timeout) as r:
+            return r.status, json.loads(r.read() or b"null")
+    except urllib.error.HTTPError as e:
+        return e.code, None
+    except (urllib.error.URLError, ConnectionError, TimeoutError):
+        return None, None
+
+
+def _wait_for(predicate, deadline, interval=0.01):
+    while time.perf_counter() < deadline:
+        result = predicate()
+        if result:
+            return result
+        time.sleep(interval)
+    raise TimeoutError("server did not reach the expected state in time")
+
+
+def run_once(timeout):
+    env = {**os.environ, "FINNHUB_API_KEY": "", "PYTHONPATH": str(BACKEND_DIR)}
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--host", HOST, "--port", str(PORT), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = start + timeout
+        _wait_for(lambda: _get_json("/")[0] == 200, deadline)
+        first_200 = time.perf_counter() - start
+
+        def model_settled():
+            status, body = _get_json("/api/simulation/health")
+            if status == 200 and body["model_status"] != "loading":
+                return body
+            return None
+
+        health = _wait_for(model_settled, deadline, interval=0.05)
+        ready = time.perf_counter() - start
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+    return {
+        "first_200_s": round(first_200, 3),
+        "ready_s": round(ready, 3),
+        "model_status": health["model_status"],
+        "policy": health.get("policy"),
+        "load_seconds": health.get("load_seconds"),
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds allowed per run")
+    parser.add_argument("--output", type=Path, help="Append a JSON line with the results")
+    args = parser.parse_args()
+
+    runs = []
+    for i in range(args.runs):
+        result = run_once(args.timeout)
+        runs.append(result)
+        print(
+            f"run {i + 1}: first 200 {result['first_200_s'] * 1000:7.0f} ms | "
+            f"ready {result['ready_s'] * 1000:7.0f} ms ({result['model_status']}, {result['policy']})"
+        )
+
+    summary = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "revision": _git_revision(),
+        "runs": args.runs,
+        "first_200_median_s": statistics.median(r["first_200_s"] for r in runs),
+        "ready_median_s": statistics.median(r["ready_s"] for r in runs),
+        "policy": runs[-1]["policy"],
+    }
+    print(
+        f"\nmedian: first 200 {summary['first_200_median_s'] * 1000:.0f} ms | "
+        f"ready {summary['ready_median_s'] * 1000:.0f} ms"
+    )
+
+    if args.output:
+        with open(args.output, "a") as f:
+            f.write(json.dumps(summary) + "\n")
+        print(f"appended to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
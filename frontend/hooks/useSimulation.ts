@@ -1,7 +1,11 @@
 import { useEffect, useState } from "react";
+import { getSessionId } from "@/lib/api";
 
 const API = process.env.NEXT_PUBLIC_API_BASE_URL;
 
+// Steps kept and rendered client-side; older ones stay on the server (GET /history)
+const HISTORY_WINDOW = 2_000;
+
 export type SimulationState = {
   running: boolean;
   portfolio_value?: number;
@@ -10,37 +14,108 @@ export type SimulationState = {
   allocations?: Record<string, number>;
 };
 
+type ColumnarHistory = Record<string, any[]> & { run_id: string | null; total_steps: number };
+
+function toRecords(columns: ColumnarHistory): any[] {
+  const fields = Object.keys(columns).filter((f) => f !== "run_id" && f !== "total_steps");
+  const n = columns.step?.length ?? 0;
+  const records = new Array(n);
+  for (let i = 0; i < n; i++) {
+    const record: Record<string, any> = { running: true };
+    for (const field of fields) record[field] = columns[field][i];
+    records[i] = record;
+  }
+  return records;
+}
+
 export function useSimulation() {
   const [state, setState] = useState<SimulationState | null>(null);
   const [history, setHistory] = useState<any[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
 
-  const fetchData = async () => {
-    try {
-      const stateRes = await fetch(`${API}/api/simulation/state`);
-      if (!stateRes.ok) throw new Error("State fetch failed");
+  useEffect(() => {
+    let source: EventSource | null = null;
+    let retry: ReturnType<typeof setTimeout> | undefined;
+    let frame: number | undefined;
+    let closed = false;
 
-      const stateJson = await stateRes.json();
-      setState(stateJson);
+    // Snapshots are pushed into a plain buffer and rendered at most once per
+    // animation frame, as a window of the last HISTORY_WINDOW steps
+    let buffer: any[] = [];
+    const flush = () => {
+      frame = undefined;
+      if (buffer.length > HISTORY_WINDOW) buffer = buffer.slice(-HISTORY_WINDOW);
+      setHistory(buffer.slice());
+    };
+    const scheduleFlush = () => {
+      if (frame === undefined) frame = requestAnimationFrame(flush);
+    };
 
-      const historyRes = await fetch(`${API}/api/simulation/history`);
-      setHistory(historyRes.ok ? await historyRes.json() : []);
+    const session = `session_id=${encodeURIComponent(getSessionId())}`;
 
-      setLoading(false);
-    } catch (err: any) {
-      console.error(err);
-      setError(err.message);
-      setLoading(false);
-    }
-  };
+    const connect = async () => {
+      try {
+        // Initial snapshot once; afterwards the server pushes each step
+        const stateRes = await fetch(`${API}/api/simulation/state?${session}`);
+        if (stateRes.status === 404) {
+          // No session until this browser starts one; check again shortly
+          setState({ running: false });
+          setLoading(false);
+          if (!closed) retry = setTimeout(connect, 2000);
+          return;
+        }
+        if (!stateRes.ok) throw new Error("State fetch failed");
+        setState(await stateRes.json());
 
-  useEffect(() => {
-    fetchData();
-    const interval = setInterval(fetchData, 2000);
-    return () => clearInterval(interval);
+        const historyRes = await fetch(`${API}/api/simulation/history?format=columnar&${session}`);
+        if (!historyRes.ok) throw new Error("History fetch failed");
+        const initial: ColumnarHistory = await historyRes.json();
+        buffer = toRecords(initial).slice(-HISTORY_WINDOW);
+        flush();
+        setLoading(false);
+
+        if (closed) return;
+
+        // Resume after the last appended step of *that* run: if the session was
+        // reset in between, the server replays the new run from its reset event.
+        // EventSource reconnects on its own using Last-Event-ID
+        const cursor = `since=${initial.total_steps - 1}&run_id=${encodeURIComponent(initial.run_id ?? "")}`;
+        source = new EventSource(`${API}/api/simulation/stream?${cursor}&${session}`);
+
+        source.addEventListener("snapshot", (e) => {
+          const snapshot = JSON.parse((e as MessageEvent).data);
+          setState(snapshot);
+          buffer.push(snapshot);
+          // Amortized trim: copy only once the buffer doubles the window
+          if (buffer.length >= 2 * HISTORY_WINDOW) buffer = buffer.slice(-HISTORY_WINDOW);
+          scheduleFlush();
+          setError(null);
+        });
+
+        source.addEventListener("reset", () => {
+          buffer = [];
+          scheduleFlush();
+        });
+
+        source.onerror = () => {
+          setError("Simulation stream disconnected, retrying...");
+        };
+      } catch (err: any) {
+        console.error(err);
+        setError(err.message);
+        setLoading(false);
+      }
+    };
+
+    connect();
+    return () => {
+      closed = true;
+      clearTimeout(retry);
+      if (frame !== undefined) cancelAnimationFrame(frame);
+      source?.close();
+    };
   }, []);
 
   return { state, history, loading, error };
 }
-
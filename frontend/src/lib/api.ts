@@ -16,6 +16,24 @@ const getBaseUrl = (): string => {
 
 export const API_BASE_URL = getBaseUrl();
 
+/* ======================================
+   SIMULATION SESSION
+   Each browser drives its own simulation
+====================================== */
+
+const SESSION_KEY = 'aegris-session-id';
+
+export function getSessionId(): string {
+  if (typeof window === 'undefined') return '';
+
+  let id = window.localStorage.getItem(SESSION_KEY);
+  if (!id) {
+    id = window.crypto.randomUUID();
+    window.localStorage.setItem(SESSION_KEY, id);
+  }
+  return id;
+}
+
 /* ======================================
    GENERIC FETCH HELPER
 ====================================== */
@@ -28,6 +46,7 @@ async function apiFetch<T>(
     ...options,
     headers: {
       'Content-Type': 'application/json',
+      'X-Session-Id': getSessionId(),
       ...(options?.headers || {}),
     },
   });
@@ -50,14 +69,57 @@ export interface SimulationState {
   drawdown: number;
   volatility: number;
   turnover: number;
+  // Running metrics of the run so far
+  sharpe?: number;
+  max_drawdown?: number;
+  cagr?: number;
+  annual_volatility?: number;
+  win_rate?: number;
+  total_turnover?: number;
+  total_costs?: number;
   weights: number[];
   running?: boolean;
 }
 
 export interface BackendHealth {
   status: string;
+  model_status?: 'idle' | 'loading' | 'ready' | 'failed';
   model_loaded: boolean;
   running: boolean;
+  sessions?: number;
+}
+
+export interface RunSummary {
+  steps: number;
+  running: boolean;
+  done: boolean;
+  start_value: number;
+  portfolio_value: number;
+  total_return: number;
+  sharpe: number;
+  max_drawdown: number;
+  volatility: number;
+  turnover: number;
+  elapsed: number;
+  steps_per_sec: number | null;
+  state: SimulationState;
+}
+
+export interface RunJob {
+  job_id: string;
+  status: 'queued' | 'running' | 'done' | 'cancelled' | 'failed';
+  steps_done: number;
+  target_steps: number | null;
+  progress: number | null;
+  elapsed: number | null;
+  result: RunSummary | null;
+  error: string | null;
+}
+
+export interface RunOptions {
+  steps?: number;
+  record?: boolean;
+  reset?: boolean;
 }
 
 export interface MarketQuote {
@@ -109,6 +171,38 @@ export function getSimulationState(): Promise<SimulationState> {
   return apiFetch('/api/simulation/state');
 }
 
+function runQuery(options: RunOptions, background: boolean): string {
+  const params = new URLSearchParams({ background: String(background) });
+  if (options.steps) params.set('steps', String(options.steps));
+  if (options.record !== undefined) params.set('record', String(options.record));
+  if (options.reset) params.set('reset', 'true');
+  return params.toString();
+}
+
+// Fast-forward server-side in one request (until the end of data without `steps`)
+export function runSimulation(options: RunOptions = {}): Promise<RunSummary> {
+  return apiFetch(`/api/simulation/run?${runQuery(options, false)}`, {
+    method: 'POST',
+  });
+}
+
+// Same as runSimulation, as a background job polled with getRunJob
+export function startRunJob(options: RunOptions = {}): Promise<RunJob> {
+  return apiFetch(`/api/simulation/run?${runQuery(options, true)}`, {
+    method: 'POST',
+  });
+}
+
+export function getRunJob(): Promise<RunJob> {
+  return apiFetch('/api/simulation/run');
+}
+
+export function cancelRunJob(): Promise<RunJob> {
+  return apiFetch('/api/simulation/run', {
+    method: 'DELETE',
+  });
+}
+
 /* ======================================
    MARKET
 ====================================== */
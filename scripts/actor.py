@@ -0,0 +1,145 @@
+import numpy as np
+from pathlib import Path
+
+# ============================================================
+# Actor-only policy artifact (NumPy inference)
+# ============================================================
+#
+# The .npz written by export_actor.py holds only what deterministic
+# inference needs: the actor MLP, the frozen VecNormalize observation
+# statistics and the action bounds. Loading it needs NumPy alone.
+
+ARTIFACT_VERSION = 1
+ARTIFACT_NAME = "aegris_actor.npz"
+
+ACTIVATIONS = {
+    "relu": lambda x: np.maximum(x, 0, out=x),
+    "tanh": lambda x: np.tanh(x, out=x),
+    "elu": lambda x: np.where(x > 0, x, np.expm1(x)),
+    "leaky_relu": lambda x: np.where(x > 0, x, 0.01 * x),
+}
+
+
+class ActorPolicy:
+    """
+    Deterministic SAC actor in plain NumPy.
+
+    predict(): normalize obs -> MLP -> mu -> tanh -> rescale to the
+    action bounds, matching `SAC.predict(obs, deterministic=True)`
+    behind a frozen VecNormalize.
+    """
+
+    def __init__(
+        self,
+        layers,
+        activation,
+        mu,
+        action_low,
+        action_high,
+        obs_mean=None,
+        obs_var=None,
+        obs_epsilon=1e-8,
+        clip_obs=10.0,
+        squash=True,
+    ):
+        if activation not in ACTIVATIONS:
+            raise ValueError(f"Unsupported activation {activation!r}")
+
+        self.layers = [(np.asarray(w, np.float32), np.asarray(b, np.float32)) for w, b in layers]
+        self.activation = activation
+        self._act = ACTIVATIONS[activation]
+        self.mu = (np.asarray(mu[0], np.float32), np.asarray(mu[1], np.float32))
+        self.action_low = np.asarray(action_low, np.float32)
+        self.action_high = np.asarray(action_high, np.float32)
+        self.squash = bool(squash)
+
+        self.obs_mean = obs_mean
+        self.obs_std = None
+        self.clip_obs = clip_obs
+        if obs_mean is not None:
+            self.obs_std = np.sqrt(np.asarray(obs_var) + obs_epsilon)
+
+    @property
+    def obs_dim(self):
+        return self.layers[0][0].shape[0] if self.layers else self.mu[0].shape[0]
+
+    @property
+    def nbytes(self):
+        arrays = [a for layer in self.layers for a in layer] + list(self.mu)
+        return sum(a.nbytes for a in arrays)
+
+    # ------------------------
+    # Inference
+    # ------------------------
+    def normalize_obs(self, obs):
+        if self.obs_mean is None:
+            return np.asarray(obs, np.float32)
+        # Same arithmetic as VecNormalize.normalize_obs (float64, then float32)
+        normalized = np.clip((obs - self.obs_mean) / self.obs_std, -self.clip_obs, self.clip_obs)
+        return normalized.astype(np.float32)
+
+    def predict(self, obs):
+        """Deterministic actions for a (n, obs_dim) batch of raw observations."""
+        x = self.normalize_obs(obs)
+        for w, b in self.layers:
+            x = self._act(x @ w + b)
+        actions = x @ self.mu[0] + self.mu[1]
+
+        if self.squash:
+            np.tanh(actions, out=actions)
+            return self.action_low + 0.5 * (actions + 1.0) * (self.action_high - self.action_low)
+        return np.clip(actions, self.action_low, self.action_high)
+
+    def act(self, obs):
+        """Action for a single observation."""
+        return self.predict(obs[None, :])[0]
+
+    # ------------------------
+    # Serialization
+    # ------------------------
+    def save(self, path):
+        arrays = {
+            "version": np.array(ARTIFACT_VERSION),
+            "activation": np.array(self.activation),
+            "n_layers": np.array(len(self.layers)),
+            "mu_w": self.mu[0],
+            "mu_b": self.mu[1],
+            "action_low": self.action_low,
+            "action_high": self.action_high,
+            "squash": np.array(self.squash),
+        }
+        for i, (w, b) in enumerate(self.layers):
+            arrays[f"layer{i}_w"] = w
+            arrays[f"layer{i}_b"] = b
+        if self.obs_mean is not None:
+            arrays["obs_mean"] = self.obs_mean
+            arrays["obs_std"] = self.obs_std
+            arrays["clip_obs"] = np.array(self.clip_obs)
+
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, **arrays)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data["version"])
+            if version != ARTIFACT_VERSION:
+                raise ValueError(f"{path}: artifact version {version}, expected {ARTIFACT_VERSION}")
+
+            layers = [(data[f"layer{i}_w"], data[f"layer{i}_b"]) for i in range(int(data["n_layers"]))]
+            policy = cls(
+                layers,
+                str(data["activation"]),
+                (data["mu_w"], data["mu_b"]),
+                data["action_low"],
+                data["action_high"],
+                squash=bool(data["squash"]),
+            )
+            if "obs_mean" in data:
+                policy.obs_mean = data["obs_mean"]
+                policy.obs_std = data["obs_std"]
+                policy.clip_obs = float(data["clip_obs"])
+        return policy
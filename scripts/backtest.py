@@ -0,0 +1,330 @@
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from metrics import cagr, max_drawdown, sharpe_ratio, win_rate
+from trading_env import TradingEnv
+
+# ============================================================
+# AEGRIS — Vectorized Backtester
+# ============================================================
+#
+# Replays target-weight schedules through the TradingEnv cost model in one
+# NumPy pass. In the env, the weights chosen at a step only earn the *next*
+# step's returns, so the whole weight path is known from the schedule alone
+# and equity is a cumulative product, with no per-step Python loop.
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+REPORTS_DIR = BASE_DIR / "scripts" / "reports"
+
+
+class BacktestResult:
+    """Per-step series of a backtest, each shaped (n_strategies, T)."""
+
+    def __init__(self, names, weights, turnover, costs, returns, equity, drawdown, volatility, rewards, initial_cash):
+        self.names = names
+        self.weights = weights          # (S, T, A) weights held after each step
+        self.turnover = turnover
+        self.costs = costs              # fraction of portfolio value paid per step
+        self.returns = returns          # portfolio return per step, after costs and clipping
+        self.equity = equity
+        self.drawdown = drawdown
+        self.volatility = volatility    # rolling std of log returns (the reward denominator)
+        self.rewards = rewards
+        self.initial_cash = initial_cash
+
+    def equity_curve(self, i=0):
+        """Equity of strategy i including the starting value."""
+        return np.concatenate([[self.initial_cash], self.equity[i]])
+
+    def summary(self):
+        rows = []
+        for i, name in enumerate(self.names):
+            curve = self.equity_curve(i)
+            rows.append({
+                "strategy": name,
+                "Final Equity": curve[-1],
+                "Total Return (%)": (curve[-1] / curve[0] - 1) * 100,
+                "CAGR (%)": cagr(curve) * 100,
+                "Sharpe Ratio": sharpe_ratio(self.returns[i]),
+                "Max Drawdown (%)": max_drawdown(curve) * 100,
+                "Win Rate (%)": win_rate(self.returns[i]) * 100,
+                "Turnover": self.turnover[i].sum(),
+                "Costs (%)": self.costs[i].sum() * 100,
+                "Total Reward": self.rewards[i].sum(),
+            })
+        return pd.DataFrame(rows).set_index("strategy")
+
+
+class Backtester:
+    """
+    TradingEnv.step's accounting, vectorized over steps and strategies:
+    action clipping and normalization, max_position capping, turnover
+    costs (transaction_cost + slippage), return clipping, drawdown and
+    the Sharpe-proxy reward with its drawdown penalty.
+    """
+
+    def __init__(
+        self,
+        asset_returns,
+        initial_cash=1_000_000,
+        max_position=0.15,
+        transaction_cost=0.001,
+        slippage=0.0005,
+        max_drawdown=0.25,
+        reward_scaling=1e3,
+        vol_window=50,
+        start=1,
+    ):
+        self.asset_returns = np.asarray(asset_returns)
+        self.initial_cash = float(initial_cash)
+        self.max_position = float(max_position)
+        self.cost_rate = float(transaction_cost) + float(slippage)
+        self.max_drawdown = float(max_drawdown)
+        self.reward_scaling = float(reward_scaling)
+        self.vol_window = int(vol_window)
+        self.start = int(start)
+
+    @classmethod
+    def from_env(cls, env):
+        return cls(
+            env.asset_returns,
+            initial_cash=env.initial_cash,
+            max_position=env.max_position,
+            transaction_cost=env.transaction_cost,
+            slippage=env.slippage,
+            max_drawdown=env.max_drawdown,
+            reward_scaling=env.reward_scaling,
+            vol_window=env.vol_window,
+            start=env.window_size,
+        )
+
+    @property
+    def n_assets(self):
+        return self.asset_returns.shape[1]
+
+    @property
+    def max_steps(self):
+        # The env terminates once current_step reaches n_steps - 1
+        return self.asset_returns.shape[0] - 1 - self.start
+
+    # ------------------------
+    # Engine
+    # ------------------------
+    def run(self, weights, names=None):
+        """Backtest a (T, A) schedule or a stack of them shaped (S, T, A)."""
+        weights = np.asarray(weights, dtype=np.float64)
+        if weights.ndim == 2:
+            weights = weights[None]
+        n_strategies, n_steps, n_assets = weights.shape
+        if n_assets != self.n_assets:
+            raise ValueError(f"Schedule has {n_assets} assets, market has {self.n_assets}")
+        if n_steps > self.max_steps:
+            raise ValueError(f"Schedule has {n_steps} steps, at most {self.max_steps} are available")
+
+        held = self.target_weights(weights)
+        initial = np.full((n_strategies, 1, n_assets), 1.0 / n_assets)
+        previous = np.concatenate([initial, held[:, :-1]], axis=1)
+
+        turnover = np.abs(held - previous).sum(axis=-1)
+        costs = turnover * self.cost_rate
+
+        # Weights earn the returns of the step they are held into
+        asset_returns = self.asset_returns[self.start:self.start + n_steps]
+        returns = np.einsum("sta,ta->st", previous, asset_returns) - costs
+        returns = np.clip(returns, -0.2, 0.2)
+
+        equity = self.initial_cash * np.cumprod(1.0 + returns, axis=1)
+        peak = np.maximum(np.maximum.accumulate(equity, axis=1), self.initial_cash)
+        drawdown = (peak - equity) / peak
+
+        log_returns = np.log1p(returns)
+        volatility = rolling_std(log_returns, self.vol_window) + 1e-8
+        penalty = -5.0 * np.maximum(0, drawdown - self.max_drawdown)
+        rewards = np.nan_to_num((log_returns / volatility + penalty) * self.reward_scaling)
+
+        names = list(names) if names is not None else [f"strategy_{i}" for i in range(n_strategies)]
+        return BacktestResult(
+            names, held, turnover, costs, returns, equity, drawdown, volatility, rewards, self.initial_cash
+        )
+
+    def target_weights(self, actions):
+        """Env action handling: clip to [0, 1], normalize, cap at max_position, renormalize."""
+        actions = np.clip(actions, 0, 1)
+        totals = actions.sum(axis=-1, keepdims=True)
+        targets = np.divide(actions, totals, out=np.zeros_like(actions), where=totals > 0)
+        with np.errstate(invalid="ignore"):
+            # All-zero rows become NaN here and are filled in below
+            targets = self._cap(targets)
+
+        # All-zero actions keep the previous weights (re-capped), a sequential rule
+        for s, t in zip(*np.nonzero(totals[..., 0] == 0)):
+            previous = targets[s, t - 1] if t > 0 else np.full(self.n_assets, 1.0 / self.n_assets)
+            targets[s, t] = self._cap(previous)
+        return targets
+
+    def _cap(self, weights):
+        capped = np.minimum(weights, self.max_position)
+        return capped / capped.sum(axis=-1, keepdims=True)
+
+
+def rolling_std(values, window):
+    """Population std over the last `window` values along the last axis (fewer at the start)."""
+    # Centering first keeps the running sums well conditioned
+    centered = values - values.mean(axis=-1, keepdims=True)
+    csum = np.cumsum(centered, axis=-1)
+    csum_sq = np.cumsum(centered * centered, axis=-1)
+
+    total, total_sq = csum.copy(), csum_sq.copy()
+    total[..., window:] -= csum[..., :-window]
+    total_sq[..., window:] -= csum_sq[..., :-window]
+
+    count = np.minimum(np.arange(1, values.shape[-1] + 1), window)
+    mean = total / count
+    return np.sqrt(np.maximum(total_sq / count - mean * mean, 0.0))
+
+
+# ============================================================
+# Baseline strategies (each returns a (T, A) schedule)
+# ============================================================
+
+def equal_weight(backtester, n_steps):
+    return np.full((n_steps, backtester.n_assets), 1.0 / backtester.n_assets)
+
+
+def drift_weighted(backtester, n_steps):
+    """
+    Weights proportional to each asset's growth since the start, i.e. the
+    weights a buy-and-hold portfolio would drift to. The engine models
+    constant-mix weights, so reaching them every step is charged as turnover;
+    this is a rebalanced tracker, not a cost-free buy-and-hold.
+    """
+    growth = np.cumprod(1.0 + backtester.asset_returns[backtester.start:backtester.start + n_steps], axis=0)
+    return growth / growth.sum(axis=1, keepdims=True)
+
+
+def capped_momentum(backtester, n_steps, lookback=20):
+    """Weights proportional to positive trailing `lookback`-step returns; equal weight when none are positive."""
+    log_growth = np.log1p(backtester.asset_returns.astype(np.float64))
+    csum = np.cumsum(log_growth, axis=0)
+    steps = np.arange(backtester.start, backtester.start + n_steps)
+    # Signal at step t uses returns up to and including t; the weights earn t + 1
+    momentum = np.expm1(csum[steps] - csum[np.maximum(steps - lookback, 0)])
+    scores = np.maximum(momentum, 0)
+    scores[scores.sum(axis=1) == 0] = 1.0
+    return scores
+
+
+BASELINES = {
+    "equal_weight": equal_weight,
+    "drift_weighted": drift_weighted,
+    "capped_momentum": capped_momentum,
+}
+
+
+# ============================================================
+# Verification against the step-by-step env
+# ============================================================
+
+def verify_against_env(env, n_steps=1_000, seed=0, rtol=1e-6):
+    """Replay a random schedule through env.step and the backtester; returns max relative differences."""
+    rng = np.random.default_rng(seed)
+    schedule = rng.random((n_steps, env.n_assets))
+    schedule[rng.random(n_steps) < 0.05] = 0.0          # exercise the keep-previous-weights path
+
+    env.reset(seed=seed)
+    series = {"equity": [], "drawdown": [], "turnover": [], "volatility": [], "reward": []}
+    for action in schedule:
+        _, reward, terminated, _, info = env.step(action)
+        series["equity"].append(info["portfolio_value"])
+        series["drawdown"].append(info["drawdown"])
+        series["turnover"].append(info["turnover"])
+        series["volatility"].append(info["volatility"])
+        series["reward"].append(reward)
+        if terminated:
+            break
+
+    result = Backtester.from_env(env).run(schedule[:len(series["reward"])])
+    vectorized = {
+        "equity": result.equity[0],
+        "drawdown": result.drawdown[0],
+        "turnover": result.turnover[0],
+        "volatility": result.volatility[0],
+        "reward": result.rewards[0],
+    }
+
+    diffs = {}
+    for key, expected in series.items():
+        expected = np.asarray(expected, dtype=np.float64)
+        actual = vectorized[key]
+        scale = np.maximum(np.abs(expected), 1e-8)
+        diffs[key] = float((np.abs(actual - expected) / scale).max())
+        if not np.allclose(actual, expected, rtol=rtol, atol=1e-8):
+            raise AssertionError(f"Backtest {key} deviates from TradingEnv: max rel diff {diffs[key]:.3g}")
+    return diffs
+
+
+# ============================================================
+# CLI
+# ============================================================
+
+def load_schedules(path, n_steps, n_assets):
+    """(S, n_steps, A) schedules from a .npy file; raises ValueError naming the file if too short or the wrong shape."""
+    loaded = np.load(path)
+    if loaded.ndim not in (2, 3):
+        raise ValueError(f"{path}: expected a (T, A) or (S, T, A) schedule, got shape {loaded.shape}")
+    stack = loaded if loaded.ndim == 3 else loaded[None]
+    if stack.shape[2] != n_assets:
+        raise ValueError(f"{path}: schedule has {stack.shape[2]} assets, the panel has {n_assets}")
+    if stack.shape[1] < n_steps:
+        raise ValueError(f"{path}: schedule has {stack.shape[1]:,} steps, {n_steps:,} needed (pass --steps to backtest fewer)")
+    return stack[:, :n_steps]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Vectorized backtests of weight schedules and baselines.")
+    parser.add_argument("--steps", type=int, default=None, help="Steps to backtest (default: all available)")
+    parser.add_argument("--weights", type=Path, nargs="*", default=[], help=".npy schedules shaped (T, A) or (S, T, A)")
+    parser.add_argument("--momentum-lookback", type=int, default=20)
+    parser.add_argument("--verify", action="store_true", help="Check the engine against TradingEnv first")
+    parser.add_argument("--out", type=Path, default=REPORTS_DIR / "backtest_summary.csv")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    env = TradingEnv()
+    backtester = Backtester.from_env(env)
+    n_steps = min(args.steps or backtester.max_steps, backtester.max_steps)
+
+    if args.verify:
+        diffs = verify_against_env(env, min(n_steps, 2_000))
+        print("✅ Matches TradingEnv.step: " + ", ".join(f"{k} {v:.1e}" for k, v in diffs.items()))
+
+    names, schedules = [], []
+    for name, baseline in BASELINES.items():
+        kwargs = {"lookback": args.momentum_lookback} if name == "capped_momentum" else {}
+        names.append(name)
+        schedules.append(baseline(backtester, n_steps, **kwargs))
+
+    for path in args.weights:
+        stack = load_schedules(path, n_steps, backtester.n_assets)
+        for i, schedule in enumerate(stack):
+            names.append(path.stem if len(stack) == 1 else f"{path.stem}[{i}]")
+            schedules.append(schedule)
+
+    result = backtester.run(np.stack(schedules), names)
+    summary = result.summary()
+
+    print(f"\n📊 Backtest: {len(names)} strategies x {n_steps:,} steps x {backtester.n_assets} assets")
+    print(summary.round(3).to_string())
+
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    summary.to_csv(args.out)
+    print(f"\n✅ Summary saved at: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
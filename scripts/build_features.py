@@ -1,39 +1,411 @@
-import pandas as pd
+import argparse
+import hashlib
+import io
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
-from ta.momentum import RSIIndicator
+
+import numpy as np
+import pandas as pd
+
+from indicators import DEFAULT_INDICATORS, IndicatorEngine, compute_frames
 
 # Project root (parent of scripts/)
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 RAW_DIR = PROJECT_ROOT / "datasets" / "raw"
 OUT_DIR = PROJECT_ROOT / "datasets" / "processed"
-OUT_DIR.mkdir(parents=True, exist_ok=True)
 
 MAX_ROWS = 30000   # limit rows for fast dev
 
-def engineer_features(df):
+# Indicator specs (see indicators.INDICATORS), e.g. "volatility_60", "macd", "atr".
+# The processed columns are the observation features, so changing this
+# means retraining.
+INDICATOR_SET = DEFAULT_INDICATORS
+
+# Bump whenever engineer_features changes: every asset is then rebuilt
+FEATURE_VERSION = 2
+MANIFEST_NAME = ".features_manifest.json"
+
+HASH_CHUNK = 1 << 20
+
+# Assets per worker task; their full builds share one stacked engine pass
+BATCH_ASSETS = 32
+
+# Streaming mode (--stream): raw rows parsed per chunk, output as <asset>.npy
+STREAM_CHUNK_ROWS = 100_000
+
+
+def add_features(df, indicators=INDICATOR_SET):
+    """Feature columns on a lowercase-column frame (no truncation, warm-up rows left as NaN)."""
+    # The engine needs gap-free prices; rows without a close carry no features anyway
+    df = df[df["close"].notna()].copy()
+    return IndicatorEngine(indicators).add_to_frame(df)
+
+
+def engineer_features(df, indicators=INDICATOR_SET, max_rows=MAX_ROWS):
+    return add_features(prepare_raw(df, max_rows), indicators).dropna()
+
+
+def engineer_batch(frames, indicators=INDICATOR_SET, max_rows=MAX_ROWS):
+    """engineer_features for several assets in one stacked (n_assets, T) engine pass."""
+    frames = [prepare_raw(df, max_rows) for df in frames]
+    frames = [df[df["close"].notna()] for df in frames]
+    return [df.dropna() for df in compute_frames(frames, indicators)]
+
+
+def prepare_raw(df, max_rows=MAX_ROWS):
     df.columns = [c.lower().strip() for c in df.columns]
-    df = df.tail(MAX_ROWS).copy()   # limit size
+    if max_rows:
+        df = df.tail(max_rows)   # limit size
+    return df.copy()
+
+
+# -------------------------------
+# Manifest: input size / mtime / hash per raw file
+# -------------------------------
+def read_manifest(out_dir, indicators=INDICATOR_SET, output_format="csv"):
+    try:
+        with open(out_dir / MANIFEST_NAME) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {"assets": {}}
+    if (
+        manifest.get("feature_version") != FEATURE_VERSION
+        or manifest.get("max_rows") != MAX_ROWS
+        or manifest.get("indicators") != list(indicators)
+        or manifest.get("format", "csv") != output_format
+    ):
+        # Features or truncation changed: nothing on disk can be reused
+        return {"assets": {}}
+    return manifest
+
+
+def write_manifest(out_dir, assets, indicators=INDICATOR_SET, output_format="csv"):
+    manifest = {
+        "feature_version": FEATURE_VERSION,
+        "max_rows": MAX_ROWS,
+        "indicators": list(indicators),
+        "format": output_format,
+        "assets": assets,
+    }
+    tmp = out_dir / f"{MANIFEST_NAME}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, out_dir / MANIFEST_NAME)
+
+
+def hash_file(path, prefix_size=None):
+    """(sha256 of the file, sha256 of its first `prefix_size` bytes) in one read."""
+    full, prefix = hashlib.sha256(), hashlib.sha256() if prefix_size else None
+    read = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            full.update(chunk)
+            if prefix is not None and read < prefix_size:
+                prefix.update(chunk[:prefix_size - read])
+            read += len(chunk)
+    return full.hexdigest(), prefix.hexdigest() if prefix else None
+
+
+def plan_update(csv_file, out_path, entry):
+    """'skip', 'append' or 'full' for one raw file, with its new manifest entry."""
+    stat = csv_file.stat()
+    info = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    if entry is None or not out_path.exists() or out_path.stat().st_size < entry["output_size"]:
+        info["sha256"], _ = hash_file(csv_file)
+        return "full", info
+
+    if _unchanged(stat, entry):
+        return "skip", entry
+
+    grew = stat.st_size > entry["size"]
+    info["sha256"], prefix = hash_file(csv_file, entry["size"] if grew else None)
+    if info["sha256"] == entry["sha256"]:
+        return "skip", {**entry, **info}      # touched, not changed
+    if grew and prefix == entry["sha256"] and "raw_rows" in entry and _ends_with_newline(csv_file, entry["size"]):
+        return "append", info                 # old bytes intact, rows added at the end
+    return "full", info
+
+
+def _unchanged(stat, entry):
+    return entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns
+
+
+def _ends_with_newline(path, size):
+    # Otherwise the old last line was extended rather than new rows appended
+    with open(path, "rb") as f:
+        f.seek(size - 1)
+        return f.read(1) == b"\n"
+
+
+# -------------------------------
+# Per-asset build (runs in worker processes)
+# -------------------------------
+def build_batch(tasks, indicators=INDICATOR_SET, chunk_rows=None):
+    """
+    Build several raw files in one worker: [(csv_file, out_path, entry)] ->
+    [(name, mode, info, seconds)]. Full CSV builds of the batch are
+    computed together by engineer_batch; appends and streamed outputs go
+    asset by asset.
+    """
+    results, full = [], []
+    for csv_file, out_path, entry in tasks:
+        started = time.perf_counter()
+        mode, info = plan_update(csv_file, out_path, entry)
+
+        if chunk_rows and mode != "skip":
+            # Streamed outputs are rebuilt whole: the build is already bounded in memory
+            mode = "full"
+            info["rows"] = stream_features(csv_file, out_path, indicators, chunk_rows)
+        elif mode == "append":
+            info["rows"], info["raw_rows"] = append_features(csv_file, out_path, entry, indicators)
+        elif mode == "full":
+            full.append((csv_file, out_path, info))
+            continue
 
-    df["return"] = df["close"].pct_change()
-    df["volatility"] = df["return"].rolling(20).std()
-    df["rsi"] = RSIIndicator(df["close"]).rsi()
+        if mode != "skip":
+            info["output_size"] = out_path.stat().st_size
+        results.append((csv_file.name, mode, info, time.perf_counter() - started))
 
-    return df.dropna()
+    if full:
+        started = time.perf_counter()
+        raws = [pd.read_csv(csv_file) for csv_file, _, _ in full]
+        for (_, _, info), raw in zip(full, raws):
+            info["raw_rows"] = len(raw)     # before MAX_ROWS; appends past it rebuild
+        frames = engineer_batch(raws, indicators)
+        for (csv_file, out_path, info), df in zip(full, frames):
+            tmp = out_path.with_name(f".{out_path.name}.{os.getpid()}.tmp")
+            df.to_csv(tmp, index=False)
+            os.replace(tmp, out_path)
+            info["rows"] = len(df)
+            info["output_size"] = out_path.stat().st_size
+        # Reported per asset as an equal share of the batch
+        seconds = (time.perf_counter() - started) / len(full)
+        results += [(csv_file.name, "full", info, seconds) for csv_file, _, info in full]
+    return results
+
+
+def append_features(csv_file, out_path, entry, indicators=INDICATOR_SET):
+    """
+    Features for rows appended after the previous build only: the new raw
+    rows are parsed on their own and computed after enough rows of the
+    existing output for every indicator to converge (engine.warmup_rows),
+    then appended to the output file in place. Returns (output rows, raw rows).
+
+    Once the raw file outgrows MAX_ROWS the window a full build keeps moves,
+    changing its warm-up rows and every EWM seeded at its start, so the
+    asset is rebuilt from the raw tail exactly like a full build.
+    """
+    with open(csv_file, "rb") as f:
+        header = f.readline()
+        f.seek(entry["size"])
+        tail = f.read()
+
+    new_rows = pd.read_csv(io.BytesIO(header + tail))
+    raw_rows = entry["raw_rows"] + len(new_rows)
+    if raw_rows > MAX_ROWS:
+        raw = pd.read_csv(csv_file)
+        df = engineer_features(raw, indicators)
+        tmp = out_path.with_name(f".{out_path.name}.{os.getpid()}.tmp")
+        df.to_csv(tmp, index=False)
+        os.replace(tmp, out_path)
+        return len(df), len(raw)
+
+    new_rows.columns = [c.lower().strip() for c in new_rows.columns]
+    warmup = read_tail(out_path, IndicatorEngine(indicators).warmup_rows, entry["output_size"])
+    raw_columns = [c for c in warmup.columns if c in new_rows.columns]
+    frame = pd.concat([warmup[raw_columns], new_rows[raw_columns]], ignore_index=True)
+    added = add_features(frame, indicators).iloc[len(warmup):].dropna()[warmup.columns]
+
+    with open(out_path, "r+b") as f:
+        # Drops anything a previously interrupted append left behind
+        f.truncate(entry["output_size"])
+        f.seek(entry["output_size"])
+        f.write(added.to_csv(index=False, header=False).encode())
+    return entry["rows"] + len(added), raw_rows
+
+
+def read_tail(path, n_rows, size):
+    """Last `n_rows` data rows of the first `size` bytes of a CSV, without parsing the rest."""
+    with open(path, "rb") as f:
+        header = f.readline()
+        pos, block, data = size, 1 << 16, b""
+        while pos > len(header) and data.count(b"\n") <= n_rows:
+            step = min(block, pos - len(header))
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+            block *= 2
+
+    lines = data.splitlines()
+    if pos > len(header):
+        lines = lines[1:]     # first line may be cut mid-row
+    return pd.read_csv(io.BytesIO(header + b"\n".join(lines[-n_rows:]) + b"\n"))
+
+
+# -------------------------------
+# Streaming build (out-of-core, no MAX_ROWS)
+# -------------------------------
+def stream_features(csv_file, out_path, indicators=INDICATOR_SET, chunk_rows=STREAM_CHUNK_ROWS):
+    """
+    Features of a whole raw CSV without loading it: rows are parsed
+    `chunk_rows` at a time and each chunk is computed after the last
+    engine.warmup_rows raw rows of the previous ones (the rolling-window
+    state), so outputs match add_features on the full history to float
+    precision. Numeric feature rows go to a raw temp file as they are
+    produced, then into `out_path` (.npy, float64, rows x columns) with a
+    JSON sidecar naming the columns. Returns the output row count.
+    """
+    engine = IndicatorEngine(indicators)
+    carry, columns, rows = None, None, 0
+
+    raw_path = out_path.with_name(f".{out_path.name}.{os.getpid()}.raw.tmp")
+    try:
+        with open(raw_path, "wb") as raw:
+            for chunk in pd.read_csv(csv_file, chunksize=chunk_rows):
+                chunk.columns = [c.lower().strip() for c in chunk.columns]
+                chunk = chunk[chunk["close"].notna()]
+                if chunk.empty:
+                    continue
+                frame = chunk if carry is None else pd.concat([carry, chunk], ignore_index=True)
+                carry = frame.tail(engine.warmup_rows)
+
+                features = engine.add_to_frame(frame.copy()).iloc[len(frame) - len(chunk):].dropna()
+                if columns is None:
+                    columns = list(features.select_dtypes("number").columns)
+                raw.write(np.ascontiguousarray(features[columns], dtype=np.float64).tobytes())
+                rows += len(features)
+
+        if columns is None:
+            raise ValueError(f"{csv_file} has no rows")
+        write_npy(raw_path, out_path, (rows, len(columns)))
+    finally:
+        raw_path.unlink(missing_ok=True)
+
+    sidecar = {"source": csv_file.name, "columns": columns, "rows": rows, "dtype": "float64"}
+    tmp = out_path.with_name(f".{out_path.stem}.json.{os.getpid()}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(sidecar, f, indent=2)
+    os.replace(tmp, out_path.with_suffix(".json"))
+    return rows
+
+
+def write_npy(raw_path, out_path, shape):
+    """Prefix raw float64 rows with a .npy header of `shape`, copying through a fixed-size buffer."""
+    header = {"descr": np.lib.format.dtype_to_descr(np.dtype(np.float64)), "fortran_order": False, "shape": shape}
+    tmp = out_path.with_name(f".{out_path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as out, open(raw_path, "rb") as raw:
+        np.lib.format.write_array_header_1_0(out, header)
+        shutil.copyfileobj(raw, out, HASH_CHUNK)
+    os.replace(tmp, out_path)
+
+
+def load_features(path, mmap_mode="r"):
+    """(columns, array) of a streamed output; the array is memory-mapped by default."""
+    path = Path(path)
+    with open(path.with_suffix(".json")) as f:
+        sidecar = json.load(f)
+    return sidecar["columns"], np.load(path, mmap_mode=mmap_mode)
+
+
+def verify_stream(csv_file, indicators=INDICATOR_SET, chunk_rows=1_000, out_dir=None):
+    """Max abs difference between the streamed output and the in-memory path (no MAX_ROWS)."""
+    import tempfile
+
+    with tempfile.TemporaryDirectory(dir=out_dir) as tmp:
+        out_path = Path(tmp) / f"{Path(csv_file).stem}.npy"
+        stream_features(Path(csv_file), out_path, indicators, chunk_rows)
+        columns, streamed = load_features(out_path, mmap_mode=None)
+
+    expected = engineer_features(pd.read_csv(csv_file), indicators, max_rows=None)
+    expected = expected[columns].to_numpy(dtype=np.float64)
+    if streamed.shape != expected.shape:
+        raise AssertionError(f"Streamed shape {streamed.shape} != in-memory {expected.shape}")
+    return float(np.abs(streamed - expected).max()) if len(expected) else 0.0
+
+
+# -------------------------------
+# Pipeline
+# -------------------------------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build processed features from raw CSVs (incremental, parallel).")
+    parser.add_argument("--raw-dir", type=Path, default=RAW_DIR)
+    parser.add_argument("--out-dir", type=Path, help=f"Default {OUT_DIR}; required with --stream")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--full", action="store_true", help="Ignore the manifest and rebuild every asset")
+    parser.add_argument("--indicators", nargs="+", default=list(INDICATOR_SET), help="Indicator specs, e.g. rsi volatility_60 macd")
+    parser.add_argument("--stream", action="store_true", help="Chunked build of full histories (no MAX_ROWS) into <asset>.npy + .json")
+    parser.add_argument("--chunk-rows", type=int, default=STREAM_CHUNK_ROWS, help="Raw rows parsed per chunk with --stream")
+    parser.add_argument("--verify-stream", action="store_true", help="Check streamed outputs against the in-memory path first")
+    args = parser.parse_args(argv)
+
+    if not args.stream:
+        args.out_dir = args.out_dir or OUT_DIR
+    elif args.out_dir is None:
+        # market_data / TradingEnv read only *.csv: streamed outputs are not training data
+        parser.error("--stream needs its own --out-dir (the env reads only the CSVs in datasets/processed)")
+    elif any(args.out_dir.glob("*.csv")):
+        parser.error(f"--out-dir {args.out_dir} holds CSV outputs; --stream would leave them stale next to the .npy files")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    args.out_dir.mkdir(parents=True, exist_ok=True)
 
-def main():
     print("Starting feature pipeline...")
-    csv_files = list(RAW_DIR.glob("*.csv"))
-    print(f"Found {len(csv_files)} files in {RAW_DIR}")
+    csv_files = sorted(args.raw_dir.glob("*.csv"))
+    print(f"Found {len(csv_files)} files in {args.raw_dir}")
+
+    IndicatorEngine(args.indicators)     # fail fast on unknown specs
+    output_format = "npy" if args.stream else "csv"
+    previous = {} if args.full else read_manifest(args.out_dir, args.indicators, output_format)["assets"]
+
+    if args.verify_stream and csv_files:
+        diff = max(verify_stream(f, args.indicators, min(args.chunk_rows, 1_000), args.out_dir) for f in csv_files[:3])
+        print(f"Streamed features match the in-memory path (max abs diff {diff:.1e})")
 
+    started = time.perf_counter()
+    results, tasks = [], []
     for csv_file in csv_files:
-        print(f"Processing {csv_file.name}")
-        df = pd.read_csv(csv_file)
-        df = engineer_features(df)
-        out_path = OUT_DIR / csv_file.name
-        df.to_csv(out_path, index=False)
-        print(f"Saved → {out_path}")
-
-    print("Feature pipeline completed.")
+        out_name = f"{csv_file.stem}.npy" if args.stream else csv_file.name
+        out_path, entry = args.out_dir / out_name, previous.get(csv_file.name)
+        if entry is not None and out_path.exists() and _unchanged(csv_file.stat(), entry):
+            # Same size and mtime: skipped without reading the file
+            results.append((csv_file.name, "skip", entry, 0.0))
+        else:
+            tasks.append((csv_file, out_path, entry))
+
+    workers = max(1, min(args.workers, len(tasks)))
+    size = min(BATCH_ASSETS, max(1, len(tasks) // (4 * workers)))
+    batches = [tasks[i:i + size] for i in range(0, len(tasks), size)]
+    build = partial(build_batch, indicators=args.indicators, chunk_rows=args.chunk_rows if args.stream else None)
+    if workers == 1:
+        for batch in batches:
+            results += build(batch)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for batch_results in pool.map(build, batches):
+                results += batch_results
+
+    assets, counts = {}, {"skip": 0, "append": 0, "full": 0}
+    for name, mode, info, seconds in results:
+        assets[name] = info
+        counts[mode] += 1
+        if mode != "skip":
+            print(f"{'Updated' if mode == 'append' else 'Processed'} {name} ({info['rows']} rows, {seconds:.2f}s)")
+    write_manifest(args.out_dir, assets, args.indicators, output_format)
+
+    print(
+        f"Feature pipeline completed in {time.perf_counter() - started:.2f}s: "
+        f"{counts['full']} built, {counts['append']} appended, {counts['skip']} unchanged."
+    )
+
 
 if __name__ == "__main__":
     main()
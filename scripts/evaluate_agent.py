@@ -59,7 +59,12 @@ print(f"Final Portfolio Value: {portfolio_values[-1]:.2f}")
 # Generate metrics report (save to scripts/reports)
 REPORTS_DIR = BASE_DIR / "scripts" / "reports"
 REPORTS_DIR.mkdir(parents=True, exist_ok=True)
-generate_report(portfolio_values, save_dir=str(REPORTS_DIR))
+# Equal-weight index over the same steps, for rolling beta
+start = env.get_attr("window_size")[0]
+asset_returns = env.get_attr("asset_returns")[0][start:start + len(portfolio_values)]
+index_curve = np.cumprod(1 + asset_returns.mean(axis=1))
+
+generate_report(portfolio_values, save_dir=str(REPORTS_DIR), index_curve=index_curve)
 
 env.close()
 
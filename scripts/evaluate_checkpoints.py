@@ -0,0 +1,226 @@
+import argparse
+import os
+import pickle
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from metrics import generate_report
+from trading_env import TradingEnv
+
+# ============================================================
+# AEGRIS — Parallel Checkpoint Evaluation + Leaderboard
+# ============================================================
+#
+# Every checkpoint x seed is one process-pool task. A task loads the
+# checkpoint once, exports its actor to NumPy (export_actor.py) and runs all
+# of its episode windows in lockstep through one VecTradingEnv, so torch is
+# only used to read the weights. Workers open the shared market panel from
+# the mmap cache built by the parent, so the dataset is loaded once.
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+CHECKPOINT_DIR = BASE_DIR / "models" / "checkpoints"
+REPORTS_DIR = BASE_DIR / "scripts" / "reports"
+
+FINAL_NAME = "aegris_sac_final"
+CHECKPOINT_PATTERN = re.compile(r"aegris_checkpoint_(\d+)_steps\.zip$")
+
+
+# ============================================================
+# Discovery
+# ============================================================
+
+def discover_checkpoints(checkpoint_dir=CHECKPOINT_DIR, include_final=True):
+    """
+    [(name, timesteps, model_path, vecnorm_path)] sorted by timesteps.
+
+    Checkpoints use their own VecNormalize stats when training saved them
+    (save_vecnormalize=True), else the final vecnormalize.pkl.
+    """
+    checkpoint_dir = Path(checkpoint_dir)
+    final_vecnorm = checkpoint_dir / "vecnormalize.pkl"
+
+    found = []
+    for path in checkpoint_dir.glob("aegris_checkpoint_*_steps.zip"):
+        match = CHECKPOINT_PATTERN.match(path.name)
+        if not match:
+            continue
+        steps = int(match.group(1))
+        vecnorm = checkpoint_dir / f"aegris_checkpoint_vecnormalize_{steps}_steps.pkl"
+        found.append((path.stem, steps, path, vecnorm if vecnorm.exists() else final_vecnorm))
+    found.sort(key=lambda c: c[1])
+
+    final = checkpoint_dir / f"{FINAL_NAME}.zip"
+    if include_final and final.exists():
+        # Sorts after every intermediate checkpoint
+        steps = found[-1][1] + 1 if found else 0
+        found.append((FINAL_NAME, steps, final, final_vecnorm))
+    return found
+
+
+def episode_windows(n_steps, window_size, episode_steps, seed, n_windows):
+    """`n_windows` random episode start steps for `seed` (the policy is deterministic; seeds pick windows)."""
+    # The env terminates once current_step reaches n_steps - 1
+    last_start = n_steps - 1 - episode_steps
+    if last_start <= window_size:
+        return [window_size]
+    rng = np.random.default_rng(seed)
+    return sorted(rng.integers(window_size, last_start + 1, size=n_windows).tolist())
+
+
+# ============================================================
+# Worker
+# ============================================================
+
+def _init_worker():
+    # One torch thread per process: the pool is the parallelism
+    import torch
+    torch.set_num_threads(1)
+
+
+def load_actor(model_path, vecnorm_path):
+    """NumPy ActorPolicy of a SAC checkpoint plus its frozen observation stats."""
+    from stable_baselines3 import SAC
+    from export_actor import export_actor
+
+    vecnorm = None
+    if vecnorm_path is not None and Path(vecnorm_path).exists():
+        with open(vecnorm_path, "rb") as f:
+            vecnorm = pickle.load(f)
+    return export_actor(SAC.load(str(model_path), device="cpu"), vecnorm)
+
+
+def rollout_windows(policy, starts, episode_steps, **env_kwargs):
+    """(n_windows, steps + 1) equity of `policy` run from each start step in lockstep."""
+    from vec_trading_env import VecTradingEnv
+
+    env = VecTradingEnv(n_envs=len(starts), **env_kwargs)
+    env.set_options([{"start_step": s} for s in starts])
+    obs = env.reset()
+    steps = min(episode_steps, env.n_steps - 1 - max(starts))
+
+    equity = np.empty((len(starts), steps + 1))
+    equity[:, 0] = env.portfolio_value
+    for t in range(steps):
+        obs, _, _, infos = env.step(policy.predict(obs))
+        # Read from infos: a window reaching the end of the data is auto-reset by step()
+        equity[:, t + 1] = [info["portfolio_value"] for info in infos]
+    env.close()
+    return equity
+
+
+def evaluate_task(name, timesteps, model_path, vecnorm_path, seed, starts, episode_steps):
+    """Run one checkpoint over several episode windows at once; one metrics row per window."""
+    started = time.perf_counter()
+    policy = load_actor(model_path, vecnorm_path)
+    equity = rollout_windows(policy, starts, episode_steps)
+
+    rows = []
+    for start, curve in zip(starts, equity):
+        rows.append({
+            "checkpoint": name,
+            "timesteps": timesteps,
+            "seed": seed,
+            "start_step": start,
+            "steps": len(curve) - 1,
+            "vecnormalize": Path(vecnorm_path).name if vecnorm_path else None,
+            **generate_report(curve, save_dir=None),
+        })
+    return rows, time.perf_counter() - started
+
+
+# ============================================================
+# Leaderboard
+# ============================================================
+
+def build_leaderboard(runs, rank_by="Sharpe Ratio"):
+    """Per-checkpoint mean/std/min over all seeds and windows, best first."""
+    metrics = [c for c in runs.columns if c not in ("checkpoint", "timesteps", "seed", "start_step", "steps", "vecnormalize")]
+    grouped = runs.groupby(["checkpoint", "timesteps"])
+
+    leaderboard = grouped[metrics].mean().add_suffix(" mean")
+    leaderboard = leaderboard.join(grouped[metrics].std(ddof=0).add_suffix(" std"))
+    leaderboard[f"{rank_by} min"] = grouped[rank_by].min()
+    leaderboard["runs"] = grouped.size()
+
+    leaderboard = leaderboard.sort_values(f"{rank_by} mean", ascending=False).reset_index()
+    leaderboard.insert(0, "rank", np.arange(1, len(leaderboard) + 1))
+    return leaderboard
+
+
+# ============================================================
+# CLI
+# ============================================================
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate all training checkpoints in parallel and rank them.")
+    parser.add_argument("--checkpoint-dir", type=Path, default=CHECKPOINT_DIR)
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0, 1, 2], help="Each seed draws its own episode windows")
+    parser.add_argument("--windows", type=int, default=4, help="Episode windows per seed")
+    parser.add_argument("--episode-steps", type=int, default=1_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--no-final", action="store_true", help=f"Skip {FINAL_NAME}.zip")
+    parser.add_argument("--rank-by", default="Sharpe Ratio")
+    parser.add_argument("--out", type=Path, default=REPORTS_DIR / "leaderboard.csv")
+    parser.add_argument("--runs-out", type=Path, default=REPORTS_DIR / "checkpoint_runs.csv")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    checkpoints = discover_checkpoints(args.checkpoint_dir, include_final=not args.no_final)
+    if not checkpoints:
+        raise FileNotFoundError(f"No checkpoints found in {args.checkpoint_dir}")
+
+    # Builds the shared mmap panel cache once, before workers open it
+    env = TradingEnv()
+    windows = {
+        seed: episode_windows(env.n_steps, env.window_size, args.episode_steps, seed, args.windows)
+        for seed in args.seeds
+    }
+    tasks = [
+        (name, timesteps, model_path, vecnorm_path, seed, windows[seed], args.episode_steps)
+        for name, timesteps, model_path, vecnorm_path in checkpoints
+        for seed in args.seeds
+    ]
+    workers = max(1, min(args.workers, len(tasks)))
+
+    print(
+        f"🚀 Evaluating {len(checkpoints)} checkpoints x {len(args.seeds)} seeds x "
+        f"{args.windows} windows ({args.episode_steps:,} steps) on {workers} workers"
+    )
+
+    started = time.perf_counter()
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = {pool.submit(evaluate_task, *task): task for task in tasks}
+        for done, future in enumerate(as_completed(futures), 1):
+            name, _, _, _, seed, _, _ = futures[future]
+            task_rows, seconds = future.result()
+            rows.extend(task_rows)
+            print(f"  [{done}/{len(tasks)}] {name} seed={seed} ({seconds:.1f}s)")
+    elapsed = time.perf_counter() - started
+
+    runs = pd.DataFrame(rows).sort_values(["timesteps", "seed", "start_step"])
+    leaderboard = build_leaderboard(runs, args.rank_by)
+
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.runs_out.parent.mkdir(parents=True, exist_ok=True)
+    runs.to_csv(args.runs_out, index=False)
+    leaderboard.to_csv(args.out, index=False)
+
+    columns = ["rank", "checkpoint", f"{args.rank_by} mean", f"{args.rank_by} std", "Total Return (%) mean", "Max Drawdown (%) mean"]
+    print(f"\n📊 Leaderboard ({len(runs)} runs in {elapsed:.1f}s)")
+    print(leaderboard[columns].head(10).round(3).to_string(index=False))
+    print(f"\n✅ Best checkpoint: {leaderboard['checkpoint'].iloc[0]}")
+    print(f"✅ Leaderboard saved at: {args.out}")
+    print(f"✅ Per-run metrics saved at: {args.runs_out}")
+
+
+if __name__ == "__main__":
+    main()
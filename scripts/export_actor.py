@@ -0,0 +1,148 @@
+import argparse
+from pathlib import Path
+
+import numpy as np
+import torch.nn as nn
+from stable_baselines3 import SAC
+from stable_baselines3.common.torch_layers import FlattenExtractor
+from stable_baselines3.common.vec_env import DummyVecEnv, VecNormalize
+
+from actor import ARTIFACT_NAME, ActorPolicy
+from trading_env import TradingEnv
+
+# -------------------------------
+# Resolve paths
+# -------------------------------
+BASE_DIR = Path(__file__).resolve().parents[1]
+CHECKPOINT_DIR = BASE_DIR / "models" / "checkpoints"
+
+MODEL_PATH = CHECKPOINT_DIR / "aegris_sac_final"
+VECNORM_PATH = CHECKPOINT_DIR / "vecnormalize.pkl"
+
+ACTIVATION_NAMES = {
+    nn.ReLU: "relu",
+    nn.Tanh: "tanh",
+    nn.ELU: "elu",
+    nn.LeakyReLU: "leaky_relu",
+}
+
+
+# -------------------------------
+# Export
+# -------------------------------
+def export_actor(model, vecnorm=None):
+    """Actor MLP + frozen observation stats + action bounds of a SAC model as an ActorPolicy."""
+    actor = model.policy.actor
+    if not isinstance(actor.features_extractor, FlattenExtractor):
+        raise ValueError("Only MlpPolicy (flatten features extractor) actors can be exported")
+
+    layers, activation = [], None
+    for module in actor.latent_pi:
+        if isinstance(module, nn.Linear):
+            layers.append(_linear(module))
+        elif type(module) in ACTIVATION_NAMES:
+            activation = ACTIVATION_NAMES[type(module)]
+        else:
+            raise ValueError(f"Unsupported actor layer {module}")
+
+    policy = ActorPolicy(
+        layers,
+        activation or "relu",
+        _linear(actor.mu),
+        model.action_space.low,
+        model.action_space.high,
+        squash=model.policy.squash_output,
+    )
+
+    if vecnorm is not None and vecnorm.norm_obs:
+        policy.obs_mean = vecnorm.obs_rms.mean.copy()
+        policy.obs_std = np.sqrt(vecnorm.obs_rms.var + vecnorm.epsilon)
+        policy.clip_obs = float(vecnorm.clip_obs)
+
+    return policy
+
+
+def _linear(module):
+    # (in, out) layout so inference is `x @ w + b`
+    return (
+        module.weight.detach().cpu().numpy().T.copy(),
+        module.bias.detach().cpu().numpy().copy(),
+    )
+
+
+# -------------------------------
+# Verification
+# -------------------------------
+def sample_observations(n=2_000, seed=0, **env_kwargs):
+    """Raw observations from random-action rollouts of TradingEnv."""
+    env = TradingEnv(**env_kwargs)
+    rng = np.random.default_rng(seed)
+    obs, _ = env.reset(seed=seed)
+
+    samples = []
+    for _ in range(n):
+        samples.append(obs)
+        obs, _, terminated, truncated, _ = env.step(rng.random(env.n_assets))
+        if terminated or truncated:
+            obs, _ = env.reset()
+    return np.stack(samples)
+
+
+def verify_actor(policy, model, vecnorm, obs, atol=1e-5):
+    """Max abs difference between the NumPy actor and SAC.predict on `obs`; raises above `atol`."""
+    normalized = vecnorm.normalize_obs(obs) if vecnorm is not None else obs
+    expected, _ = model.predict(normalized, deterministic=True)
+    actual = policy.predict(obs)
+
+    max_diff = float(np.abs(actual - expected).max())
+    if not np.allclose(actual, expected, atol=atol, rtol=0):
+        raise AssertionError(f"Exported actor deviates from SAC.predict: max |diff| = {max_diff:.3g} > {atol}")
+    return max_diff
+
+
+def export_and_verify(model, vecnorm, out_path, samples=2_000, atol=1e-5):
+    policy = export_actor(model, vecnorm)
+    max_diff = verify_actor(policy, model, vecnorm, sample_observations(samples), atol)
+    policy.save(out_path)
+
+    # Round trip: the saved file must give the same actions
+    reloaded = ActorPolicy.load(out_path)
+    verify_actor(reloaded, model, vecnorm, sample_observations(samples, seed=1), atol)
+    return max_diff
+
+
+# -------------------------------
+# CLI
+# -------------------------------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Export the SAC actor as a NumPy-only inference artifact.")
+    parser.add_argument("--model", type=Path, default=MODEL_PATH, help="SB3 SAC checkpoint (without .zip)")
+    parser.add_argument("--vecnorm", type=Path, default=VECNORM_PATH, help="VecNormalize statistics (.pkl)")
+    parser.add_argument("--out", type=Path, default=CHECKPOINT_DIR / ARTIFACT_NAME)
+    parser.add_argument("--samples", type=int, default=2_000, help="Observations used for the equivalence check")
+    parser.add_argument("--atol", type=float, default=1e-5, help="Max allowed |action difference|")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    model = SAC.load(args.model, device="cpu")
+    vecnorm = None
+    if args.vecnorm.exists():
+        vecnorm = VecNormalize.load(args.vecnorm, DummyVecEnv([TradingEnv]))
+        vecnorm.training = False
+        vecnorm.norm_reward = False
+    else:
+        print(f"⚠️ No VecNormalize stats at {args.vecnorm}; exporting without observation normalization")
+
+    max_diff = export_and_verify(model, vecnorm, args.out, args.samples, args.atol)
+
+    model_size = Path(f"{args.model}.zip").stat().st_size
+    print(f"✅ Actor exported to: {args.out}")
+    print(f"✅ Equivalence vs SAC.predict on {args.samples:,} obs: max |diff| = {max_diff:.2e}")
+    print(f"✅ Size: {args.out.stat().st_size / 1e6:.2f} MB (full SAC checkpoint: {model_size / 1e6:.2f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,422 @@
+import argparse
+import re
+import time
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import as_strided
+
+# ============================================================
+# AEGRIS — Vectorized Indicator Engine
+# ============================================================
+#
+# Computes a configurable indicator set on a stacked (n_assets, T) panel
+# in one pass. Every kernel works along the time axis for all assets at
+# once, so Python overhead grows with the number of indicators and with
+# T / EWM_BLOCK, not with the number of assets.
+#
+# Assets of different lengths are left-padded with NaN (see stack_series).
+# Each row starts at its first finite close. Values after that start must
+# not have gaps.
+#
+# Outputs follow ta / pandas conventions (NaN until a window is complete,
+# ATR zero-filled like ta); `verify_against_ta` checks this.
+
+EWM_BLOCK = 64
+ROLLING_SEGMENT = 256       # steps per cumulative-sum block in rolling_mean_std
+
+# Indicator name -> default parameters. A spec is the name optionally
+# followed by parameters, e.g. "volatility_60", "macd_5_35_5"; the spec
+# string is the output column name.
+INDICATORS = {
+    "return": (),
+    "volatility": (20,),            # rolling std of returns (ddof=1)
+    "rsi": (14,),                   # Wilder RSI (ta.momentum.RSIIndicator)
+    "ema": (20,),                   # ta.trend.EMAIndicator
+    "macd": (12, 26, 9),            # macd, macd_signal, macd_diff (ta.trend.MACD)
+    "atr": (14,),                   # ta.volatility.AverageTrueRange
+    "zscore": (20,),                # (close - rolling mean) / rolling std
+    "volume_zscore": (20,),
+}
+
+# build_features' historical feature set
+DEFAULT_INDICATORS = ("return", "volatility", "rsi")
+
+# Raw inputs each indicator needs besides close
+EXTRA_INPUTS = {"atr": ("high", "low"), "volume_zscore": ("volume",)}
+
+SPEC_PATTERN = re.compile(r"^([a-z_]+?)((?:_\d+)*)$")
+
+
+def parse_spec(spec):
+    """'macd_5_35_5' -> ('macd', (5, 35, 5)); bare names take the defaults."""
+    match = SPEC_PATTERN.match(spec)
+    name, params = (match.group(1), match.group(2)) if match else (spec, "")
+    if name not in INDICATORS:
+        raise ValueError(f"Unknown indicator {spec!r}; choose from {sorted(INDICATORS)}")
+
+    defaults = INDICATORS[name]
+    values = tuple(int(p) for p in params.split("_")[1:])
+    if len(values) not in (0, len(defaults)):
+        raise ValueError(f"{name} takes {len(defaults)} parameters, got {spec!r}")
+    return name, values or defaults
+
+
+# ============================================================
+# Kernels (all along the last axis, per-row start index)
+# ============================================================
+
+def ewm(values, alpha, start, min_periods=1):
+    """
+    pandas `.ewm(alpha=alpha, adjust=False).mean()` of each row, beginning
+    at start[i] (earlier values are ignored, outputs NaN).
+
+    The recurrence y[t] = (1 - alpha) * y[t-1] + alpha * x[t] is solved
+    EWM_BLOCK steps at a time: within a block it is one matmul with a fixed
+    lower-triangular decay matrix, plus the decayed carry from the
+    previous block. Decay powers stay >= (1 - alpha) ** EWM_BLOCK, so this
+    is as stable as the scalar loop.
+    """
+    n, T = values.shape
+    steps = np.arange(T)
+    decay = 1.0 - alpha
+
+    x = np.where(steps >= start[:, None], values, 0.0)
+    # Seed: the first output equals the first input, as with adjust=False
+    rows = np.flatnonzero(start < T)
+    x[rows, start[rows]] /= alpha
+
+    lag = np.arange(EWM_BLOCK)[None, :] - np.arange(EWM_BLOCK)[:, None]
+    weights = np.where(lag >= 0, alpha * decay ** np.maximum(lag, 0), 0.0)   # x[k] -> y[j]
+    carry = decay ** np.arange(1, EWM_BLOCK + 1)
+
+    out = np.empty((n, T))
+    prev = np.zeros(n)
+    for s in range(0, T, EWM_BLOCK):
+        block = x[:, s:s + EWM_BLOCK]
+        b = block.shape[1]
+        out[:, s:s + b] = block @ weights[:b, :b] + prev[:, None] * carry[:b]
+        prev = out[:, s + b - 1]
+
+    out[steps < (start + min_periods - 1)[:, None]] = np.nan
+    return out
+
+
+def rolling_mean_std(values, window, start):
+    """
+    Rolling mean and sample std (ddof=1) of each trailing window that lies
+    after the row's start (NaN otherwise).
+
+    Window sums are differences of cumulative sums, O(T) for any window.
+    Plain cumsums of price-level data cancel badly, so time is cut into
+    ROLLING_SEGMENT-step blocks: each block's windows are summed within
+    its own segment (the block plus window - 1 steps of lead-in), centred
+    on that segment's mean. Segments are zero-copy strided views.
+    """
+    n, T = values.shape
+    steps = np.arange(T)
+    valid = steps >= start[:, None]
+
+    block = max(ROLLING_SEGMENT, window)
+    n_blocks = -(-T // block)
+    length = block + window - 1
+
+    def segments(array):
+        # window - 1 leading zeros, so the first block has its lead-in too
+        padded = np.zeros((n, window - 1 + n_blocks * block))
+        padded[:, window - 1:window - 1 + T] = array
+        s0, s1 = padded.strides
+        return as_strided(padded, shape=(n, n_blocks, length), strides=(s0, block * s1, s1), writeable=False)
+
+    x = segments(np.where(valid, values, 0.0))
+    mask = segments(valid)
+    anchor = x.sum(axis=-1) / np.maximum(mask.sum(axis=-1), 1)
+    centred = (x - anchor[..., None]) * mask
+
+    def window_sums(array):
+        csum = np.cumsum(array, axis=-1)
+        total = csum[..., window - 1:].copy()
+        total[..., 1:] -= csum[..., :-window]
+        return total
+
+    total = window_sums(centred)
+    total_sq = window_sums(centred * centred)
+    local_mean = total / window
+    var = np.maximum(total_sq - total * local_mean, 0.0) / (window - 1)
+
+    mean = (local_mean + anchor[..., None]).reshape(n, -1)[:, :T]
+    std = np.sqrt(var).reshape(n, -1)[:, :T]
+    invalid = steps < (start + window - 1)[:, None]
+    mean[invalid] = np.nan
+    std[invalid] = np.nan
+    return mean, std
+
+
+# ============================================================
+# Engine
+# ============================================================
+
+class IndicatorEngine:
+    """
+    Compute `indicators` (specs, see INDICATORS) on (n_assets, T) arrays.
+
+    `compute(close, high=None, low=None, volume=None)` returns
+    {column: (n_assets, T) array}; `add_to_frame(df)` does the same for a
+    single asset's lowercase-column DataFrame.
+    """
+
+    def __init__(self, indicators=DEFAULT_INDICATORS):
+        self.specs = [(spec, *parse_spec(spec)) for spec in indicators]
+
+    @property
+    def inputs(self):
+        needed = {"close"}
+        for _, name, _ in self.specs:
+            needed.update(EXTRA_INPUTS.get(name, ()))
+        return sorted(needed)
+
+    @property
+    def warmup_rows(self):
+        """History needed for outputs to match a full-history computation to float precision."""
+        rows = 1
+        for _, name, params in self.specs:
+            if name in ("rsi", "atr"):
+                rows = max(rows, int(37 * params[0]) + params[0])       # (1 - 1/n) ** k < 1e-16
+            elif name in ("ema", "macd"):
+                rows = max(rows, int(18.5 * (max(params) + 1)) + sum(params))
+            else:
+                rows = max(rows, params[0] + 1 if params else 2)
+        return rows
+
+    def compute(self, close, high=None, low=None, volume=None):
+        close = np.atleast_2d(np.asarray(close, dtype=np.float64))
+        start = _first_valid(close)
+        cache = {}
+
+        def returns():
+            if "returns" not in cache:
+                prev = np.roll(close, 1, axis=1)
+                cache["returns"] = close / prev - 1
+            return cache["returns"]
+
+        out = {}
+        for spec, name, params in self.specs:
+            if name == "return":
+                r = returns().copy()
+                r[np.arange(r.shape[1]) < (start + 1)[:, None]] = np.nan
+                out[spec] = r
+            elif name == "volatility":
+                _, out[spec] = rolling_mean_std(returns(), params[0], start + 1)
+            elif name == "rsi":
+                out[spec] = _rsi(close, start, params[0])
+            elif name == "ema":
+                out[spec] = ewm(close, 2 / (params[0] + 1), start, params[0])
+            elif name == "macd":
+                suffix = spec[len("macd"):]
+                macd, signal = _macd(close, start, *params)
+                out[f"macd{suffix}"] = macd
+                out[f"macd_signal{suffix}"] = signal
+                out[f"macd_diff{suffix}"] = macd - signal
+            elif name == "atr":
+                out[spec] = _atr(_as_panel(high, "high"), _as_panel(low, "low"), close, start, params[0])
+            elif name == "zscore":
+                out[spec] = _zscore(close, start, params[0])
+            elif name == "volume_zscore":
+                out[spec] = _zscore(_as_panel(volume, "volume"), start, params[0])
+        return out
+
+    def add_to_frame(self, df):
+        """Add indicator columns to one asset's frame (columns lowercase)."""
+        arrays = {name: df[name].to_numpy(dtype=np.float64) for name in self.inputs}
+        for column, values in self.compute(**arrays).items():
+            df[column] = values[0]
+        return df
+
+
+def _first_valid(close):
+    finite = np.isfinite(close)
+    start = np.where(finite.any(axis=1), finite.argmax(axis=1), close.shape[1])
+    steps = np.arange(close.shape[1])
+    if (~finite & (steps >= start[:, None])).any():
+        raise ValueError("close has gaps after its first value; drop or fill them first")
+    return start
+
+
+def _as_panel(values, name):
+    if values is None:
+        raise ValueError(f"{name} is required for the requested indicators")
+    return np.atleast_2d(np.asarray(values, dtype=np.float64))
+
+
+def _rsi(close, start, window):
+    diff = close - np.roll(close, 1, axis=1)
+    # ta: the first diff is NaN and counts as zero movement
+    diff[np.arange(close.shape[1]) <= start[:, None]] = 0.0
+    # Gains and losses smoothed in one stacked pass
+    n = close.shape[0]
+    both = ewm(np.concatenate([np.maximum(diff, 0.0), np.maximum(-diff, 0.0)]), 1 / window, np.tile(start, 2), window)
+    up, down = both[:n], both[n:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100 - 100 / (1 + up / down)
+    return np.where(down == 0, 100.0, rsi)
+
+
+def _macd(close, start, fast, slow, signal):
+    macd = ewm(close, 2 / (fast + 1), start, fast) - ewm(close, 2 / (slow + 1), start, slow)
+    # The signal EMA starts at the first defined MACD value
+    return macd, ewm(np.nan_to_num(macd), 2 / (signal + 1), start + slow - 1, signal)
+
+
+def _atr(high, low, close, start, window):
+    n, T = close.shape
+    prev_close = np.roll(close, 1, axis=1)
+    true_range = np.maximum.reduce([high - low, np.abs(high - prev_close), np.abs(low - prev_close)])
+    first = np.arange(T) == start[:, None]
+    true_range[first] = (high - low)[first]
+
+    # ta seeds with the mean of the first `window` true ranges, then Wilder smoothing
+    seed_at = start + window - 1
+    seeded = true_range.copy()
+    rows = np.flatnonzero(seed_at < T)
+    seeded[rows, seed_at[rows]] = np.nanmean(
+        np.where((np.arange(T) >= start[:, None]) & (np.arange(T) <= seed_at[:, None]), true_range, np.nan)[rows],
+        axis=1,
+    )
+    atr = ewm(seeded, 1 / window, seed_at)
+    # ta reports zeros (not NaN) before the first full window
+    return np.where(np.isnan(atr) & (np.arange(T) >= start[:, None]), 0.0, atr)
+
+
+def _zscore(values, start, window):
+    mean, std = rolling_mean_std(values, window, start)
+    return (values - mean) / std
+
+
+# ============================================================
+# Panel helpers
+# ============================================================
+
+def stack_series(series):
+    """Stack 1-D arrays of different lengths into an (n, T) panel, left-padded with NaN."""
+    length = max(len(s) for s in series)
+    panel = np.full((len(series), length), np.nan)
+    for i, s in enumerate(series):
+        panel[i, length - len(s):] = s
+    return panel
+
+
+def compute_frames(frames, indicators=DEFAULT_INDICATORS):
+    """Indicators for several assets' frames in one panel pass; returns the frames with columns added."""
+    engine = IndicatorEngine(indicators)
+    inputs = {name: stack_series([f[name].to_numpy(dtype=np.float64) for f in frames]) for name in engine.inputs}
+    results = engine.compute(**inputs)
+
+    out = []
+    for i, frame in enumerate(frames):
+        columns = {column: values[i, values.shape[1] - len(frame):] for column, values in results.items()}
+        existing = frame.drop(columns=[c for c in columns if c in frame.columns])
+        out.append(pd.concat([existing, pd.DataFrame(columns, index=frame.index)], axis=1))
+    return out
+
+
+# ============================================================
+# Verification against ta / pandas
+# ============================================================
+
+def ta_reference(df, indicators):
+    """The same indicators computed one at a time with ta / pandas."""
+    from ta.momentum import RSIIndicator
+    from ta.trend import EMAIndicator, MACD
+    from ta.volatility import AverageTrueRange
+
+    out = {}
+    for spec in indicators:
+        name, params = parse_spec(spec)
+        if name == "return":
+            out[spec] = df["close"].pct_change()
+        elif name == "volatility":
+            out[spec] = df["close"].pct_change().rolling(params[0]).std()
+        elif name == "rsi":
+            out[spec] = RSIIndicator(df["close"], window=params[0]).rsi()
+        elif name == "ema":
+            out[spec] = EMAIndicator(df["close"], window=params[0]).ema_indicator()
+        elif name == "macd":
+            suffix = spec[len("macd"):]
+            macd = MACD(df["close"], window_slow=params[1], window_fast=params[0], window_sign=params[2])
+            out[f"macd{suffix}"] = macd.macd()
+            out[f"macd_signal{suffix}"] = macd.macd_signal()
+            out[f"macd_diff{suffix}"] = macd.macd_diff()
+        elif name == "atr":
+            out[spec] = AverageTrueRange(df["high"], df["low"], df["close"], window=params[0]).average_true_range()
+        elif name in ("zscore", "volume_zscore"):
+            values = df["volume" if name == "volume_zscore" else "close"]
+            rolling = values.rolling(params[0])
+            out[spec] = (values - rolling.mean()) / rolling.std()
+    return out
+
+
+def synthetic_frames(n_assets=8, length=5_000, seed=0):
+    """Random-walk OHLCV frames of different lengths (exercises the NaN padding)."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for i in range(n_assets):
+        n = length - (37 * i) % max(length // 10, 1)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+        spread = np.abs(rng.normal(0, 0.01, n))
+        frames.append(pd.DataFrame({
+            "close": close,
+            "high": close * (1 + spread),
+            "low": close * (1 - spread),
+            "volume": rng.integers(100_000, 10_000_000, n).astype(np.float64),
+        }))
+    return frames
+
+
+def verify_against_ta(frames, indicators, rtol=1e-9, atol=1e-9):
+    """Max abs difference per column between the engine and ta; raises if any exceeds the tolerance."""
+    computed = compute_frames(frames, indicators)
+    diffs = {}
+    for frame, result in zip(frames, computed):
+        for column, expected in ta_reference(frame, indicators).items():
+            expected = expected.to_numpy(dtype=np.float64)
+            actual = result[column].to_numpy()
+            if not np.array_equal(np.isnan(actual), np.isnan(expected)):
+                raise AssertionError(f"{column}: NaN positions differ from ta")
+            valid = ~np.isnan(expected)
+            diff = float(np.abs(actual[valid] - expected[valid]).max(initial=0.0))
+            diffs[column] = max(diffs.get(column, 0.0), diff)
+            if not np.allclose(actual[valid], expected[valid], rtol=rtol, atol=atol):
+                raise AssertionError(f"{column} deviates from ta: max abs diff {diff:.3g}")
+    return diffs
+
+
+# ============================================================
+# CLI
+# ============================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the indicator engine against ta and time both.")
+    parser.add_argument("--indicators", nargs="+", default=list(INDICATORS), help="Indicator specs, e.g. rsi volatility_60")
+    parser.add_argument("--assets", type=int, default=50)
+    parser.add_argument("--length", type=int, default=30_000)
+    args = parser.parse_args(argv)
+
+    diffs = verify_against_ta(synthetic_frames(4, 3_000), args.indicators)
+    print("✅ Matches ta/pandas: " + ", ".join(f"{k} {v:.1e}" for k, v in diffs.items()))
+
+    frames = synthetic_frames(args.assets, args.length, seed=1)
+    started = time.perf_counter()
+    compute_frames(frames, args.indicators)
+    engine = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for frame in frames:
+        ta_reference(frame, args.indicators)
+    reference = time.perf_counter() - started
+
+    print(f"📊 {args.assets} assets x {args.length:,} rows, {len(args.indicators)} indicators")
+    print(f"   engine {engine:.2f}s | ta per asset {reference:.2f}s | {reference / engine:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+CACHE_DIRNAME = ".panel_cache"
+CACHE_VERSION = 1
+
+# ============================================================
+# AEGRIS — Market Data Engine
+# ============================================================
+
+class MarketPanel:
+    """
+    Contiguous, pre-aligned market tensor shared by the trading envs.
+
+    - features: (T, n_assets, n_features) float32, NaN/inf sanitized
+    - returns:  (T, n_assets) float32 simple returns of the first
+                feature column (the price); returns[0] is zero
+
+    Stepping and observing then reduce to O(1) slices:
+    returns[t] and features[t].
+    """
+
+    def __init__(self, assets, columns, features, returns):
+        self.assets = list(assets)
+        self.columns = list(columns)
+        self.features = features
+        self.returns = returns
+        self.fingerprint = None     # content hash of the source CSVs (cached loads only)
+
+    @property
+    def n_steps(self):
+        return self.features.shape[0]
+
+    @property
+    def n_assets(self):
+        return self.features.shape[1]
+
+    @property
+    def n_features(self):
+        return self.features.shape[2]
+
+    @classmethod
+    def from_arrays(cls, assets, columns, arrays):
+        """Build a panel from per-asset (T_i, n_features) arrays, truncated to the shortest."""
+        n_features = arrays[0].shape[1]
+        for asset, values in zip(assets, arrays):
+            if values.shape[1] != n_features:
+                raise ValueError(
+                    f"{asset} has {values.shape[1]} numeric columns, expected {n_features}"
+                )
+
+        # Align lengths
+        min_len = min(len(v) for v in arrays)
+        raw = np.stack([v[:min_len] for v in arrays], axis=1).astype(np.float32)
+
+        prices = raw[:, :, 0]
+        returns = np.zeros(prices.shape, dtype=np.float32)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns[1:] = prices[1:] / prices[:-1] - 1.0
+
+        features = np.nan_to_num(raw, nan=0.0, posinf=1.0, neginf=-1.0)
+
+        return cls(
+            assets,
+            columns,
+            np.ascontiguousarray(features),
+            np.ascontiguousarray(returns),
+        )
+
+    @classmethod
+    def dummy(cls, n_steps=252 * 5, n_features=3):
+        """Flat single-asset panel so callers can run without processed data."""
+        # First column as "price" (non-zero to avoid div-by-zero in returns)
+        dummy = np.zeros((n_steps, n_features), dtype=np.float32)
+        dummy[:, 0] = 1.0
+        columns = [f"f{i}" for i in range(n_features)]
+        return cls.from_arrays(["CASH"], columns, [dummy])
+
+
+# ============================================================
+# Loading
+# ============================================================
+
+def read_feature_csv(csv_path, backfill=False):
+    """
+    Numeric feature columns of one processed CSV, gaps filled.
+
+    Gaps are forward-filled and leading gaps zero-filled, as the training
+    env always did; backfill=True fills leading gaps from the first valid
+    value instead (the backend's original behavior).
+    """
+    df = pd.read_csv(csv_path)
+
+    # Keep only numeric features
+    df = df.select_dtypes(include=[np.number])
+
+    if df.isna().any().any():
+        df = df.ffill()
+        if backfill:
+            df = df.bfill()
+        df = df.fillna(0)
+
+    return df
+
+
+def load_market_panel(data_dir, use_cache=True, backfill=False):
+    """
+    Load every processed CSV in data_dir into a single MarketPanel.
+
+    With use_cache, the compiled panel is kept under
+    data_dir/.panel_cache and opened read-only via mmap, so repeated
+    env constructions (and separate worker processes) skip CSV parsing
+    and share the same physical pages. The cache is rebuilt only when
+    the content fingerprint of the source CSVs changes. Each fill mode
+    (see read_feature_csv) has its own cache directory.
+    """
+    data_dir = Path(data_dir)
+    csv_files = sorted(data_dir.glob("*.csv"))
+
+    if len(csv_files) == 0:
+        raise RuntimeError(f"No CSV files found in {data_dir}")
+
+    if not use_cache:
+        return _build_panel(csv_files, backfill)
+
+    cache_dir = data_dir / (CACHE_DIRNAME + ("_bfill" if backfill else ""))
+    manifest = _read_manifest(cache_dir)
+    sources = _fingerprint_sources(csv_files, manifest.get("sources", {}))
+    fingerprint = _combine_fingerprints(sources)
+
+    if manifest.get("version") == CACHE_VERSION and manifest.get("fingerprint") == fingerprint:
+        try:
+            panel = _open_cached_panel(cache_dir, manifest)
+            panel.fingerprint = fingerprint
+            if sources != manifest["sources"]:
+                # Same content, new mtimes: remember them to skip rehashing
+                _write_manifest(cache_dir, {**manifest, "sources": sources})
+            return panel
+        except (OSError, ValueError) as e:
+            print(f"Warning: market data cache unreadable ({e}); rebuilding.")
+
+    panel = _build_panel(csv_files, backfill)
+
+    panel.fingerprint = fingerprint
+
+    try:
+        manifest = _write_cache(cache_dir, panel, sources, fingerprint)
+    except OSError as e:
+        print(f"Warning: could not write market data cache to {cache_dir} ({e}).")
+        return panel
+
+    cached = _open_cached_panel(cache_dir, manifest)
+    cached.fingerprint = fingerprint
+    return cached
+
+
+def dataset_fingerprint(data_dir):
+    """Content fingerprint of the processed CSVs in data_dir (the key of the panel cache)."""
+    data_dir = Path(data_dir)
+    manifest = _read_manifest(data_dir / CACHE_DIRNAME)
+    sources = _fingerprint_sources(sorted(data_dir.glob("*.csv")), manifest.get("sources", {}))
+    return _combine_fingerprints(sources)
+
+
+def _build_panel(csv_files, backfill=False):
+    assets, arrays, columns = [], [], None
+    for csv in csv_files:
+        df = read_feature_csv(csv, backfill)
+        if columns is None:
+            columns = list(df.columns)
+
+        assets.append(csv.stem)
+        arrays.append(df.values.astype(np.float32))
+
+    return MarketPanel.from_arrays(assets, columns, arrays)
+
+
+# ============================================================
+# Binary Cache
+# ============================================================
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _fingerprint_sources(csv_files, known):
+    """Per-file content hashes; files whose size and mtime are unchanged reuse the known hash."""
+    sources = {}
+    for csv in csv_files:
+        stat = csv.stat()
+        entry = known.get(csv.name)
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            sha = entry["sha256"]
+        else:
+            sha = _file_sha256(csv)
+
+        sources[csv.name] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": sha,
+        }
+    return sources
+
+
+def _combine_fingerprints(sources):
+    digest = hashlib.sha256()
+    for name in sorted(sources):
+        digest.update(name.encode())
+        digest.update(sources[name]["sha256"].encode())
+    return digest.hexdigest()
+
+
+def _read_manifest(cache_dir):
+    try:
+        with open(cache_dir / "manifest.json") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_manifest(cache_dir, manifest):
+    tmp = cache_dir / f"manifest.json.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, cache_dir / "manifest.json")
+
+
+def _open_cached_panel(cache_dir, manifest):
+    features = np.load(cache_dir / manifest["features"], mmap_mode="r")
+    returns = np.load(cache_dir / manifest["returns"], mmap_mode="r")
+
+    if list(features.shape) != manifest["shape"]:
+        raise ValueError("cached panel shape does not match manifest")
+
+    return MarketPanel(manifest["assets"], manifest["columns"], features, returns)
+
+
+def _atomic_save(path, array):
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+def _write_cache(cache_dir, panel, sources, fingerprint):
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    # Data files are named by fingerprint, so readers of an older
+    # manifest never see a half-replaced panel
+    stem = f"panel-{fingerprint[:16]}"
+    manifest = {
+        "version": CACHE_VERSION,
+        "fingerprint": fingerprint,
+        "assets": panel.assets,
+        "columns": panel.columns,
+        "shape": list(panel.features.shape),
+        "features": f"{stem}.features.npy",
+        "returns": f"{stem}.returns.npy",
+        "sources": sources,
+    }
+
+    _atomic_save(cache_dir / manifest["features"], panel.features)
+    _atomic_save(cache_dir / manifest["returns"], panel.returns)
+
+    _write_manifest(cache_dir, manifest)
+
+    # Drop panels from older fingerprints (still-open mmaps keep their pages)
+    for old in cache_dir.glob("panel-*.npy"):
+        if not old.name.startswith(stem):
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+    return manifest
@@ -0,0 +1,68 @@
+import argparse
+import json
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+
+from actor import ARTIFACT_NAME
+from market_data import dataset_fingerprint
+
+# -------------------------------
+# Resolve paths
+# -------------------------------
+BASE_DIR = Path(__file__).resolve().parents[1]
+CHECKPOINT_DIR = BASE_DIR / "models" / "checkpoints"
+REGISTRY_DIR = BASE_DIR / "models" / "registry"
+DATA_DIR = BASE_DIR / "datasets" / "processed"
+
+# Files a version may consist of (actor artifact preferred by the backend)
+VERSION_FILES = [ARTIFACT_NAME, "aegris_sac_final.zip", "vecnormalize.pkl"]
+
+
+def register(source, version, notes=None, data_dir=DATA_DIR):
+    """Copy a trained model into models/registry/<version>/ with its metadata."""
+    files = [source / name for name in VERSION_FILES if (source / name).exists()]
+    if not any(f.name in (ARTIFACT_NAME, "aegris_sac_final.zip") for f in files):
+        raise FileNotFoundError(f"No {ARTIFACT_NAME} or aegris_sac_final.zip in {source}")
+
+    target = REGISTRY_DIR / version
+    if target.exists():
+        raise FileExistsError(f"Version {version} already exists at {target}")
+
+    # Stage then rename, so the backend never sees a half-copied version
+    staging = REGISTRY_DIR / f".{version}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    for f in files:
+        shutil.copy2(f, staging / f.name)
+
+    meta = {
+        "version": version,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "source": str(source),
+        "files": [f.name for f in files],
+        "data_fingerprint": dataset_fingerprint(data_dir),
+        "notes": notes,
+    }
+    with open(staging / "meta.json", "w") as f:
+        json.dump(meta, f, indent=2)
+
+    staging.rename(target)
+    return target, meta
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Publish a trained model as a new registry version.")
+    parser.add_argument("--version", default=datetime.now().strftime("v%Y%m%d-%H%M%S"))
+    parser.add_argument("--source", type=Path, default=CHECKPOINT_DIR, help="Directory with the trained model files")
+    parser.add_argument("--notes", help="Free-form description stored in meta.json")
+    args = parser.parse_args(argv)
+
+    target, meta = register(args.source, args.version, args.notes)
+    print(f"✅ Registered {args.version} at {target} ({', '.join(meta['files'])})")
+    print(f"✅ Data fingerprint: {meta['data_fingerprint'][:16]}")
+    print(f"➡️  Activate with: POST /api/admin/models/{args.version}/activate")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import numpy as np
+
+# ============================================================
+# AEGRIS — Rolling Window Statistics
+# ============================================================
+
+class RollingStats:
+    """
+    Fixed-capacity rolling mean / variance over the last `window` values.
+
+    Values live in a preallocated ring buffer and the running sums are
+    updated incrementally, so each push is O(1) with no allocation and
+    memory stays flat however long the episode runs.
+
+    `shape` adds leading batch dimensions, so one instance can track
+    many independent series (e.g. one per vectorized portfolio) that
+    are pushed in lockstep; `reset(mask)` clears individual series.
+    Variance is the population variance (ddof=0), matching np.std.
+    """
+
+    def __init__(self, window=50, shape=()):
+        self.window = int(window)
+        self.shape = tuple(shape)
+
+        self.buffer = np.zeros(self.shape + (self.window,), dtype=np.float64)
+        self.count = np.zeros(self.shape, dtype=np.int64)
+        self.total = np.zeros(self.shape, dtype=np.float64)
+        self.total_sq = np.zeros(self.shape, dtype=np.float64)
+        self.head = 0
+
+    def reset(self, mask=None):
+        if mask is None:
+            self.buffer[...] = 0.0
+            self.count = np.zeros(self.shape, dtype=np.int64)
+            self.total = np.zeros(self.shape, dtype=np.float64)
+            self.total_sq = np.zeros(self.shape, dtype=np.float64)
+            self.head = 0
+            return
+
+        # Cleared slots are zero, so they drop out of the sums unchanged
+        self.buffer[mask] = 0.0
+        self.count[mask] = 0
+        self.total[mask] = 0.0
+        self.total_sq[mask] = 0.0
+
+    def push(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        old = self.buffer[..., self.head].copy()
+
+        self.total += values - old
+        self.total_sq += values * values - old * old
+        self.buffer[..., self.head] = values
+
+        self.head = (self.head + 1) % self.window
+        self.count = np.minimum(self.count + 1, self.window)
+
+        # Resync once per lap so floating-point drift cannot accumulate
+        if self.head == 0:
+            self.total = self.buffer.sum(axis=-1)
+            self.total_sq = np.square(self.buffer).sum(axis=-1)
+
+    @property
+    def mean(self):
+        return self.total / np.maximum(self.count, 1)
+
+    @property
+    def variance(self):
+        n = np.maximum(self.count, 1)
+        mean = self.total / n
+        return np.maximum(self.total_sq / n - mean * mean, 0.0)
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
@@ -1,9 +1,11 @@
 import numpy as np
-import pandas as pd
 from pathlib import Path
 import gymnasium as gym
 from gymnasium import spaces
 
+from market_data import load_market_panel
+from rolling_stats import RollingStats
+
 # ============================================================
 # AEGRIS — Institutional Grade Trading Environment
 # ============================================================
@@ -33,6 +35,7 @@ class TradingEnv(gym.Env):
         max_drawdown=0.25,           # 25% risk limit
         reward_scaling=1e3,
         window_size=1,
+        vol_window=50,               # steps in the reward volatility window
     ):
         super().__init__()
 
@@ -44,11 +47,17 @@ class TradingEnv(gym.Env):
 
         # ------------------------
         # Load market data
+        # (T, n_assets, n_features) panel + (T, n_assets) returns
         # ------------------------
-        self.data = self._load_data()
-        self.assets = list(self.data.keys())
-        self.n_assets = len(self.assets)
-        self.n_features = self.data[self.assets[0]].shape[1]
+        self.market = self._load_data()
+        self.assets = self.market.assets
+        self.n_assets = self.market.n_assets
+        self.n_features = self.market.n_features
+        self.n_steps = self.market.n_steps
+
+        # Flattened per-step feature rows (views, no copy)
+        self.features = self.market.features.reshape(self.n_steps, -1)
+        self.asset_returns = self.market.returns
 
         # ------------------------
         # Risk Parameters
@@ -60,6 +69,7 @@ class TradingEnv(gym.Env):
         self.max_drawdown = float(max_drawdown)
         self.reward_scaling = float(reward_scaling)
         self.window_size = int(window_size)
+        self.vol_window = int(vol_window)
 
         # ------------------------
         # Action Space
@@ -91,36 +101,14 @@ class TradingEnv(gym.Env):
         self.portfolio_value = None
         self.peak_value = None
         self.weights = None
-        self.returns_buffer = None
+        self.returns_stats = RollingStats(self.vol_window)
 
     # ============================================================
     # Data Loading
     # ============================================================
 
     def _load_data(self):
-        data = {}
-        csv_files = sorted(self.data_dir.glob("*.csv"))
-
-        if len(csv_files) == 0:
-            raise RuntimeError(f"No CSV files found in {self.data_dir}")
-
-        for csv in csv_files:
-            df = pd.read_csv(csv)
-
-            # Keep only numeric features
-            df = df.select_dtypes(include=[np.number])
-
-            if df.isna().any().any():
-                df = df.fillna(method="ffill").fillna(0)
-
-            data[csv.stem] = df.values.astype(np.float32)
-
-        # Align lengths
-        min_len = min(len(v) for v in data.values())
-        for k in data:
-            data[k] = data[k][:min_len]
-
-        return data
+        return load_market_panel(self.data_dir)
 
     # ============================================================
     # Reset
@@ -129,13 +117,14 @@ class TradingEnv(gym.Env):
     def reset(self, seed=None, options=None):
         super().reset(seed=seed)
 
-        self.current_step = self.window_size
+        # options={"start_step": t} starts the episode at step t (evaluation windows)
+        self.current_step = int((options or {}).get("start_step", self.window_size))
         self.portfolio_value = self.initial_cash
         self.peak_value = self.initial_cash
 
         # Start equally weighted
         self.weights = np.ones(self.n_assets) / self.n_assets
-        self.returns_buffer = []
+        self.returns_stats.reset()
 
         return self._get_obs(), {}
 
@@ -144,24 +133,15 @@ class TradingEnv(gym.Env):
     # ============================================================
 
     def _get_obs(self):
-        features = []
-
-        for asset in self.assets:
-            window = self.data[asset][self.current_step]
-            features.append(window)
-
-        features = np.concatenate(features)
-
-        cash_ratio = np.array([1.0 - self.weights.sum()], dtype=np.float32)
+        # Market features are sanitized once at load time
+        cash_ratio = 1.0 - self.weights.sum()
 
         obs = np.concatenate([
-            features,
-            self.weights.astype(np.float32),
-            cash_ratio,
+            self.features[self.current_step],
+            self.weights,
+            [cash_ratio],
         ])
 
-        obs = np.nan_to_num(obs, nan=0.0, posinf=1.0, neginf=-1.0)
-
         return obs.astype(np.float32)
 
     # ============================================================
@@ -192,15 +172,7 @@ class TradingEnv(gym.Env):
         # -----------------------
         # Compute returns
         # -----------------------
-        asset_returns = []
-
-        for asset in self.assets:
-            prices = self.data[asset]
-            p0 = prices[self.current_step - 1][0]
-            p1 = prices[self.current_step][0]
-            asset_returns.append((p1 / p0) - 1.0)
-
-        asset_returns = np.array(asset_returns, dtype=np.float32)
+        asset_returns = self.asset_returns[self.current_step]
 
         portfolio_return = np.dot(self.weights, asset_returns)
         portfolio_return -= cost
@@ -225,9 +197,9 @@ class TradingEnv(gym.Env):
         # Reward Engineering
         # -----------------------
         log_return = np.log1p(portfolio_return)
-        self.returns_buffer.append(log_return)
+        self.returns_stats.push(log_return)
 
-        volatility = np.std(self.returns_buffer[-50:]) + 1e-8
+        volatility = self.returns_stats.std + 1e-8
         sharpe_proxy = log_return / volatility
 
         drawdown_penalty = -5.0 * max(0, drawdown - self.max_drawdown)
@@ -241,13 +213,14 @@ class TradingEnv(gym.Env):
         # -----------------------
         # Termination
         # -----------------------
-        terminated = self.current_step >= len(self.data[self.assets[0]]) - 1
+        terminated = self.current_step >= self.n_steps - 1
         truncated = False
 
         info = {
             "portfolio_value": self.portfolio_value,
             "drawdown": drawdown,
             "turnover": turnover,
+            "cost": cost,
             "volatility": volatility,
         }
 
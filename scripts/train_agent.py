@@ -1,24 +1,80 @@
+import argparse
 import os
+import time
 from pathlib import Path
 
-import gymnasium as gym
+import torch
+import yaml
 from stable_baselines3 import SAC
-from stable_baselines3.common.vec_env import DummyVecEnv, VecNormalize
 from stable_baselines3.common.monitor import Monitor
-from stable_baselines3.common.callbacks import CheckpointCallback
+from stable_baselines3.common.vec_env import (
+    DummyVecEnv,
+    SubprocVecEnv,
+    VecMonitor,
+    VecNormalize,
+)
+from stable_baselines3.common.callbacks import BaseCallback, CheckpointCallback
 
+from actor import ARTIFACT_NAME
+from export_actor import export_and_verify
 from trading_env import TradingEnv
+from vec_trading_env import VecTradingEnv
 
 # -------------------------------
 # Resolve project root safely
 # -------------------------------
 BASE_DIR = Path(__file__).resolve().parents[1]
 CHECKPOINT_DIR = BASE_DIR / "models" / "checkpoints"
-CHECKPOINT_DIR.mkdir(parents=True, exist_ok=True)
 
+# Defaults (override via CLI or --config)
 TOTAL_STEPS = 20_000   # fast retrain (increase later)
+N_ENVS = 8             # parallel portfolios / env workers
+CHECKPOINT_FREQ = 5_000
+GRADIENT_STEPS = -1    # one SAC update per collected sample, as with a single env
 MODEL_NAME = "aegris_sac_final"
 
+
+# -------------------------------
+# Configuration
+# -------------------------------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train the AEGRIS SAC agent.")
+    parser.add_argument("--config", type=Path, help="YAML file whose keys override the defaults below")
+    parser.add_argument("--total-steps", type=int, default=TOTAL_STEPS, help="Total env samples to collect")
+    parser.add_argument("--n-envs", type=int, default=N_ENVS, help="Number of parallel portfolios / env workers")
+    parser.add_argument(
+        "--vec-env",
+        choices=["batched", "subproc", "dummy"],
+        default="batched",
+        help="batched: one process, NumPy-vectorized; subproc: one TradingEnv per worker process; "
+             "dummy: sequential TradingEnvs in-process",
+    )
+    parser.add_argument("--train-freq", type=int, default=1, help="Vectorized env steps between updates")
+    parser.add_argument(
+        "--gradient-steps",
+        type=int,
+        default=GRADIENT_STEPS,
+        help="Gradient steps per update; -1 = one per collected sample (train_freq * n_envs), "
+             "keeping the update-to-data ratio at 1 for any --n-envs",
+    )
+    parser.add_argument("--torch-threads", type=int, default=0, help="Torch intra-op threads for SAC updates (0 = torch default)")
+    parser.add_argument("--env-threads", type=int, default=1, help="BLAS/OpenMP threads per env worker process")
+    parser.add_argument("--checkpoint-freq", type=int, default=CHECKPOINT_FREQ, help="Env samples between checkpoints")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--progress-bar", action=argparse.BooleanOptionalAction, default=True)
+
+    args = parser.parse_args(argv)
+
+    if args.config:
+        with open(args.config) as f:
+            overrides = yaml.safe_load(f) or {}
+        # Config file sets defaults; explicit CLI flags still win
+        parser.set_defaults(**{k.replace("-", "_"): v for k, v in overrides.items()})
+        args = parser.parse_args(argv)
+
+    return args
+
+
 # -------------------------------
 # Environment Factory
 # -------------------------------
@@ -27,68 +83,136 @@ def make_env():
     env = Monitor(env)
     return env
 
-# -------------------------------
-# Build Vectorized Environment
-# -------------------------------
-env = DummyVecEnv([make_env])
-
-# Normalize observations + rewards
-env = VecNormalize(
-    env,
-    norm_obs=True,
-    norm_reward=True,
-    clip_obs=10.0
-)
 
-# -------------------------------
-# Model
-# -------------------------------
-model = SAC(
-    policy="MlpPolicy",
-    env=env,
-    learning_rate=3e-4,
-    batch_size=256,
-    buffer_size=200_000,
-    learning_starts=1_000,
-    gamma=0.99,
-    tau=0.005,
-    verbose=1,
-    tensorboard_log=str(BASE_DIR / "logs"),
-)
+def build_env(args):
+    if args.vec_env == "batched":
+        # All portfolios advance in one batched NumPy step
+        env = VecMonitor(VecTradingEnv(n_envs=args.n_envs))
 
-# -------------------------------
-# Checkpointing
-# -------------------------------
-checkpoint_callback = CheckpointCallback(
-    save_freq=5_000,
-    save_path=str(CHECKPOINT_DIR),
-    name_prefix="aegris_checkpoint",
-)
+    elif args.vec_env == "subproc":
+        # Workers inherit the thread limits; market data comes from the shared mmap cache
+        os.environ["OMP_NUM_THREADS"] = str(args.env_threads)
+        os.environ["MKL_NUM_THREADS"] = str(args.env_threads)
+        env = SubprocVecEnv([make_env] * args.n_envs, start_method="spawn")
+
+    else:
+        env = DummyVecEnv([make_env] * args.n_envs)
+
+    if args.seed is not None:
+        env.seed(args.seed)
+
+    # Normalize observations + rewards
+    return VecNormalize(
+        env,
+        norm_obs=True,
+        norm_reward=True,
+        clip_obs=10.0
+    )
 
-# -------------------------------
-# Train
-# -------------------------------
-print("🚀 Training started...")
-model.learn(
-    total_timesteps=TOTAL_STEPS,
-    callback=checkpoint_callback,
-    progress_bar=True,
-)
 
 # -------------------------------
-# Save Model + Normalization
+# Throughput reporting
 # -------------------------------
-MODEL_PATH = CHECKPOINT_DIR / MODEL_NAME
-VECNORM_PATH = CHECKPOINT_DIR / "vecnormalize.pkl"
+class ThroughputCallback(BaseCallback):
+    """Logs env samples/sec (simulation + updates) so training nodes can be sized."""
 
-model.save(MODEL_PATH)
-env.save(VECNORM_PATH)
+    def __init__(self, log_every=1_000):
+        super().__init__()
+        self.log_every = log_every
+        self.start_time = None
+        self.start_steps = 0
+        self.last_log = 0
 
-print("\n✅ Training completed successfully!")
-print(f"✅ Model saved at: {MODEL_PATH}")
-print(f"✅ VecNormalize saved at: {VECNORM_PATH}")
+    def _on_training_start(self):
+        self.start_time = time.perf_counter()
+        self.start_steps = self.num_timesteps
 
-env.close()
+    def _on_step(self):
+        if self.num_timesteps - self.last_log >= self.log_every:
+            self.last_log = self.num_timesteps
+            self.logger.record("time/samples_per_sec", self.samples_per_sec)
+        return True
 
+    @property
+    def samples_per_sec(self):
+        elapsed = time.perf_counter() - self.start_time
+        return (self.num_timesteps - self.start_steps) / max(elapsed, 1e-9)
 
 
+# -------------------------------
+# Train
+# -------------------------------
+def main(argv=None):
+    args = parse_args(argv)
+    CHECKPOINT_DIR.mkdir(parents=True, exist_ok=True)
+
+    if args.torch_threads > 0:
+        torch.set_num_threads(args.torch_threads)
+
+    env = build_env(args)
+
+    # -------------------------------
+    # Model
+    # -------------------------------
+    model = SAC(
+        policy="MlpPolicy",
+        env=env,
+        learning_rate=3e-4,
+        batch_size=256,
+        buffer_size=200_000,
+        learning_starts=1_000,
+        gamma=0.99,
+        tau=0.005,
+        train_freq=args.train_freq,
+        gradient_steps=args.gradient_steps,
+        seed=args.seed,
+        verbose=1,
+        tensorboard_log=str(BASE_DIR / "logs"),
+    )
+
+    # -------------------------------
+    # Checkpointing
+    # -------------------------------
+    checkpoint_callback = CheckpointCallback(
+        save_freq=max(args.checkpoint_freq // args.n_envs, 1),   # counted in vectorized steps
+        save_path=str(CHECKPOINT_DIR),
+        name_prefix="aegris_checkpoint",
+        save_vecnormalize=True,     # per-checkpoint obs stats for evaluate_checkpoints.py
+    )
+    throughput = ThroughputCallback()
+
+    print(
+        f"🚀 Training started... ({args.vec_env} x{args.n_envs} envs, "
+        f"train_freq={args.train_freq}, gradient_steps={args.gradient_steps}, "
+        f"torch_threads={torch.get_num_threads()})"
+    )
+    model.learn(
+        total_timesteps=args.total_steps,
+        callback=[checkpoint_callback, throughput],
+        progress_bar=args.progress_bar,
+    )
+
+    # -------------------------------
+    # Save Model + Normalization
+    # -------------------------------
+    model_path = CHECKPOINT_DIR / MODEL_NAME
+    vecnorm_path = CHECKPOINT_DIR / "vecnormalize.pkl"
+
+    model.save(model_path)
+    env.save(vecnorm_path)
+
+    # Actor-only artifact for the backend (verified against model.predict)
+    actor_path = CHECKPOINT_DIR / ARTIFACT_NAME
+    max_diff = export_and_verify(model, env, actor_path)
+
+    print("\n✅ Training completed successfully!")
+    print(f"✅ Throughput: {throughput.samples_per_sec:,.0f} samples/sec")
+    print(f"✅ Model saved at: {model_path}")
+    print(f"✅ VecNormalize saved at: {vecnorm_path}")
+    print(f"✅ Actor artifact saved at: {actor_path} (max |diff| vs SAC.predict: {max_diff:.2e})")
+
+    env.close()
+
+
+if __name__ == "__main__":
+    main()
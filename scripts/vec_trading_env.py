@@ -0,0 +1,257 @@
+import numpy as np
+from stable_baselines3.common.vec_env import VecEnv
+
+from rolling_stats import RollingStats
+from trading_env import TradingEnv
+
+# ============================================================
+# AEGRIS — Batched Multi-Portfolio Trading Environment
+# ============================================================
+
+class VecTradingEnv(VecEnv):
+    """
+    Native vectorized version of TradingEnv.
+
+    Holds N independent portfolios over the same market data and
+    advances all of them with a handful of array operations per step,
+    instead of one Python-level TradingEnv.step per portfolio.
+
+    Semantics (action handling, costs, reward, termination) mirror
+    TradingEnv.step exactly; finished portfolios are reset automatically
+    and expose their last observation as info["terminal_observation"].
+    """
+
+    # Per-portfolio state arrays returned row-wise by get_attr
+    PER_ENV_ATTRS = ("current_step", "portfolio_value", "peak_value", "weights")
+
+    def __init__(self, n_envs=8, **env_kwargs):
+        # ------------------------
+        # Market data + risk parameters from a reference env
+        # ------------------------
+        env = TradingEnv(**env_kwargs)
+
+        self.assets = env.assets
+        self.n_assets = env.n_assets
+        self.n_features = env.n_features
+
+        self.initial_cash = env.initial_cash
+        self.max_position = env.max_position
+        self.transaction_cost = env.transaction_cost
+        self.slippage = env.slippage
+        self.max_drawdown = env.max_drawdown
+        self.reward_scaling = env.reward_scaling
+        self.window_size = env.window_size
+        self.vol_window = env.vol_window
+
+        # ------------------------
+        # Shared market panel (no copy)
+        # ------------------------
+        self.n_steps = env.n_steps
+        self.features = env.features
+        self.asset_returns = env.asset_returns
+
+        self.render_mode = None
+        super().__init__(n_envs, env.observation_space, env.action_space)
+
+        # ------------------------
+        # Internal State (one row per portfolio)
+        # ------------------------
+        self.current_step = np.zeros(n_envs, dtype=np.int64)
+        self.portfolio_value = np.zeros(n_envs, dtype=np.float64)
+        self.peak_value = np.zeros(n_envs, dtype=np.float64)
+        self.weights = np.zeros((n_envs, self.n_assets), dtype=np.float64)
+        self.returns_stats = RollingStats(self.vol_window, shape=(n_envs,))
+
+        self._actions = None
+
+    # ============================================================
+    # Reset
+    # ============================================================
+
+    def _reset_envs(self, mask):
+        self.current_step[mask] = self.window_size
+        self.portfolio_value[mask] = self.initial_cash
+        self.peak_value[mask] = self.initial_cash
+
+        # Start equally weighted
+        self.weights[mask] = 1.0 / self.n_assets
+        self.returns_stats.reset(mask)
+
+    def reset(self):
+        self._reset_envs(np.ones(self.num_envs, dtype=bool))
+        # set_options({"start_step": t}) starts that portfolio at step t (auto-resets start at window_size)
+        for i, options in enumerate(self._options):
+            if "start_step" in (options or {}):
+                self.current_step[i] = options["start_step"]
+        self._reset_seeds()
+        self._reset_options()
+        return self._get_obs()
+
+    # ============================================================
+    # Observation
+    # ============================================================
+
+    def _get_obs(self):
+        cash_ratio = 1.0 - self.weights.sum(axis=1, keepdims=True)
+
+        return np.concatenate([
+            self.features[self.current_step],
+            self.weights,
+            cash_ratio,
+        ], axis=1).astype(np.float32)
+
+    # ============================================================
+    # Step
+    # ============================================================
+
+    def step_async(self, actions):
+        self._actions = np.asarray(actions, dtype=np.float32).reshape(self.num_envs, self.n_assets)
+
+    def step_wait(self):
+        # -----------------------
+        # Normalize & clip actions
+        # -----------------------
+        actions = np.clip(self._actions, 0, 1)
+        totals = actions.sum(axis=1, keepdims=True)
+
+        target_weights = np.where(
+            totals > 0,
+            actions / np.where(totals > 0, totals, 1.0),
+            self.weights,
+        )
+
+        # Enforce max position limit
+        target_weights = np.minimum(target_weights, self.max_position)
+        target_weights /= target_weights.sum(axis=1, keepdims=True)
+
+        # -----------------------
+        # Transaction costs
+        # -----------------------
+        turnover = np.abs(target_weights - self.weights).sum(axis=1)
+        cost = turnover * (self.transaction_cost + self.slippage)
+
+        # -----------------------
+        # Compute returns
+        # -----------------------
+        asset_returns = self.asset_returns[self.current_step]
+
+        portfolio_return = np.einsum("ij,ij->i", self.weights, asset_returns)
+        portfolio_return -= cost
+
+        # Numerical safety
+        portfolio_return = np.clip(portfolio_return, -0.2, 0.2)
+
+        # -----------------------
+        # Update portfolios
+        # -----------------------
+        self.portfolio_value *= (1.0 + portfolio_return)
+        np.maximum(self.peak_value, self.portfolio_value, out=self.peak_value)
+        self.weights = target_weights
+        self.current_step += 1
+
+        # -----------------------
+        # Drawdown
+        # -----------------------
+        drawdown = (self.peak_value - self.portfolio_value) / self.peak_value
+
+        # -----------------------
+        # Reward Engineering
+        # -----------------------
+        log_return = np.log1p(portfolio_return)
+        self.returns_stats.push(log_return)
+
+        volatility = self.returns_stats.std + 1e-8
+        sharpe_proxy = log_return / volatility
+
+        drawdown_penalty = -5.0 * np.maximum(0, drawdown - self.max_drawdown)
+
+        rewards = (sharpe_proxy + drawdown_penalty) * self.reward_scaling
+
+        # Safety
+        rewards = np.nan_to_num(rewards).astype(np.float32)
+
+        # -----------------------
+        # Termination + auto-reset
+        # -----------------------
+        dones = self.current_step >= self.n_steps - 1
+
+        infos = [
+            {
+                "portfolio_value": self.portfolio_value[i],
+                "drawdown": drawdown[i],
+                "turnover": turnover[i],
+                "cost": cost[i],
+                "volatility": volatility[i],
+                "TimeLimit.truncated": False,
+            }
+            for i in range(self.num_envs)
+        ]
+
+        obs = self._get_obs()
+
+        if dones.any():
+            for i in np.flatnonzero(dones):
+                infos[i]["terminal_observation"] = obs[i].copy()
+            self._reset_envs(dones)
+            obs[dones] = self._get_obs()[dones]
+
+        return obs, rewards, dones, infos
+
+    # ============================================================
+    # VecEnv plumbing
+    # ============================================================
+
+    def close(self):
+        pass
+
+    def get_attr(self, attr_name, indices=None):
+        value = getattr(self, attr_name)
+        if attr_name in self.PER_ENV_ATTRS:
+            return [value[i] for i in self._get_indices(indices)]
+        return [value for _ in self._get_indices(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        if attr_name in self.PER_ENV_ATTRS:
+            getattr(self, attr_name)[list(self._get_indices(indices))] = value
+        else:
+            setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        """
+        TradingEnv methods on selected portfolios: reset and render act on
+        those rows only, get_wrapper_attr reads like get_attr. Other methods
+        have no per-portfolio form here and raise NotImplementedError rather
+        than running once on the whole batch.
+        """
+        indices = list(self._get_indices(indices))
+        if method_name == "reset":
+            return self._reset_indices(indices, *method_args, **method_kwargs)
+        if method_name == "render":
+            return [self._render_env(i) for i in indices]
+        if method_name == "get_wrapper_attr":
+            return self.get_attr(*method_args, indices=indices)
+
+        raise NotImplementedError(
+            f"VecTradingEnv.env_method({method_name!r}) is not supported per portfolio; "
+            "use reset, render or get_wrapper_attr"
+        )
+
+    def _reset_indices(self, indices, seed=None, options=None):
+        # TradingEnv.reset signature, returning (obs, info) per portfolio
+        mask = np.zeros(self.num_envs, dtype=bool)
+        mask[indices] = True
+        self._reset_envs(mask)
+        if "start_step" in (options or {}):
+            self.current_step[mask] = options["start_step"]
+        obs = self._get_obs()
+        return [(obs[i], {}) for i in indices]
+
+    def _render_env(self, i):
+        print(
+            f"[{i}] Step: {self.current_step[i]} | "
+            f"Portfolio: ${self.portfolio_value[i]:,.2f} | "
+            f"Drawdown: {100 * (self.peak_value[i] - self.portfolio_value[i]) / self.peak_value[i]:.2f}%"
+        )
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]
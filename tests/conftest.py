@@ -0,0 +1,50 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# The scripts import each other as top-level modules; backend code as services.*
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "scripts"))
+sys.path.insert(0, str(ROOT / "backend"))
+
+from build_features import engineer_features  # noqa: E402
+from indicators import synthetic_frames  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def panel_dir(tmp_path_factory):
+    """Tiny processed-feature directory: 4 synthetic assets x ~400 rows."""
+    data_dir = tmp_path_factory.mktemp("processed")
+    for i, frame in enumerate(synthetic_frames(n_assets=4, length=400, seed=7)):
+        engineer_features(frame).to_csv(data_dir / f"ASSET{i}.csv", index=False)
+    return data_dir
+
+
+class EqualWeightPolicy:
+    """Stand-in for a trained actor: the same allocation every step."""
+
+    def predict(self, obs):
+        return np.full((len(obs), 4), 0.25, dtype=np.float32)
+
+    def act(self, obs):
+        return self.predict(obs[None, :])[0]
+
+
+@pytest.fixture
+def simulation_service(panel_dir, tmp_path, monkeypatch):
+    """A ready SimulationService on the synthetic panel, wired into the simulation routes."""
+    import routes.simulation
+    from services.ml.market_data import load_market_panel
+    from services.ml.registry import ModelVersion
+    from services.ml.service import SimulationService
+
+    service = SimulationService()
+    service.market = load_market_panel(panel_dir, backfill=True)
+    service.registry.active = ModelVersion("test", tmp_path)
+    service.registry.active.policy = EqualWeightPolicy()
+    service.status = "ready"
+    monkeypatch.setattr(routes.simulation, "simulation_service", service)
+    yield service
+    service.shutdown()
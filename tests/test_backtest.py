@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from backtest import BASELINES, Backtester, load_schedules, verify_against_env
+from trading_env import TradingEnv
+
+
+def test_vectorized_backtest_matches_env_rollout(panel_dir):
+    env = TradingEnv(data_dir=str(panel_dir))
+    diffs = verify_against_env(env, n_steps=300, seed=3, rtol=1e-6)
+    assert max(diffs.values()) < 1e-6
+
+
+def test_baselines_run_as_one_stack(panel_dir):
+    backtester = Backtester.from_env(TradingEnv(data_dir=str(panel_dir)))
+    n_steps = backtester.max_steps
+    schedules = np.stack([baseline(backtester, n_steps) for baseline in BASELINES.values()])
+
+    result = backtester.run(schedules, list(BASELINES))
+    assert result.equity.shape == (len(BASELINES), n_steps)
+    # Each row of a stacked run equals running that schedule alone
+    for i, schedule in enumerate(schedules):
+        np.testing.assert_allclose(backtester.run(schedule).equity[0], result.equity[i], rtol=1e-12)
+
+
+def test_short_weight_schedule_is_rejected_by_name(panel_dir, tmp_path):
+    backtester = Backtester.from_env(TradingEnv(data_dir=str(panel_dir)))
+    path = tmp_path / "short.npy"
+    np.save(path, np.full((10, backtester.n_assets), 0.25))
+
+    with pytest.raises(ValueError, match="short.npy"):
+        load_schedules(path, 50, backtester.n_assets)
+    assert load_schedules(path, 10, backtester.n_assets).shape == (1, 10, backtester.n_assets)
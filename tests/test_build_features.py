@@ -0,0 +1,73 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import build_features
+from build_features import MANIFEST_NAME, MAX_ROWS
+from indicators import synthetic_frames
+
+
+def write_raw(path, frame):
+    frame.rename(columns=str.capitalize).to_csv(path, index=False)
+
+
+def append_raw(path, frame):
+    frame.rename(columns=str.capitalize).to_csv(path, mode="a", header=False, index=False)
+
+
+def build(raw_dir, out_dir, *extra):
+    build_features.main(["--raw-dir", str(raw_dir), "--out-dir", str(out_dir), "--workers", "1", *extra])
+    with open(out_dir / MANIFEST_NAME) as f:
+        return json.load(f)["assets"]
+
+
+def test_append_matches_full_rebuild_below_and_past_max_rows(tmp_path):
+    raw_dir, out_dir, full_dir = tmp_path / "raw", tmp_path / "out", tmp_path / "full"
+    raw_dir.mkdir()
+    frame = synthetic_frames(n_assets=1, length=MAX_ROWS + 100, seed=11)[0]
+    raw = raw_dir / "ASSET.csv"
+
+    write_raw(raw, frame.iloc[:MAX_ROWS - 200])
+    build(raw_dir, out_dir)
+
+    # Below the cap the new rows are appended in place; past it the window moves
+    for end in (MAX_ROWS - 50, MAX_ROWS + 100):
+        append_raw(raw, frame.iloc[len(pd.read_csv(raw)):end])
+        assets = build(raw_dir, out_dir)
+        assert assets["ASSET.csv"]["raw_rows"] == end
+
+        build(raw_dir, full_dir, "--full")
+        appended, rebuilt = pd.read_csv(out_dir / "ASSET.csv"), pd.read_csv(full_dir / "ASSET.csv")
+        assert appended.shape == rebuilt.shape
+        pd.testing.assert_frame_equal(appended, rebuilt, check_exact=False, rtol=1e-9, atol=1e-12)
+
+
+def test_streamed_output_matches_in_memory_build(tmp_path):
+    raw_dir, out_dir = tmp_path / "raw", tmp_path / "streamed"
+    raw_dir.mkdir()
+    frame = synthetic_frames(n_assets=1, length=5_000, seed=13)[0]
+    frame.loc[1_234, "close"] = float("nan")     # dropped rows inside a chunk
+    write_raw(raw_dir / "ASSET.csv", frame)
+
+    # Chunks smaller than the warm-up exercise the carried rolling state
+    build_features.main([
+        "--raw-dir", str(raw_dir), "--out-dir", str(out_dir), "--workers", "1",
+        "--stream", "--chunk-rows", "333", "--indicators", "return", "volatility", "rsi", "macd", "atr",
+    ])
+    columns, streamed = build_features.load_features(out_dir / "ASSET.npy")
+
+    expected = build_features.engineer_features(
+        pd.read_csv(raw_dir / "ASSET.csv"), ["return", "volatility", "rsi", "macd", "atr"], max_rows=None
+    )
+    assert columns == list(expected.columns)
+    np.testing.assert_allclose(streamed, expected.to_numpy(dtype=np.float64), rtol=1e-9, atol=1e-12)
+
+
+def test_stream_refuses_directories_with_csv_outputs(tmp_path):
+    (tmp_path / "ASSET.csv").write_text("close\n1\n")
+    with pytest.raises(SystemExit):
+        build_features.parse_args(["--stream", "--out-dir", str(tmp_path)])
+    with pytest.raises(SystemExit):
+        build_features.parse_args(["--stream"])
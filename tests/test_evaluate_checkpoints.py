@@ -0,0 +1,47 @@
+import numpy as np
+
+from evaluate_checkpoints import episode_windows, rollout_windows
+from trading_env import TradingEnv
+
+
+class MomentumPolicy:
+    """Deterministic stand-in for an exported actor: weights from the observation."""
+
+    def __init__(self, n_assets, n_features):
+        self.n_assets, self.n_features = n_assets, n_features
+
+    def predict(self, obs):
+        obs = np.atleast_2d(obs)
+        returns = obs[:, 5:self.n_assets * self.n_features:self.n_features]
+        return np.clip(0.5 + 10 * returns, 0, 1)
+
+
+def scalar_equity(env, policy, start, steps):
+    obs, _ = env.reset(options={"start_step": start})
+    equity = [env.portfolio_value]
+    for _ in range(steps):
+        obs, _, terminated, _, info = env.step(policy.predict(obs)[0])
+        equity.append(info["portfolio_value"])
+        if terminated:
+            break
+    return np.array(equity)
+
+
+def test_window_reaching_end_of_data_matches_scalar_env(panel_dir):
+    env = TradingEnv(data_dir=str(panel_dir))
+    policy = MomentumPolicy(env.n_assets, env.n_features)
+
+    # More steps than the data holds: falls back to one window that runs to the end
+    starts = episode_windows(env.n_steps, env.window_size, env.n_steps, seed=0, n_windows=3)
+    assert starts == [env.window_size]
+
+    last_start = env.n_steps - 1 - 50
+    starts = [env.window_size, 100, last_start]
+    equity = rollout_windows(policy, starts, episode_steps=50, data_dir=str(panel_dir))
+
+    for start, curve in zip(starts, equity):
+        expected = scalar_equity(env, policy, start, len(curve) - 1)
+        np.testing.assert_allclose(curve, expected, rtol=1e-6)
+
+    # The last window ends on the final step; it must not record the reset cash
+    assert equity[-1, -1] != env.initial_cash
@@ -0,0 +1,23 @@
+import numpy as np
+from stable_baselines3 import SAC
+from stable_baselines3.common.vec_env import DummyVecEnv, VecNormalize
+
+from actor import ActorPolicy
+from export_actor import export_actor, sample_observations, verify_actor
+from trading_env import TradingEnv
+
+
+def test_numpy_actor_matches_sac_predict(panel_dir, tmp_path):
+    env = VecNormalize(DummyVecEnv([lambda: TradingEnv(data_dir=str(panel_dir))]))
+    model = SAC("MlpPolicy", env, policy_kwargs={"net_arch": [32, 32]}, learning_starts=50, batch_size=32, seed=0)
+    model.learn(total_timesteps=100)     # non-trivial weights and observation statistics
+    env.training = False
+
+    obs = sample_observations(200, data_dir=str(panel_dir))
+    policy = export_actor(model, env)
+    assert verify_actor(policy, model, env, obs, atol=1e-6) < 1e-6
+
+    # The saved artifact gives the same actions
+    policy.save(tmp_path / "actor.npz")
+    reloaded = ActorPolicy.load(tmp_path / "actor.npz")
+    np.testing.assert_array_equal(reloaded.predict(obs), policy.predict(obs))
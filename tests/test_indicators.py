@@ -0,0 +1,18 @@
+import numpy as np
+
+from build_features import engineer_batch, engineer_features
+from indicators import INDICATORS, synthetic_frames, verify_against_ta
+
+
+def test_engine_matches_ta_for_every_indicator():
+    diffs = verify_against_ta(synthetic_frames(n_assets=3, length=800), list(INDICATORS), rtol=1e-9, atol=1e-9)
+    assert set(diffs) >= {"return", "volatility", "rsi", "macd", "macd_signal", "macd_diff", "atr"}
+
+
+def test_batched_build_matches_per_asset_build():
+    frames = synthetic_frames(n_assets=4, length=600, seed=5)
+    batched = engineer_batch([f.copy() for f in frames], list(INDICATORS))
+    for frame, result in zip(frames, batched):
+        expected = engineer_features(frame.copy(), list(INDICATORS))
+        assert list(result.columns) == list(expected.columns)
+        np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), rtol=1e-10, atol=1e-12)
@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+
+from market_data import load_market_panel, read_feature_csv
+
+
+def test_gap_fill_order(tmp_path):
+    path = tmp_path / "ASSET.csv"
+    pd.DataFrame({"close": [np.nan, 2.0, np.nan, 4.0], "rsi": [1.0, np.nan, 3.0, np.nan]}).to_csv(path, index=False)
+
+    # Training baseline: forward fill, leading gaps zero
+    df = read_feature_csv(path)
+    assert df["close"].tolist() == [0.0, 2.0, 2.0, 4.0]
+    assert df["rsi"].tolist() == [1.0, 1.0, 3.0, 3.0]
+
+    # Backend: leading gaps take the first valid value
+    assert read_feature_csv(path, backfill=True)["close"].tolist() == [2.0, 2.0, 2.0, 4.0]
+
+    # Each fill mode keeps its own panel cache
+    assert load_market_panel(tmp_path).features[0, 0, 0] == 0.0
+    assert load_market_panel(tmp_path, backfill=True).features[0, 0, 0] == 2.0
+    assert load_market_panel(tmp_path).features[0, 0, 0] == 0.0
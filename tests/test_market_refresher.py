@@ -0,0 +1,33 @@
+import asyncio
+
+from services.market_refresher import MarketRefresher
+
+
+def run_rounds(refresher, n):
+    async def rounds():
+        for _ in range(n):
+            await refresher.refresh_once()
+    asyncio.run(rounds())
+
+
+def test_one_failing_symbol_does_not_fail_the_round():
+    refresher = MarketRefresher(lambda: {"AAPL": True, "MSFT": True, "DELISTED": False}, stale_ttl=300)
+    run_rounds(refresher, 3)
+
+    assert refresher.has_data
+    assert refresher.consecutive_failures == 0 and refresher.failed_rounds == 0
+    assert refresher.status()["failing_symbols"] == {"DELISTED": 3}
+    assert refresher._next_delay() <= refresher.interval * (1 + refresher.jitter)
+
+
+def test_total_failure_backs_off_below_stale_ttl():
+    def refresh():
+        raise ConnectionError("upstream down")
+
+    refresher = MarketRefresher(refresh, interval=30, jitter=0.2, max_backoff=300, stale_ttl=300)
+    run_rounds(refresher, 10)
+
+    assert not refresher.has_data
+    assert refresher.consecutive_failures == 10
+    assert refresher.last_error == "upstream down"
+    assert max(refresher._next_delay() for _ in range(100)) < 300 / 2 + 1e-9
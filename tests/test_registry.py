@@ -0,0 +1,10 @@
+from services.ml.registry import ModelRegistry
+
+
+def test_discover_skips_staging_directories(tmp_path):
+    registry_dir = tmp_path / "registry"
+    for name in ("v1", ".v2.tmp", "v3.tmp"):
+        (registry_dir / name).mkdir(parents=True)
+        (registry_dir / name / "aegris_actor.npz").write_bytes(b"")
+
+    assert list(ModelRegistry(tmp_path).discover()) == ["v1"]
@@ -0,0 +1,61 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routes.simulation import router
+
+
+def client():
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+def test_read_only_routes_do_not_create_sessions(simulation_service):
+    api = client()
+    for path in ("/state", "/history", "/stream", "/run"):
+        response = api.get(f"/api/simulation{path}", headers={"X-Session-Id": "random-id"})
+        assert response.status_code == 404, path
+
+    health = api.get("/api/simulation/health", params={"session_id": "probe"})
+    assert health.status_code == 200 and health.json()["running"] is False
+    assert "random-id" not in simulation_service.sessions and "probe" not in simulation_service.sessions
+
+    # POST /start creates the session; reads then find it
+    assert api.post("/api/simulation/start", headers={"X-Session-Id": "mine"}).status_code == 200
+    assert api.get("/api/simulation/state", headers={"X-Session-Id": "mine"}).json()["running"] is True
+    assert api.get("/api/simulation/health", headers={"X-Session-Id": "mine"}).json()["running"] is True
+
+
+def test_close_session_only_takes_the_callers_header(simulation_service):
+    api = client()
+    api.post("/api/simulation/start", headers={"X-Session-Id": "victim"})
+
+    assert api.delete("/api/simulation/session", params={"session_id": "victim"}).status_code == 400
+    assert "victim" in simulation_service.sessions
+
+    closed = api.delete("/api/simulation/session", headers={"X-Session-Id": "victim"})
+    assert closed.json() == {"closed": True}
+    assert "victim" not in simulation_service.sessions
+
+
+def test_history_etag_covers_the_query(simulation_service):
+    api = client()
+    headers = {"X-Session-Id": "etag"}
+    api.post("/api/simulation/start", headers=headers)
+    for _ in range(3):
+        api.post("/api/simulation/step", headers=headers)
+
+    full = api.get("/api/simulation/history", headers=headers)
+    assert full.headers["cache-control"] == "private, no-cache"
+    assert full.headers["vary"] == "X-Session-Id"
+
+    # Same run and step count, different query: a 200 with its own ETag, never a 304
+    etags = {full.headers["etag"]}
+    for params in ({"since": 1}, {"limit": 1}, {"format": "columnar"}):
+        response = api.get("/api/simulation/history", params=params, headers={**headers, "If-None-Match": full.headers["etag"]})
+        assert response.status_code == 200, params
+        etags.add(response.headers["etag"])
+    assert len(etags) == 4
+
+    cached = api.get("/api/simulation/history", headers={**headers, "If-None-Match": full.headers["etag"]})
+    assert cached.status_code == 304 and cached.headers["vary"] == "X-Session-Id"
@@ -0,0 +1,65 @@
+import threading
+
+import pytest
+
+from services.executor import Saturated
+from services.ml.service import SessionBusy
+
+
+def test_synchronous_run_marks_the_session_busy(simulation_service):
+    session = simulation_service.session("sync")
+    session.reset()
+
+    entered, release = threading.Event(), threading.Event()
+    original = session._fast_forward
+
+    def paused(*args):
+        entered.set()
+        release.wait(5)
+        return original(*args)
+
+    session._fast_forward = paused
+    runner = threading.Thread(target=session.run, args=(10,))
+    runner.start()
+    entered.wait(5)
+    try:
+        with pytest.raises(SessionBusy):
+            session.step()
+        with pytest.raises(SessionBusy):
+            session.start_job(5)
+    finally:
+        release.set()
+        runner.join(5)
+
+    assert not session.sync_run
+    assert session.step()["step"] == 10      # usable again once the run returned
+
+
+def test_rejected_job_keeps_the_session_state(simulation_service, monkeypatch):
+    import routes.simulation
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    def saturated(*args):
+        raise Saturated("jobs")
+
+    monkeypatch.setattr(routes.simulation.jobs_executor, "submit", saturated)
+    app = FastAPI()
+    app.include_router(routes.simulation.router)
+    api = TestClient(app, raise_server_exceptions=False)
+
+    session = simulation_service.session("job")
+    session.reset()
+    session.run(20)
+    before = session.get_state()
+
+    response = api.post("/api/simulation/run", params={"background": True, "reset": True, "steps": 5},
+                        headers={"X-Session-Id": "job"})
+    assert response.status_code == 500 and session.job.status == "failed"
+    assert session.get_state() == before
+
+    # An accepted job resets on the worker, then runs
+    job = session.start_job(5, reset=True)
+    session.run_job(job)
+    assert job.status == "done" and job.result["steps"] == 5
+    assert session.get_state()["step"] == 4
@@ -0,0 +1,24 @@
+import asyncio
+
+from services.ml.stream import SnapshotBroadcaster
+
+
+def first_frames(broadcaster, n, **cursor):
+    async def collect():
+        frames = broadcaster.subscribe(**cursor)
+        return [await anext(frames) for _ in range(n)]
+    return [frame.decode().split("\n")[0] for frame in asyncio.run(collect())]
+
+
+def test_history_cursor_of_a_previous_run_replays_the_new_run():
+    broadcaster = SnapshotBroadcaster()
+    broadcaster.reset("a")
+    for step in range(10):
+        broadcaster.publish({"step": step})
+    # The client read history of run "a" up to step 5, then the session was reset
+    broadcaster.reset("b")
+    for step in range(3):
+        broadcaster.publish({"step": step})
+
+    assert first_frames(broadcaster, 4, last_event_id="a-5") == ["id: b-start", "id: b-0", "id: b-1", "id: b-2"]
+    assert first_frames(broadcaster, 1, last_event_id="b-1") == ["id: b-2"]
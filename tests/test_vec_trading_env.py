@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from trading_env import TradingEnv
+from vec_trading_env import VecTradingEnv
+
+
+def test_env_method_dispatches_per_portfolio(panel_dir, capsys):
+    env = VecTradingEnv(n_envs=3, data_dir=str(panel_dir))
+    env.reset()
+    for _ in range(5):
+        env.step(np.random.default_rng(0).random((3, env.n_assets)))
+    values = env.portfolio_value.copy()
+
+    # reset touches only the selected portfolios
+    [(obs, info)] = env.env_method("reset", indices=[1], options={"start_step": 40})
+    assert env.current_step[1] == 40 and env.portfolio_value[1] == env.initial_cash
+    np.testing.assert_array_equal(env.portfolio_value[[0, 2]], values[[0, 2]])
+    np.testing.assert_array_equal(obs, env._get_obs()[1])
+    assert info == {}
+
+    assert env.env_method("get_wrapper_attr", "portfolio_value") == env.get_attr("portfolio_value")
+    assert env.env_method("render", indices=[0, 2]) == [None, None]
+    assert capsys.readouterr().out.count("Portfolio:") == 2
+
+    # Anything else would run once on the whole batch, so it is refused
+    for name in ("close", "env_is_wrapped", "no_such_method"):
+        with pytest.raises(NotImplementedError, match=name):
+            env.env_method(name, indices=[0])
+
+
+def test_step_wait_matches_trading_env_step(panel_dir):
+    n_envs = 3
+    vec_env = VecTradingEnv(n_envs=n_envs, data_dir=str(panel_dir))
+    envs = [TradingEnv(data_dir=str(panel_dir)) for _ in range(n_envs)]
+    rng = np.random.default_rng(11)
+
+    # Staggered starts near the end so every portfolio terminates and auto-resets
+    vec_env.reset()
+    starts = [vec_env.n_steps - 20, vec_env.n_steps - 35, vec_env.window_size]
+    for i, (env, start) in enumerate(zip(envs, starts)):
+        vec_env.env_method("reset", indices=[i], options={"start_step": start})
+        env.reset(options={"start_step": start})
+
+    terminations = 0
+    for _ in range(60):
+        actions = rng.random((n_envs, vec_env.n_assets)).astype(np.float32)
+        actions[rng.random(n_envs) < 0.1] = 0.0          # keep-previous-weights path
+        obs, rewards, dones, infos = vec_env.step(actions)
+
+        for i, env in enumerate(envs):
+            expected_obs, reward, terminated, _, info = env.step(actions[i])
+            assert dones[i] == terminated
+            if terminated:
+                terminations += 1
+                np.testing.assert_allclose(infos[i]["terminal_observation"], expected_obs, rtol=1e-6, atol=1e-6)
+                expected_obs, _ = env.reset()
+            np.testing.assert_allclose(obs[i], expected_obs, rtol=1e-6, atol=1e-6)
+            # TradingEnv keeps float32 target weights, the batch float64; the reward divides
+            # by a volatility that is tiny right after a reset and amplifies the difference
+            np.testing.assert_allclose(rewards[i], reward, rtol=1e-4)
+            for key in ("portfolio_value", "drawdown", "cost"):
+                np.testing.assert_allclose(infos[i][key], info[key], rtol=2e-6, atol=1e-6)
+
+    assert terminations >= 2